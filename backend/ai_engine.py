@@ -1,11 +1,33 @@
 import os
 import json
 import re
-from anthropic import Anthropic
+import threading
 
-client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+from telemetry import timed_llm_call
 
+_client = None
+_client_lock = threading.Lock()
 
+
+def get_client():
+    """The Anthropic client. The SDK is imported and the client built on first use,
+    so processes that never call the API do not pay for either."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from anthropic import Anthropic
+
+            # The SDK also reads ANTHROPIC_BASE_URL, e.g. to use the local stand-in in
+            # anthropic_stub.py. Retries back off on 429/5xx and honour retry-after.
+            _client = Anthropic(
+                api_key=os.getenv("ANTHROPIC_API_KEY"),
+                max_retries=int(os.getenv("ANTHROPIC_MAX_RETRIES", "2")),
+                timeout=float(os.getenv("ANTHROPIC_TIMEOUT_SECONDS", "600")),
+            )
+        return _client
+
+
+@timed_llm_call
 def generate_anomaly_explanation(
     account_name: str,
     pattern: str,
@@ -29,7 +51,7 @@ def generate_anomaly_explanation(
     if peer_delta is not None:
         context += f"\nDelta from peer average: {peer_delta:.1f} points"
 
-    response = client.messages.create(
+    response = get_client().messages.create(
         model="claude-sonnet-4-6",
         max_tokens=500,
         messages=[{
@@ -49,6 +71,7 @@ def generate_anomaly_explanation(
     return response.content[0].text
 
 
+@timed_llm_call
 def generate_outreach_draft(
     account_name: str,
     pattern: str,
@@ -69,7 +92,7 @@ def generate_outreach_draft(
     if renewal_days is not None:
         context += f"\nRenewal in: {renewal_days} days"
 
-    response = client.messages.create(
+    response = get_client().messages.create(
         model="claude-sonnet-4-6",
         max_tokens=400,
         messages=[{
@@ -92,6 +115,7 @@ def generate_outreach_draft(
     return response.content[0].text
 
 
+@timed_llm_call
 def executor_decide(
     account_name: str,
     pattern: str,
@@ -100,7 +124,7 @@ def executor_decide(
     outreach_draft: str,
 ) -> dict:
     """Decide whether to auto-send, wait, or escalate."""
-    response = client.messages.create(
+    response = get_client().messages.create(
         model="claude-sonnet-4-6",
         max_tokens=200,
         messages=[{
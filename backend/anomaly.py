@@ -1,19 +1,34 @@
 import statistics
 from typing import List, Dict, Optional
 
+from scoring import metrics_to_columns
+
 
 def detect_anomalies(account_data: Dict, peer_scores: List[float]) -> Optional[Dict]:
     """Detect anomalies for an account based on metrics and peer comparison."""
-    metrics = account_data.get("metrics", [])
-    if len(metrics) < 14:
+    return detect_anomalies_columns(
+        metrics_to_columns(account_data.get("metrics", [])),
+        account_data.get("composite", 50.0),
+        account_data.get("seats", 1),
+        statistics.mean(peer_scores) if peer_scores else None,
+    )
+
+
+def detect_anomalies_columns(
+    columns: Dict, composite: float, seats: int, peer_mean: Optional[float]
+) -> Optional[Dict]:
+    """Same as detect_anomalies, reading date-ordered per-signal sequences.
+
+    Takes the peer mean rather than the peer scores so a scan computes it once,
+    not once per account.
+    """
+    count = len(columns["logins"])
+    if count < 14:
         return None
 
-    composite = account_data.get("composite", 50.0)
-    seats = account_data.get("seats", 1)
-
     # Z-score on logins (last 30 vs prior 30)
-    recent_logins = [m.get("logins", 0) for m in metrics[-30:]]
-    prior_logins = [m.get("logins", 0) for m in metrics[-60:-30]] if len(metrics) >= 60 else []
+    recent_logins = list(columns["logins"][-30:])
+    prior_logins = list(columns["logins"][-60:-30]) if count >= 60 else []
 
     login_z_score = None
     if prior_logins and len(prior_logins) > 1:
@@ -23,8 +38,8 @@ def detect_anomalies(account_data: Dict, peer_scores: List[float]) -> Optional[D
         login_z_score = (recent_mean - mean) / std
 
     # Z-score on API volume
-    recent_api = [m.get("api_calls", 0) for m in metrics[-30:]]
-    prior_api = [m.get("api_calls", 0) for m in metrics[-60:-30]] if len(metrics) >= 60 else []
+    recent_api = list(columns["api_calls"][-30:])
+    prior_api = list(columns["api_calls"][-60:-30]) if count >= 60 else []
 
     volume_z_score = None
     if prior_api and len(prior_api) > 1:
@@ -35,8 +50,7 @@ def detect_anomalies(account_data: Dict, peer_scores: List[float]) -> Optional[D
 
     # Peer comparison
     peer_delta = None
-    if peer_scores:
-        peer_mean = statistics.mean(peer_scores)
+    if peer_mean is not None:
         peer_delta = composite - peer_mean
 
     # Aggregate z-score
@@ -56,8 +70,8 @@ def detect_anomalies(account_data: Dict, peer_scores: List[float]) -> Optional[D
         is_anomaly = True
 
         # Classify pattern
-        last_7_dau = [m.get("dau", 0) for m in metrics[-7:]]
-        prior_7_dau = [m.get("dau", 0) for m in metrics[-14:-7]]
+        last_7_dau = list(columns["dau"][-7:])
+        prior_7_dau = list(columns["dau"][-14:-7])
 
         if last_7_dau and prior_7_dau:
             last_mean = statistics.mean(last_7_dau)
@@ -74,7 +88,7 @@ def detect_anomalies(account_data: Dict, peer_scores: List[float]) -> Optional[D
             pattern = "slow_erosion"
 
         # Check seat collapse
-        active_seats_avg = statistics.mean([m.get("active_seats", 0) for m in metrics[-30:]])
+        active_seats_avg = statistics.mean(columns["active_seats"][-30:])
         if active_seats_avg < seats * 0.3:
             pattern = "seat_collapse"
 
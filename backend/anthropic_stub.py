@@ -0,0 +1,299 @@
+"""Local stand-in for the Anthropic Messages API, for offline load and latency tests.
+
+    python anthropic_stub.py --port 8787 --latency-ms 1500 --latency-sigma 0.4 --error-rate 0.02 --rate-limit-rate 0.05
+
+Then point the backend at it (any API key is accepted):
+
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8787 ANTHROPIC_API_KEY=stub uvicorn main:app
+
+POST /v1/messages answers in the Messages API response format after a
+log-normal delay (median --latency-ms, shape --latency-sigma; 0 gives a fixed
+delay). Replies are canned and chosen by the prompt, so the same prompt always
+gets the same text. Executor prompts get the JSON decision the scan parses.
+Faults are injected at the configured rates: 429 rate_limit_error with
+retry-after, and 500/529 api_error/overloaded_error. --rpm also enforces a real
+per-minute request limit. Faults are drawn from --seed, so a sequential run
+is reproducible.
+
+GET /stats reports request counts by status, peak concurrency and latency
+percentiles. POST /stats/reset clears them between runs.
+
+In-process runs can skip HTTP entirely with install_ai_stub().
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from typing import Deque, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+DEFAULT_PORT = 8787
+
+_EXPLANATIONS = [
+    "{account} shows a {pattern} pattern at {severity} severity. Daily active usage and API volume have "
+    "fallen well below the account's own baseline over the last two weeks.\n\n"
+    "The drop is concentrated in core workflows, which usually points to a champion leaving or a team "
+    "moving to another tool rather than a seasonal dip.\n\n"
+    "Reach out this week to confirm who now owns the rollout and offer a short working session.",
+    "Usage at {account} has been eroding steadily ({pattern}, {severity}). Fewer seats are active each week "
+    "and feature breadth has narrowed to a handful of basics.\n\n"
+    "Accounts on this trajectory tend to churn at renewal unless value is re-established early.\n\n"
+    "Schedule a check-in with the account owner and review which features map to their goals.",
+]
+
+_DRAFTS = [
+    "Subject: Quick check-in on {account}\n\n"
+    "Hi team,\n\nI noticed your usage has changed over the last few weeks and wanted to make sure everything "
+    "is working the way you need it to.\n\nWould you have 20 minutes this week for a quick call? I can walk "
+    "through a couple of workflows that other teams have found useful.\n\nBest,\nYour CSM",
+    "Subject: Making the most of your workspace at {account}\n\n"
+    "Hi there,\n\nI'm reaching out to see how the rollout is going and whether there is anything blocking "
+    "your team.\n\nHappy to set up a short session to help more of your seats get value quickly.\n\n"
+    "Best,\nYour CSM",
+]
+
+_DECISIONS = [
+    {"action": "send", "reason": "Severity warrants immediate outreach.", "wait_days": 0},
+    {"action": "wait", "reason": "Signal is moderate; re-evaluate after more data.", "wait_days": 3},
+    {"action": "escalate", "reason": "Pattern needs human judgment.", "wait_days": 0},
+]
+
+
+class StubConfig:
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        latency_sigma: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        rpm: int = 0,
+        retry_after: int = 1,
+        seed: int = 0,
+    ):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.rpm = rpm
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+
+
+class _Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.statuses: Counter = Counter()
+            self.in_flight = 0
+            self.peak_in_flight = 0
+            self.latencies: List[float] = []
+
+    def start(self):
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def finish(self, status: int, seconds: float):
+        with self._lock:
+            self.in_flight -= 1
+            self.statuses[status] += 1
+            self.latencies.append(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = sorted(self.latencies)
+
+            def percentile(p):
+                return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 1) if latencies else None
+
+            return {
+                "requests": sum(self.statuses.values()),
+                "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "latency_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "p99": percentile(0.99)},
+            }
+
+
+def _prompt_text(body: dict) -> str:
+    parts = []
+    for message in body.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            parts.extend(block.get("text", "") for block in content if isinstance(block, dict))
+    return "\n".join(parts)
+
+
+def _field(prompt: str, name: str, default: str) -> str:
+    for line in prompt.splitlines():
+        if line.startswith(f"{name}: "):
+            return line[len(name) + 2:].strip()
+    return default
+
+
+def canned_reply(prompt: str) -> str:
+    """Deterministic text for a prompt, shaped like what ai_engine expects back."""
+    pick = int.from_bytes(hashlib.sha256(prompt.encode()).digest()[:4], "big")
+    values = {
+        "account": _field(prompt, "Account", "the account"),
+        "pattern": _field(prompt, "Pattern", "usage"),
+        "severity": _field(prompt, "Severity", "medium"),
+    }
+    if "Respond with ONLY valid JSON" in prompt:
+        return json.dumps(_DECISIONS[pick % len(_DECISIONS)])
+    if "outreach email" in prompt:
+        return _DRAFTS[pick % len(_DRAFTS)].format(**values)
+    return _EXPLANATIONS[pick % len(_EXPLANATIONS)].format(**values)
+
+
+def install_ai_stub():
+    """Replace the ai_engine module in this process with canned, instant replies.
+
+    For in-process runs (benchmarks, replays) that should not touch the network at
+    all. Call before the first scan imports ai_engine.
+    """
+    import sys
+    import types
+
+    def prompt(instruction: str, account_name: str, pattern: str, severity: str) -> str:
+        return f"{instruction}\nAccount: {account_name}\nPattern: {pattern}\nSeverity: {severity}"
+
+    stub = types.ModuleType("ai_engine")
+    stub.get_client = lambda: None
+    stub.generate_anomaly_explanation = lambda account_name, pattern, severity, *args, **kwargs: canned_reply(
+        prompt("Explain the anomaly", account_name, pattern, severity)
+    )
+    stub.generate_outreach_draft = lambda account_name, pattern, severity, *args, **kwargs: canned_reply(
+        prompt("Draft an outreach email", account_name, pattern, severity)
+    )
+    stub.executor_decide = lambda account_name, pattern, severity, *args, **kwargs: json.loads(
+        canned_reply(prompt("Respond with ONLY valid JSON", account_name, pattern, severity))
+    )
+    sys.modules["ai_engine"] = stub
+
+
+def _error(status: int, error_type: str, message: str, headers: Optional[dict] = None) -> JSONResponse:
+    return JSONResponse(
+        status_code=status,
+        content={"type": "error", "error": {"type": error_type, "message": message}},
+        headers=headers,
+    )
+
+
+def create_app(config: StubConfig) -> FastAPI:
+    app = FastAPI(title="Anthropic Messages API stub")
+    stats = _Stats()
+    window: Deque[float] = deque()
+
+    def fault() -> Optional[JSONResponse]:
+        now = time.monotonic()
+        if config.rpm:
+            while window and now - window[0] >= 60:
+                window.popleft()
+            if len(window) >= config.rpm:
+                retry_after = max(1, math.ceil(60 - (now - window[0])))
+                return _error(429, "rate_limit_error", "Requests per minute exceeded", {"retry-after": str(retry_after)})
+            window.append(now)
+        roll = config.rng.random()
+        if roll < config.rate_limit_rate:
+            return _error(429, "rate_limit_error", "Injected rate limit", {"retry-after": str(config.retry_after)})
+        roll -= config.rate_limit_rate
+        if roll < config.error_rate:
+            if config.rng.random() < 0.5:
+                return _error(529, "overloaded_error", "Injected overload")
+            return _error(500, "api_error", "Injected server error")
+        return None
+
+    def delay() -> float:
+        if config.latency_ms <= 0:
+            return 0.0
+        if config.latency_sigma <= 0:
+            return config.latency_ms / 1000
+        return config.rng.lognormvariate(math.log(config.latency_ms / 1000), config.latency_sigma)
+
+    @app.post("/v1/messages")
+    async def create_message(request: Request):
+        started = time.perf_counter()
+        stats.start()
+        status = 200
+        try:
+            try:
+                body = await request.json()
+            except ValueError:
+                body = None
+            if not isinstance(body, dict) or not body.get("model") or not body.get("max_tokens") or not body.get("messages"):
+                status = 400
+                return _error(400, "invalid_request_error", "model, max_tokens and messages are required")
+
+            error = fault()
+            if error is not None:
+                status = error.status_code
+                return error
+
+            await asyncio.sleep(delay())
+            prompt = _prompt_text(body)
+            text = canned_reply(prompt)
+            return {
+                "id": f"msg_stub_{uuid.uuid4().hex[:24]}",
+                "type": "message",
+                "role": "assistant",
+                "model": body["model"],
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn",
+                "stop_sequence": None,
+                "usage": {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4},
+            }
+        finally:
+            stats.finish(status, time.perf_counter() - started)
+
+    @app.get("/stats")
+    def get_stats():
+        return stats.snapshot()
+
+    @app.post("/stats/reset")
+    def reset_stats():
+        stats.reset()
+        window.clear()
+        return stats.snapshot()
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the Anthropic Messages API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="median response delay")
+    parser.add_argument("--latency-sigma", type=float, default=0.3, help="log-normal shape; 0 for a fixed delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failing with 500/529")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--rpm", type=int, default=0, help="requests per minute before 429s; 0 for no limit")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry-after seconds on injected 429s")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        rpm=args.rpm,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,291 @@
+"""Benchmark the scoring, scan and API hot paths on synthetic datasets.
+
+    python benchmarks.py
+    python benchmarks.py --sizes 1000,10000 --baseline benchmark_baseline.json
+
+Each dataset size runs in its own process against a fresh SQLite database in a
+temporary directory, loaded with synthetic.load_synthetic. The AI engine is
+replaced by a stub returning canned text, so scan timings measure this code and
+not the Anthropic API.
+
+Measured per size:
+
+- compute_health_score and detect_anomalies, per account, over a sample of accounts
+- run_full_scan, first run (inserts scores) and second run (updates them)
+- each API endpoint through the ASGI test client. The response cache is
+  invalidated before every request, so cached routes are timed doing the work.
+
+The SQL statements each scan and request runs are recorded too. Requests run
+with SQL_QUERY_BUDGET_STRICT, so a route that goes over its query budget (a
+per-account query loop, say) fails the run.
+
+Results are written to --out as JSON. With --baseline, every timing is compared
+with the saved run. The command exits 1 if any median slowed down by more than
+--tolerance. To save a new baseline, copy the results file.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+DEFAULT_SIZES = (1000, 10000)
+DEFAULT_DAYS = 90
+SAMPLE_ACCOUNTS = 500
+REQUEST_REPEATS = 20
+DEFAULT_TOLERANCE = 0.25
+
+# Jobs, SSE and onboarding are not request/response hot paths; the scan behind
+# /api/run-scan is timed directly. Admin profiling routes 404 without ADMIN_TOKEN.
+SKIPPED_ROUTES = {
+    "/api/events", "/api/run-scan", "/api/seed", "/api/retention/run", "/api/onboarding", "/api/jobs/{job_id}",
+    "/api/admin/profile/scan", "/api/admin/profiles", "/api/admin/profiles/{profile_id}",
+}
+
+
+def _stats(samples: List[float]) -> dict:
+    samples = sorted(samples)
+    return {
+        "n": len(samples),
+        "mean_ms": round(statistics.mean(samples) * 1000, 3),
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 3),
+        "min_ms": round(samples[0] * 1000, 3),
+    }
+
+
+def _timed(fn: Callable, repeats: int = 1, before: Callable = None) -> List[float]:
+    samples = []
+    for _ in range(repeats):
+        if before:
+            before()
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _endpoint_requests(db) -> Dict[str, tuple]:
+    """(method, url, request kwargs) per route in main.py, keyed by "METHOD path".
+
+    Alert and anomaly actions are included when the scan created a row to act on.
+    """
+    from models import Account, Alert, Anomaly, Company, UsageMetric
+
+    account = db.query(Account).order_by(Account.id).first()
+    metric = db.query(UsageMetric).filter(UsageMetric.account_id == account.id).order_by(UsageMetric.date.desc()).first()
+    alert = db.query(Alert).order_by(Alert.id).first()
+    anomaly = db.query(Anomaly).order_by(Anomaly.id).first()
+    company = db.query(Company).first()
+    month = datetime.now().strftime("%Y-%m")
+    metric_line = json.dumps({
+        "account_id": account.id, "date": metric.date.isoformat(), "dau": metric.dau, "wau": metric.wau,
+        "mau": metric.mau, "active_seats": metric.active_seats, "feature_count": metric.feature_count,
+        "api_calls": metric.api_calls, "support_tickets": metric.support_tickets, "logins": metric.logins,
+    })
+    event_lines = "\n".join(
+        json.dumps({"account_id": account.id, "type": "login", "user_id": f"bench-{i}"}) for i in range(100)
+    )
+    ndjson = {"content-type": "application/x-ndjson"}
+
+    requests = {
+        "GET /api/company": ("GET", "/api/company", {}),
+        "PUT /api/company": ("PUT", "/api/company", {"json": {"name": company.name}}),
+        "GET /api/accounts": ("GET", "/api/accounts", {}),
+        "GET /api/accounts/{account_id}": ("GET", f"/api/accounts/{account.id}", {}),
+        "GET /api/accounts/{account_id}/activity": ("GET", f"/api/accounts/{account.id}/activity", {}),
+        "GET /api/accounts/{account_id}/usage-history": ("GET", f"/api/accounts/{account.id}/usage-history", {}),
+        "GET /api/stats": ("GET", "/api/stats", {}),
+        "GET /api/revenue-forecast": ("GET", "/api/revenue-forecast", {}),
+        "GET /api/renewals/calendar": ("GET", f"/api/renewals/calendar?month={month}", {}),
+        "GET /api/renewals/notification-settings": ("GET", "/api/renewals/notification-settings", {}),
+        "PUT /api/renewals/notification-settings": ("PUT", "/api/renewals/notification-settings", {"json": {}}),
+        "GET /api/alerts": ("GET", "/api/alerts", {}),
+        "GET /api/dashboard": ("GET", "/api/dashboard", {}),
+        "GET /api/scan-runs": ("GET", "/api/scan-runs", {}),
+        "GET /api/scan-runs/compare": ("GET", "/api/scan-runs/compare", {}),
+        "POST /api/metrics/batch": ("POST", "/api/metrics/batch", {"content": metric_line, "headers": ndjson}),
+        "POST /api/usage-events": ("POST", "/api/usage-events", {"content": event_lines, "headers": ndjson}),
+    }
+    if alert is not None:
+        requests["POST /api/alerts/{alert_id}/resolve"] = ("POST", f"/api/alerts/{alert.id}/resolve", {})
+    if anomaly is not None:
+        requests["POST /api/anomalies/{anomaly_id}/approve"] = ("POST", f"/api/anomalies/{anomaly.id}/approve", {})
+        requests["POST /api/anomalies/{anomaly_id}/reject"] = ("POST", f"/api/anomalies/{anomaly.id}/reject", {})
+    return requests
+
+
+def _check_route_coverage(requests: Dict[str, tuple]):
+    """Fail loudly when main.py gains a route this suite does not time."""
+    import main
+
+    for route in main.app.routes:
+        path = getattr(route, "path", "")
+        if not path.startswith("/api/") or path in SKIPPED_ROUTES:
+            continue
+        for method in sorted(getattr(route, "methods", ()) - {"HEAD", "OPTIONS"}):
+            key = f"{method} {path}"
+            optional = "{alert_id}" in path or "{anomaly_id}" in path
+            if key not in requests and not optional:
+                raise SystemExit(f"benchmarks.py has no request for {key}; add it to _endpoint_requests")
+
+
+def run_size(accounts: int, days: int, directory: str) -> dict:
+    """Benchmark one dataset size. Must run in a fresh process (see main)."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'benchmark.db')}"
+    os.environ["METRIC_STORE_DIR"] = os.path.join(directory, "metric_store")
+    os.environ.setdefault("SQL_QUERY_BUDGET_STRICT", "1")
+    import logging
+    from anthropic_stub import install_ai_stub
+
+    logging.disable(logging.WARNING)
+    install_ai_stub()
+
+    from database import SessionLocal, init_db
+    from synthetic import load_synthetic
+
+    init_db()
+    load = load_synthetic(accounts, days)
+    result = {
+        "accounts": accounts, "days": days, "rows": load["rows"], "load_seconds": load["seconds"],
+        "timings": {}, "queries": {},
+    }
+    timings, queries = result["timings"], result["queries"]
+
+    from anomaly import detect_anomalies
+    from cache import bump_data_version
+    from models import Account, Company, UsageMetric
+    from scheduler import _company_weights, run_full_scan
+    from scoring import SCORING_SIGNALS, compute_health_score
+
+    db = SessionLocal()
+    try:
+        weights = _company_weights(db.query(Company).first())
+        sample = db.query(Account).order_by(Account.id).limit(SAMPLE_ACCOUNTS).all()
+        metrics = {}
+        for account in sample:
+            rows = db.query(UsageMetric).filter(UsageMetric.account_id == account.id).order_by(UsageMetric.date).all()
+            metrics[account.id] = [{signal: getattr(row, signal) for signal in SCORING_SIGNALS} for row in rows]
+        scores = {a.id: compute_health_score(metrics[a.id], a.seats, weights) for a in sample}
+        peer_scores = [s["composite"] for s in scores.values()] * max(1, accounts // len(sample))
+
+        samples = []
+        for account in sample:
+            samples += _timed(lambda: compute_health_score(metrics[account.id], account.seats, weights))
+        timings["compute_health_score"] = _stats(samples)
+
+        samples = []
+        for account in sample:
+            data = {"metrics": metrics[account.id], "composite": scores[account.id]["composite"], "seats": account.seats}
+            samples += _timed(lambda: detect_anomalies(data, peer_scores))
+        timings["detect_anomalies"] = _stats(samples)
+
+        for name in ("run_full_scan (first)", "run_full_scan (repeat)"):
+            summaries = []
+            timings[name] = _stats(_timed(lambda: summaries.append(run_full_scan(db))))
+            queries[name] = summaries[0]["db_queries"]
+
+        from fastapi.testclient import TestClient
+        import main
+
+        requests = _endpoint_requests(db)
+        _check_route_coverage(requests)
+        # No context manager: the lifespan (seed, initial scan, scheduler) is not run.
+        client = TestClient(main.app)
+        for name, (method, url, kwargs) in requests.items():
+            response = client.request(method, url, **kwargs)
+            if response.status_code >= 400:
+                raise SystemExit(f"{name} returned {response.status_code}")
+            queries[name] = int(response.headers["x-db-queries"])
+            timings[name] = _stats(_timed(lambda: client.request(method, url, **kwargs), REQUEST_REPEATS, bump_data_version))
+    finally:
+        db.close()
+    return result
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Print current vs baseline medians and return the regressed timings."""
+    regressions = []
+    for size, current in results["sizes"].items():
+        previous = baseline.get("sizes", {}).get(size)
+        if previous is None:
+            print(f"\n{size} accounts: no baseline")
+            continue
+        print(f"\n{size} accounts (p50 ms: baseline -> current)")
+        for name, stats in current["timings"].items():
+            before = previous["timings"].get(name)
+            if before is None:
+                print(f"  {name:48} {'new':>10} -> {stats['p50_ms']:>10.3f}")
+                continue
+            ratio = stats["p50_ms"] / before["p50_ms"] if before["p50_ms"] else 1.0
+            flag = ""
+            if ratio > 1 + tolerance:
+                flag = "  REGRESSION"
+                regressions.append(f"{size}/{name}")
+            print(f"  {name:48} {before['p50_ms']:>10.3f} -> {stats['p50_ms']:>10.3f}  {ratio:5.2f}x{flag}")
+        for name, count in current.get("queries", {}).items():
+            before = previous.get("queries", {}).get(name)
+            if before is not None and count > before:
+                print(f"  {name:48} SQL queries {before} -> {count}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scoring, scans and API routes on synthetic data.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="comma-separated account counts")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS)
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="results file of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed p50 slowdown (0.25 = 25%%)")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--directory", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        json.dump(run_size(args.child, args.days, args.directory), sys.stdout)
+        return
+
+    results = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": {},
+    }
+    for size in [int(s) for s in args.sizes.split(",")]:
+        print(f"Benchmarking {size} accounts x {args.days} days...", flush=True)
+        with tempfile.TemporaryDirectory(prefix="pulsescore-bench-") as directory:
+            child = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", str(size), "--days", str(args.days),
+                 "--directory", directory],
+                cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True,
+            )
+        if child.returncode != 0:
+            sys.stderr.write(child.stderr)
+            sys.exit(child.returncode)
+        results["sizes"][str(size)] = json.loads(child.stdout)
+        size_result = results["sizes"][str(size)]
+        for name, stats in size_result["timings"].items():
+            query_count = size_result["queries"].get(name)
+            suffix = f"  {query_count:>6} queries" if query_count is not None else ""
+            print(f"  {name:48} p50 {stats['p50_ms']:>10.3f} ms  p95 {stats['p95_ms']:>10.3f} ms{suffix}")
+
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} timings regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+# Bumped whenever a write that can change dashboard data commits (scan, onboarding,
+# settings, anomaly actions, reseed). Cached responses are only valid for the
+# version they were built under.
+_lock = threading.Lock()
+_data_version = 0
+# The version counter restarts at 0 in every process, so ETags and keys also
+# carry this process's boot id. Otherwise a client could get a 304 after a
+# restart, or from another worker, for data under a reused version number.
+_BOOT_ID = uuid.uuid4().hex[:8]
+# Least recently used first. Capped so that distinct query values (e.g. many
+# different ?ids= lists) cannot grow memory without bound between writes.
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+_responses: "OrderedDict[str, bytes]" = OrderedDict()
+
+
+def get_data_version() -> int:
+    return _data_version
+
+
+def bump_data_version() -> int:
+    """Invalidate every cached response and return the new data version."""
+    global _data_version
+    with _lock:
+        _data_version += 1
+        _responses.clear()
+        return _data_version
+
+
+def _cache_key(route: str, request: Request, version: int) -> str:
+    # Only the query parameters the route declares; anything else cannot change
+    # the response and would just mint new keys.
+    dependant = getattr(request.scope.get("route"), "dependant", None)
+    declared = {param.alias for param in dependant.query_params} if dependant else set()
+    params = sorted((k, v) for k, v in request.query_params.multi_items() if k in declared)
+    # Forecast and renewal countdowns depend on the current day as well as the data.
+    today = datetime.now().date().isoformat()
+    raw = json.dumps([_BOOT_ID, route, params, version, today])
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _get(key: str) -> Optional[bytes]:
+    with _lock:
+        body = _responses.get(key)
+        if body is not None:
+            _responses.move_to_end(key)
+        return body
+
+
+async def cached_response(
+    request: Request, route: str, build: Callable[[], Awaitable[Any]]
+) -> Response:
+    """Serve `await build()` from the response cache, answering 304 when the ETag matches."""
+    version = _data_version
+    key = _cache_key(route, request, version)
+    etag = f'"{_BOOT_ID}-{version}-{key[:16]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    body = _get(key)
+    if body is None:
+        body = json.dumps(jsonable_encoder(await build())).encode()
+        with _lock:
+            # Don't store a body built from data a concurrent write has since replaced.
+            if version == _data_version:
+                _responses[key] = body
+                _responses.move_to_end(key)
+                while len(_responses) > RESPONSE_CACHE_MAX_ENTRIES:
+                    _responses.popitem(last=False)
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,50 @@
+"""The scan pipeline's notion of "now".
+
+Scans read the time through `now()` and `today()` instead of datetime.now(), so
+replays and tests can run them at any point in history:
+
+    with frozen_at(datetime(2026, 3, 1, 6, 0)):
+        run_full_scan(db)
+
+While the clock is frozen, rows the scan creates get their timestamps from it
+(see `stamp`) instead of the database's CURRENT_TIMESTAMP, so time-based checks
+such as the 12-hour anomaly dedup see replayed time. Like the job queue, the
+clock is process-wide; freeze it only in single-purpose processes (replay,
+benchmarks, tests), never in the API server.
+"""
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Iterator, Optional
+
+_frozen: Optional[datetime] = None
+
+
+def now() -> datetime:
+    return _frozen if _frozen is not None else datetime.now()
+
+
+def today() -> date:
+    return now().date()
+
+
+def set_now(moment: Optional[datetime]):
+    """Freeze the clock at `moment`, or unfreeze it with None."""
+    global _frozen
+    _frozen = moment
+
+
+@contextmanager
+def frozen_at(moment: datetime) -> Iterator[None]:
+    previous = _frozen
+    set_now(moment)
+    try:
+        yield
+    finally:
+        set_now(previous)
+
+
+def stamp(*columns: str) -> dict:
+    """Column values for a new row's timestamps: the frozen time, or {} to keep server defaults."""
+    if _frozen is None:
+        return {}
+    return {column: _frozen for column in columns}
@@ -0,0 +1,52 @@
+import asyncio
+import json
+import threading
+from typing import AsyncIterator, Set, Tuple
+
+SUBSCRIBER_QUEUE_SIZE = 256
+HEARTBEAT_SECONDS = 15.0
+
+# Events are published from scan worker threads and request handlers and fanned
+# out to every connected SSE client's queue on the event loop that owns it.
+_lock = threading.Lock()
+_subscribers: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+
+
+def _enqueue(queue: asyncio.Queue, message: str):
+    if queue.full():
+        # Slow client: drop its oldest message rather than block publishers.
+        queue.get_nowait()
+    queue.put_nowait(message)
+
+
+def publish(event: str, data: dict):
+    """Send an event to every connected client. Safe to call from any thread."""
+    message = f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+    with _lock:
+        subscribers = list(_subscribers)
+    for loop, queue in subscribers:
+        try:
+            loop.call_soon_threadsafe(_enqueue, queue, message)
+        except RuntimeError:
+            # The client's loop has shut down; its generator cleans up on exit.
+            pass
+
+
+async def stream(initial: Tuple[Tuple[str, dict], ...] = ()) -> AsyncIterator[str]:
+    """Yield server-sent event messages until the client disconnects."""
+    queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+    subscriber = (asyncio.get_running_loop(), queue)
+    with _lock:
+        _subscribers.add(subscriber)
+    try:
+        yield "retry: 5000\n\n"
+        for event, data in initial:
+            yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+        while True:
+            try:
+                yield await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+    finally:
+        with _lock:
+            _subscribers.discard(subscriber)
@@ -0,0 +1,115 @@
+"""HyperLogLog sketches for distinct-user counts.
+
+A sketch estimates how many distinct values were added to it in a fixed number of
+bytes, and two sketches merge losslessly (register-wise max). Daily sketches per
+account therefore give DAU directly and WAU/MAU by merging 7 or 30 days.
+
+With the default precision of 12 (4096 one-byte registers) the relative standard
+error is 1.04 / sqrt(4096) ≈ 1.6%. Measure it against exact counts with:
+
+    python hll.py
+"""
+import hashlib
+import math
+import zlib
+from typing import Iterable, Optional
+
+DEFAULT_PRECISION = 12
+_HASH_BITS = 64
+_INVERSE_POWERS = [2.0 ** -r for r in range(_HASH_BITS + 1)]
+
+
+def _hash(value: str) -> int:
+    # Stable across processes, unlike hash(), so stored sketches stay mergeable.
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    def __init__(self, precision: int = DEFAULT_PRECISION, registers: Optional[bytearray] = None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = registers if registers is not None else bytearray(self.size)
+
+    def add(self, value: str):
+        x = _hash(value)
+        index = x >> (_HASH_BITS - self.precision)
+        rest = x & ((1 << (_HASH_BITS - self.precision)) - 1)
+        rank = _HASH_BITS - self.precision - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values: Iterable[str]):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "HyperLogLog"):
+        """Fold another sketch of the same precision into this one."""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> float:
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(map(_INVERSE_POWERS.__getitem__, self.registers))
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction: linear counting is more accurate here.
+            return m * math.log(m / zeros)
+        return estimate
+
+    def to_bytes(self) -> bytes:
+        """Precision byte followed by the zlib-compressed registers."""
+        return bytes([self.precision]) + zlib.compress(bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        return cls(precision=data[0], registers=bytearray(zlib.decompress(data[1:])))
+
+
+def merged(sketches: Iterable[HyperLogLog], precision: int = DEFAULT_PRECISION) -> HyperLogLog:
+    result = HyperLogLog(precision)
+    for sketch in sketches:
+        result.merge(sketch)
+    return result
+
+
+def measure_error(cardinalities=(10, 100, 1000, 10000, 100000), days: int = 30, seed: int = 7) -> list:
+    """Compare estimates with exact distinct counts, for single and merged sketches.
+
+    Each cardinality is spread over `days` daily sketches with overlapping users,
+    the way WAU/MAU are computed. Returns (label, exact, estimate, relative error).
+    """
+    import random
+
+    rng = random.Random(seed)
+    results = []
+    for n in cardinalities:
+        single = HyperLogLog()
+        single.update(f"user-{n}-{i}" for i in range(n))
+        results.append((f"single n={n}", n, single.count(), abs(single.count() - n) / n))
+
+        population = [f"member-{n}-{i}" for i in range(n)]
+        daily, seen = [], set()
+        for _ in range(days):
+            active = rng.sample(population, max(1, n // 3))
+            seen.update(active)
+            sketch = HyperLogLog()
+            sketch.update(active)
+            daily.append(sketch)
+        estimate = merged(daily).count()
+        results.append((f"merged {days}d n={n}", len(seen), estimate, abs(estimate - len(seen)) / len(seen)))
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    bound = 3 * 1.04 / math.sqrt(1 << DEFAULT_PRECISION)
+    worst = 0.0
+    for label, exact, estimate, error in measure_error():
+        worst = max(worst, error)
+        print(f"{label:>22}: exact {exact:>7}  estimate {estimate:>10.1f}  error {error:6.2%}")
+    print(f"Worst relative error {worst:.2%} (bound {bound:.2%}, 3 standard errors)")
+    if worst > bound:
+        sys.exit(1)
@@ -0,0 +1,178 @@
+import csv
+import json
+import logging
+from typing import AsyncIterator, List, Optional, Set, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import func, select
+
+from models import Account, UsageMetric
+from schemas import MetricRowIn
+
+logger = logging.getLogger(__name__)
+
+# Rows are validated and written one chunk per transaction, so memory stays flat
+# however large the body is and a failed chunk never rolls back earlier ones.
+INGEST_CHUNK_ROWS = 5000
+MAX_REPORTED_ERRORS = 100
+
+_CONTENT_TYPES = {
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+
+
+def ingest_format(content_type: Optional[str]) -> Optional[str]:
+    """Map a Content-Type header to "ndjson" or "csv"; None if unsupported."""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return _CONTENT_TYPES.get(media_type)
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """Yield (line number, text) for each non-blank line of a streamed body."""
+    buffer = b""
+    line_no = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *complete, buffer = buffer.split(b"\n")
+        for raw in complete:
+            line_no += 1
+            text = raw.decode("utf-8", errors="replace").strip()
+            if text:
+                yield line_no, text
+    text = buffer.decode("utf-8", errors="replace").strip()
+    if text:
+        yield line_no + 1, text
+
+
+async def _records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Tuple[int, object]]:
+    """Yield (line number, parsed record). Unparseable lines yield an error string."""
+    header: Optional[List[str]] = None
+    async for line_no, text in iter_lines(chunks):
+        if fmt == "csv":
+            values = next(csv.reader([text]))
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            # Empty cells fall back to the field defaults (nps_score stays null).
+            yield line_no, {name: value for name, value in zip(header, values) if value != ""}
+        else:
+            try:
+                record = json.loads(text)
+            except ValueError as e:
+                yield line_no, f"invalid JSON: {e}"
+                continue
+            yield line_no, record if isinstance(record, dict) else "expected a JSON object"
+
+
+def validation_message(e: ValidationError) -> str:
+    error = e.errors()[0]
+    location = ".".join(str(part) for part in error["loc"])
+    return f"{location}: {error['msg']}" if location else error["msg"]
+
+
+def _write_chunk(chunk: List[Tuple[int, object]]) -> dict:
+    """Validate one chunk and upsert its valid rows in a single transaction.
+
+    Rows replace any stored row for the same (account_id, date); within a chunk
+    the last row for a day wins. Re-sending a batch is therefore harmless.
+    """
+    from database import dialect_insert, engine
+    from metric_store import bump_generation, get_metric_store
+    from retention import compaction_horizon
+
+    result = {"written": 0, "errors": [], "account_ids": set()}
+    horizon = compaction_horizon()
+    valid: List[Tuple[int, dict]] = []
+    for line_no, record in chunk:
+        if isinstance(record, str):
+            result["errors"].append({"line": line_no, "error": record})
+            continue
+        try:
+            row = MetricRowIn.model_validate(record).model_dump()
+        except ValidationError as e:
+            result["errors"].append({"line": line_no, "error": validation_message(e)})
+            continue
+        if row["date"] < horizon:
+            error = f"date {row['date']} is before the compaction horizon {horizon}"
+            result["errors"].append({"line": line_no, "error": error})
+            continue
+        valid.append((line_no, row))
+
+    if not valid:
+        return result
+
+    with engine.begin() as conn:
+        requested = {row["account_id"] for _, row in valid}
+        known = set(conn.execute(select(Account.id).where(Account.id.in_(requested))).scalars())
+        by_day = {}
+        for line_no, row in valid:
+            if row["account_id"] in known:
+                by_day[(row["account_id"], row["date"])] = row
+            else:
+                result["errors"].append({"line": line_no, "error": f"unknown account_id {row['account_id']}"})
+        rows = list(by_day.values())
+        if rows:
+            statement = dialect_insert(UsageMetric.__table__)
+            conn.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["account_id", "date"],
+                    set_={name: statement.excluded[name] for name in MetricRowIn.model_fields
+                          if name not in ("account_id", "date")},
+                ),
+                rows,
+            )
+            max_id = conn.execute(select(func.max(UsageMetric.id))).scalar()
+            generation = bump_generation(conn)
+
+    if rows:
+        store = get_metric_store()
+        if store is not None:
+            store.record_rows(rows, max_id, generation)
+        result["written"] = len(rows)
+        result["account_ids"] = {row["account_id"] for row in rows}
+    return result
+
+
+async def ingest_metrics(chunks: AsyncIterator[bytes], fmt: str) -> Tuple[dict, Set[int]]:
+    """Stream daily usage rows from an NDJSON or CSV body into usage_metrics.
+
+    Invalid rows are skipped and reported (up to MAX_REPORTED_ERRORS); valid rows
+    are committed chunk by chunk. Returns the summary and the touched account ids.
+    """
+    from metric_store import save_metric_store
+
+    summary = {"rows_received": 0, "rows_written": 0, "rows_rejected": 0, "errors": []}
+    touched: Set[int] = set()
+
+    async def flush(chunk):
+        result = await run_in_threadpool(_write_chunk, chunk)
+        summary["rows_written"] += result["written"]
+        summary["rows_rejected"] += len(result["errors"])
+        room = MAX_REPORTED_ERRORS - len(summary["errors"])
+        summary["errors"].extend(sorted(result["errors"], key=lambda e: e["line"])[:room])
+        touched.update(result["account_ids"])
+
+    chunk: List[Tuple[int, object]] = []
+    try:
+        async for line_no, record in _records(chunks, fmt):
+            summary["rows_received"] += 1
+            chunk.append((line_no, record))
+            if len(chunk) >= INGEST_CHUNK_ROWS:
+                await flush(chunk)
+                chunk = []
+        if chunk:
+            await flush(chunk)
+    finally:
+        if touched:
+            await run_in_threadpool(save_metric_store)
+
+    summary["accounts_touched"] = len(touched)
+    logger.info(
+        f"Metric batch ingested: {summary['rows_written']} rows written, "
+        f"{summary['rows_rejected']} rejected, {len(touched)} accounts touched"
+    )
+    return summary, touched
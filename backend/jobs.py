@@ -0,0 +1,212 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+from events import publish
+
+logger = logging.getLogger(__name__)
+
+MAX_JOB_HISTORY = 50
+PROGRESS_PUBLISH_INTERVAL = 0.5  # seconds between "job" events within one phase
+
+# Scans and reseeds share a single worker, so at most one of them touches the
+# database at a time regardless of whether it came from the API or APScheduler.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pulsescore-job")
+_lock = threading.Lock()
+_jobs: "OrderedDict[str, dict]" = OrderedDict()
+_active_job_id: Optional[str] = None
+# One job of another kind may wait behind a running job of these kinds instead of
+# raising JobConflict: they are short maintenance passes that the scheduler starts
+# often, and a scan or reseed requested meanwhile should not be dropped.
+QUEUE_BEHIND_KINDS = {"rescore", "retention"}
+_queued_job_id: Optional[str] = None
+
+
+class JobConflict(Exception):
+    """Raised when a job is requested while a job of another kind is still active."""
+
+    def __init__(self, active_job: dict):
+        super().__init__(f"A {active_job['kind']} job is already {active_job['status']}")
+        self.active_job = active_job
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    with _lock:
+        job = _jobs.get(job_id)
+        return _snapshot(job) if job else None
+
+
+def get_active_job() -> Optional[dict]:
+    with _lock:
+        job = _jobs.get(_active_job_id) if _active_job_id else None
+        return _snapshot(job) if job else None
+
+
+def _snapshot(job: dict) -> dict:
+    return {**job, "progress": dict(job["progress"])}
+
+
+def submit_job(
+    kind: str,
+    target: Callable[[Callable], dict],
+    trigger: str = "manual",
+    then: Optional[Callable[[], dict]] = None,
+) -> Tuple[dict, bool]:
+    """Queue `target(progress)` on the job worker.
+
+    Returns the job and whether it was newly created. If a job of the same kind is
+    already queued or running, that job is returned instead of starting another.
+    Behind a running job of a QUEUE_BEHIND_KINDS kind, one job of another kind is
+    queued to start when it finishes; otherwise a job of a different kind raises
+    JobConflict.
+
+    `then` runs once the job has succeeded and its slot is free, to queue a
+    follow-up job; the id of the job it returns is recorded as `next_job_id`.
+    """
+    global _active_job_id, _queued_job_id
+    with _lock:
+        active = _jobs.get(_active_job_id) if _active_job_id else None
+        queued = _jobs.get(_queued_job_id) if _queued_job_id else None
+        if active is not None:
+            if active["kind"] == kind:
+                return _snapshot(active), False
+            if queued is not None and queued["kind"] == kind:
+                return _snapshot(queued), False
+            if active["kind"] not in QUEUE_BEHIND_KINDS or queued is not None:
+                raise JobConflict(_snapshot(active))
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "trigger": trigger,
+            "status": "queued",
+            "progress": {},
+            "summary": None,
+            "error": None,
+            "next_job_id": None,
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        _jobs[job_id] = job
+        while len(_jobs) > MAX_JOB_HISTORY:
+            _jobs.popitem(last=False)
+        if active is None:
+            _active_job_id = job_id
+        else:
+            _queued_job_id = job_id
+
+    snapshot = _snapshot(job)
+    publish("job", snapshot)
+    # The single worker runs jobs in submission order, so a queued job starts
+    # right after the one it waits behind.
+    _executor.submit(_run, job, target, then)
+    return snapshot, True
+
+
+def _run(job: dict, target: Callable[[Callable], dict], then: Optional[Callable[[], dict]] = None):
+    global _active_job_id, _queued_job_id
+
+    last_published = [0.0]
+
+    def progress(**fields):
+        with _lock:
+            phase = fields.get("phase")
+            phase_changed = phase is not None and phase != job["progress"].get("phase")
+            job["progress"].update(fields)
+            snapshot = _snapshot(job)
+        now = time.monotonic()
+        if phase_changed or now - last_published[0] >= PROGRESS_PUBLISH_INTERVAL:
+            last_published[0] = now
+            publish("job", snapshot)
+
+    def set_fields(**fields):
+        with _lock:
+            job.update(fields)
+            snapshot = _snapshot(job)
+        publish("job", snapshot)
+
+    set_fields(status="running", started_at=_now())
+    outcome = {"status": "failed", "error": "Job interrupted"}
+    try:
+        outcome = {"status": "succeeded", "summary": target(progress)}
+    except Exception as e:
+        logger.error(f"{job['kind'].capitalize()} job {job['id']} failed: {e}")
+        outcome = {"status": "failed", "error": str(e)}
+    finally:
+        with _lock:
+            # Release the slot before announcing completion so a client reacting to
+            # the final event can immediately queue the next job.
+            if _active_job_id == job["id"]:
+                # A queued job takes over the slot directly, so nothing can be
+                # submitted ahead of it before it starts.
+                _active_job_id, _queued_job_id = _queued_job_id, None
+        if then is not None and outcome["status"] == "succeeded":
+            try:
+                outcome["next_job_id"] = then()["id"]
+            except Exception as e:
+                logger.error(f"Follow-up to {job['kind']} job {job['id']} could not be queued: {e}")
+        set_fields(finished_at=_now(), **outcome)
+
+
+def submit_retention(db_factory, trigger: str = "manual") -> Tuple[dict, bool]:
+    """Queue the retention/compaction pass, or return the one already queued or running."""
+    from retention import run_retention
+
+    def target(progress):
+        db = db_factory()
+        try:
+            return run_retention(db, progress=progress)
+        finally:
+            db.close()
+
+    return submit_job("retention", target, trigger)
+
+
+def submit_rescore(db_factory, trigger: str = "manual") -> Tuple[dict, bool]:
+    """Queue a rescore of the accounts marked by ingestion."""
+    from scheduler import rescore_accounts
+
+    def target(progress):
+        db = db_factory()
+        try:
+            return rescore_accounts(db, progress=progress)
+        finally:
+            db.close()
+
+    return submit_job("rescore", target, trigger)
+
+
+def submit_scan(db_factory, trigger: str = "manual", profile: Optional[str] = None) -> Tuple[dict, bool]:
+    """Queue a full scan, or return the scan that is already queued or running.
+
+    With `profile` ("sample" or "cprofile"), the scan runs under that profiler and
+    its summary carries the `profile_id` of the saved profile.
+    """
+    from scheduler import run_full_scan
+
+    def target(progress):
+        db = db_factory()
+        try:
+            if profile is None:
+                return run_full_scan(db, progress=progress, trigger=trigger)
+            from profiling import profile_call
+
+            summary, profile_id = profile_call(
+                "scan", profile, lambda: run_full_scan(db, progress=progress, trigger=trigger)
+            )
+            return {**summary, "profile_id": profile_id}
+        finally:
+            db.close()
+
+    return submit_job("scan", target, trigger)
@@ -1,11 +1,18 @@
+import json
 import logging
 import os
+import threading
 from contextlib import asynccontextmanager
 from datetime import datetime, date, timedelta
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional, Set
 
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 
@@ -14,7 +21,9 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-from database import get_db, init_db, SessionLocal
+from cache import bump_data_version, cached_response
+from events import publish, stream
+from database import get_db, get_async_db, init_db, SessionLocal, async_engine, engine
 from models import (
     Account,
     UsageMetric,
@@ -23,39 +32,83 @@ from models import (
     ActivityEvent,
     Alert,
     Company,
-    RenewalNotificationPreference,
     RenewalNotificationSettings,
+    ScanRun,
 )
 from schemas import (
     CompanyOut, CompanyUpdate, OnboardingPayload, AccountListItem, AccountDetail,
     MetricPoint, AnomalyOut, ActivityEventOut, AlertOut, StatsOut, RevenueForecastOut,
     RevenueForecastPointOut, RenewalCalendarItemOut,
-    RenewalNotificationSettingsOut, RenewalNotificationSettingsUpdate,
+    RenewalNotificationSettingsOut, RenewalNotificationSettingsUpdate, DashboardOut,
+    JobOut, UsageHistoryOut, MetricBatchOut, UsageEventIn, UsageEventBatchOut, ProfileOut,
+    ScanRunOut, ScanRunCompareOut, ScanPhaseChangeOut,
 )
 from scoring import compute_health_score, get_state
-from seed import seed_data
-from scheduler import run_full_scan, start_scheduler
+from seed import insert_demo_data, reset_data, seed_data
+from synthetic import load_synthetic
+from metric_store import invalidate_metric_store
+from scheduler import SCAN_RUN_COUNTS, mark_for_rescore, start_scheduler
+from jobs import (
+    JobConflict, get_active_job, get_job, submit_job, submit_rescore, submit_retention, submit_scan,
+)
+from ingest import (
+    INGEST_CHUNK_ROWS, MAX_REPORTED_ERRORS, ingest_format, ingest_metrics, iter_lines, validation_message,
+)
+from usage_events import (
+    BufferFull, add_events, discard_buffer, flush_buffer, make_room, pending_events,
+)
+from retention import compaction_horizon, load_usage_history
+from telemetry import CONTENT_TYPE as METRICS_CONTENT_TYPE, RequestMetricsMiddleware, render as render_metrics
+from profiling import PROFILING_ENABLED, RequestProfilingMiddleware, is_admin_token, list_profiles, profile_path
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
+# Startup work runs as a job so the server accepts connections immediately. Until
+# it has migrated and seeded the database, routes other than the probes, job
+# status and SSE answer 503. Without the lifespan (scripts, benchmarks) the
+# gate stays open.
+_ready = threading.Event()
+_ready.set()
+_startup: Dict[str, object] = {"job_id": None, "scheduler": None}
+ROUTES_BEFORE_READY = {"/healthz", "/readyz", "/metrics", "/api/events", "/api/jobs/{job_id}"}
+
+
+def _startup_job(progress) -> dict:
+    progress(phase="migrating")
     init_db()
+    progress(phase="seeding")
     seed_data()
+    _startup["scheduler"] = start_scheduler(SessionLocal)
+    _ready.set()
+    logger.info("Database ready; initial scan queued")
+    return {"message": "Database ready"}
 
-    db = SessionLocal()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _ready.clear()
+    job, _ = submit_job(
+        "startup",
+        _startup_job,
+        trigger="startup",
+        then=lambda: submit_scan(SessionLocal, trigger="startup")[0],
+    )
+    _startup["job_id"] = job["id"]
+    yield
+    if _startup["scheduler"] is not None:
+        _startup["scheduler"].shutdown()
     try:
-        run_full_scan(db)
+        flush_buffer()
     except Exception as e:
-        logger.error(f"Initial scan failed: {e}")
-    finally:
-        db.close()
+        logger.error(f"Final usage event flush failed: {e}")
+    await async_engine.dispose()
 
-    scheduler = start_scheduler(SessionLocal)
-    yield
-    scheduler.shutdown()
 
+def require_ready(request: Request):
+    if not _ready.is_set() and getattr(request.scope.get("route"), "path", None) not in ROUTES_BEFORE_READY:
+        raise HTTPException(status_code=503, detail="Server is starting", headers={"Retry-After": "5"})
 
-app = FastAPI(title="PulseScore API", lifespan=lifespan)
+
+app = FastAPI(title="PulseScore API", lifespan=lifespan, dependencies=[Depends(require_ready)])
 
 origins_env = os.getenv("FRONTEND_ORIGINS")
 allowed_origins = [o.strip() for o in origins_env.split(",")] if origins_env else ["http://localhost:5173"]
@@ -67,11 +120,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+if PROFILING_ENABLED:
+    app.add_middleware(RequestProfilingMiddleware)
+app.add_middleware(RequestMetricsMiddleware)
 
 
-def _get_weights(db: Session) -> dict:
-    company = db.query(Company).first()
+async def _get_weights(db: AsyncSession) -> dict:
+    return _weights_from_company(await db.scalar(select(Company).limit(1)))
+
+
+def _weights_from_company(company: Optional[Company]) -> dict:
     if not company:
         return {"engagement": 30, "adoption": 25, "health": 25, "support": 20,
                 "critical_threshold": 40.0, "at_risk_threshold": 70.0}
@@ -85,6 +145,36 @@ def _get_weights(db: Session) -> dict:
     }
 
 
+async def _latest_scores(
+    db: AsyncSession,
+    account_ids: Optional[List[int]] = None,
+) -> Dict[int, HealthScore]:
+    """Return each account's most recent HealthScore in a single query."""
+    latest = select(HealthScore.account_id, func.max(HealthScore.date).label("date"))
+    if account_ids is not None:
+        latest = latest.where(HealthScore.account_id.in_(account_ids))
+    latest = latest.group_by(HealthScore.account_id).subquery()
+    rows = await db.scalars(
+        select(HealthScore)
+        .join(latest, and_(
+            HealthScore.account_id == latest.c.account_id,
+            HealthScore.date == latest.c.date,
+        ))
+    )
+    return {hs.account_id: hs for hs in rows}
+
+
+async def _load_snapshot(db: AsyncSession) -> dict:
+    """Load the company, accounts and latest scores shared by the dashboard views."""
+    company = await db.scalar(select(Company).limit(1))
+    return {
+        "company": company,
+        "settings": _weights_from_company(company),
+        "accounts": (await db.scalars(select(Account))).all(),
+        "latest_scores": await _latest_scores(db),
+    }
+
+
 def _month_start(d: date) -> date:
     return date(d.year, d.month, 1)
 
@@ -96,15 +186,6 @@ def _add_months(d: date, months: int) -> date:
     return date(year, month, 1)
 
 
-def _parse_iso_date(value: Optional[str]) -> Optional[date]:
-    if not value:
-        return None
-    try:
-        return datetime.fromisoformat(value).date()
-    except ValueError:
-        return None
-
-
 def _get_or_create_renewal_settings(db: Session) -> RenewalNotificationSettings:
     settings = db.query(RenewalNotificationSettings).first()
     if settings:
@@ -138,8 +219,8 @@ def _lead_times_from_settings(settings: RenewalNotificationSettings) -> List[int
 # ── Company ────────────────────────────────────────────────────────────────────
 
 @app.get("/api/company", response_model=CompanyOut)
-def get_company(db: Session = Depends(get_db)):
-    company = db.query(Company).first()
+async def get_company(db: AsyncSession = Depends(get_async_db)):
+    company = await db.scalar(select(Company).limit(1))
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
     return company
@@ -153,6 +234,7 @@ def update_company(payload: CompanyUpdate, db: Session = Depends(get_db)):
     for field, value in payload.model_dump(exclude_none=True).items():
         setattr(company, field, value)
     db.commit()
+    bump_data_version()
     db.refresh(company)
     return company
 
@@ -175,6 +257,7 @@ def complete_onboarding(payload: OnboardingPayload, db: Session = Depends(get_db
     company.at_risk_threshold = payload.at_risk_threshold
     company.onboarding_complete = True
     db.commit()
+    bump_data_version()
     db.refresh(company)
     return {"status": "ok", "company_id": company.id}
 
@@ -182,28 +265,45 @@ def complete_onboarding(payload: OnboardingPayload, db: Session = Depends(get_db
 # ── Accounts ───────────────────────────────────────────────────────────────────
 
 @app.get("/api/accounts", response_model=List[AccountListItem])
-def list_accounts(db: Session = Depends(get_db)):
-    settings = _get_weights(db)
-    accounts = db.query(Account).all()
+async def list_accounts(
+    request: Request,
+    ids: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    account_ids = None
+    if ids:
+        try:
+            account_ids = {int(i) for i in ids.split(",") if i.strip()}
+        except ValueError:
+            raise HTTPException(status_code=400, detail="ids must be a comma-separated list of account ids")
+
+    async def build():
+        return await _build_account_list(db, await _load_snapshot(db), account_ids)
+
+    return await cached_response(request, "accounts", build)
+
+
+async def _build_account_list(
+    db: AsyncSession,
+    snapshot: dict,
+    account_ids: Optional[Set[int]] = None,
+) -> List[AccountListItem]:
+    settings = snapshot["settings"]
+    pending_account_ids = set(await db.scalars(
+        select(Anomaly.account_id)
+        .where(Anomaly.outreach_status == "pending")
+        .distinct()
+    ))
 
     result = []
-    for account in accounts:
-        latest_hs = (
-            db.query(HealthScore)
-            .filter(HealthScore.account_id == account.id)
-            .order_by(HealthScore.date.desc())
-            .first()
-        )
+    for account in snapshot["accounts"]:
+        if account_ids is not None and account.id not in account_ids:
+            continue
+        latest_hs = snapshot["latest_scores"].get(account.id)
         composite = latest_hs.composite if latest_hs else 0.0
         trend_delta = latest_hs.trend_delta if latest_hs else 0.0
         state = get_state(composite, settings["critical_threshold"], settings["at_risk_threshold"])
 
-        pending = (
-            db.query(Anomaly)
-            .filter(Anomaly.account_id == account.id, Anomaly.outreach_status == "pending")
-            .first()
-        )
-
         result.append(AccountListItem(
             id=account.id,
             name=account.name,
@@ -214,7 +314,7 @@ def list_accounts(db: Session = Depends(get_db)):
             composite=composite,
             trend_delta=trend_delta,
             state=state,
-            has_pending_anomaly=pending is not None,
+            has_pending_anomaly=account.id in pending_account_ids,
         ))
 
     state_order = {"critical": 0, "at_risk": 1, "good": 2, "healthy": 3}
@@ -223,24 +323,23 @@ def list_accounts(db: Session = Depends(get_db)):
 
 
 @app.get("/api/accounts/{account_id}", response_model=AccountDetail)
-def get_account(account_id: int, db: Session = Depends(get_db)):
-    account = db.query(Account).filter(Account.id == account_id).first()
+async def get_account(account_id: int, db: AsyncSession = Depends(get_async_db)):
+    account = await db.get(Account, account_id)
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
 
-    settings = _get_weights(db)
+    settings = await _get_weights(db)
     weights = {k: settings[k] for k in ("engagement", "adoption", "health", "support")}
 
-    raw_metrics = (
-        db.query(UsageMetric)
-        .filter(UsageMetric.account_id == account_id)
+    raw_metrics = (await db.scalars(
+        select(UsageMetric)
+        .where(UsageMetric.account_id == account_id)
         .order_by(UsageMetric.date)
-        .all()
-    )
+    )).all()
 
     hs_map = {
         hs.date: hs
-        for hs in db.query(HealthScore).filter(HealthScore.account_id == account_id).all()
+        for hs in await db.scalars(select(HealthScore).where(HealthScore.account_id == account_id))
     }
 
     metric_points = []
@@ -272,12 +371,7 @@ def get_account(account_id: int, db: Session = Depends(get_db)):
             adoption_score=adp, health_score=hlt, support_score=sup,
         ))
 
-    latest_hs = (
-        db.query(HealthScore)
-        .filter(HealthScore.account_id == account_id)
-        .order_by(HealthScore.date.desc())
-        .first()
-    )
+    latest_hs = hs_map[max(hs_map)] if hs_map else None
     composite = latest_hs.composite if latest_hs else 0.0
     trend_delta = latest_hs.trend_delta if latest_hs else 0.0
     eng = latest_hs.engagement_score if latest_hs else 0.0
@@ -286,19 +380,17 @@ def get_account(account_id: int, db: Session = Depends(get_db)):
     sup = latest_hs.support_score if latest_hs else 0.0
     state = get_state(composite, settings["critical_threshold"], settings["at_risk_threshold"])
 
-    anomalies = (
-        db.query(Anomaly)
-        .filter(Anomaly.account_id == account_id)
+    anomalies = await db.scalars(
+        select(Anomaly)
+        .where(Anomaly.account_id == account_id)
         .order_by(Anomaly.detected_at.desc())
         .limit(10)
-        .all()
     )
-    events = (
-        db.query(ActivityEvent)
-        .filter(ActivityEvent.account_id == account_id)
+    events = await db.scalars(
+        select(ActivityEvent)
+        .where(ActivityEvent.account_id == account_id)
         .order_by(ActivityEvent.created_at.desc())
         .limit(50)
-        .all()
     )
 
     return AccountDetail(
@@ -312,24 +404,65 @@ def get_account(account_id: int, db: Session = Depends(get_db)):
     )
 
 
+@app.get("/api/accounts/{account_id}/activity", response_model=List[ActivityEventOut])
+async def get_account_activity(
+    account_id: int,
+    response: Response,
+    before: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if not await db.get(Account, account_id):
+        raise HTTPException(status_code=404, detail="Account not found")
+    statement = select(ActivityEvent).where(ActivityEvent.account_id == account_id)
+    return await _keyset_page(db, ActivityEvent, statement, before, limit, response)
+
+
+@app.get("/api/accounts/{account_id}/usage-history", response_model=UsageHistoryOut)
+async def get_usage_history(
+    account_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    resolution: str = "auto",
+    db: AsyncSession = Depends(get_async_db),
+):
+    if not await db.get(Account, account_id):
+        raise HTTPException(status_code=404, detail="Account not found")
+
+    end = end or datetime.now().date()
+    start = start or end - timedelta(days=90)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be on or before end")
+    try:
+        resolution, points = await load_usage_history(db, account_id, start, end, resolution)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return UsageHistoryOut(
+        account_id=account_id, resolution=resolution, start=start, end=end, points=points,
+    )
+
+
 # ── Stats ──────────────────────────────────────────────────────────────────────
 
 @app.get("/api/stats", response_model=StatsOut)
-def get_stats(db: Session = Depends(get_db)):
-    settings = _get_weights(db)
-    accounts = db.query(Account).all()
+async def get_stats(request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def build():
+        return await _build_stats(db, await _load_snapshot(db))
+
+    return await cached_response(request, "stats", build)
+
+
+async def _build_stats(db: AsyncSession, snapshot: dict) -> StatsOut:
+    settings = snapshot["settings"]
+    accounts = snapshot["accounts"]
 
     critical = at_risk = good = healthy = 0
     total_mrr = 0.0
     scores = []
 
     for account in accounts:
-        latest_hs = (
-            db.query(HealthScore)
-            .filter(HealthScore.account_id == account.id)
-            .order_by(HealthScore.date.desc())
-            .first()
-        )
+        latest_hs = snapshot["latest_scores"].get(account.id)
         composite = latest_hs.composite if latest_hs else 0.0
         scores.append(composite)
         total_mrr += account.mrr
@@ -344,11 +477,17 @@ def get_stats(db: Session = Depends(get_db)):
         else:
             healthy += 1
 
-    pending_approvals = db.query(Anomaly).filter(Anomaly.outreach_status == "pending").count()
+    pending_approvals = await db.scalar(
+        select(func.count()).select_from(Anomaly).where(Anomaly.outreach_status == "pending")
+    )
     avg_health = sum(scores) / len(scores) if scores else 0.0
 
-    latest_hs = db.query(HealthScore).order_by(HealthScore.date.desc()).first()
-    last_scan = latest_hs.date if latest_hs else None
+    last_scan = await db.scalar(
+        select(ScanRun.finished_at)
+        .where(ScanRun.status == "succeeded")
+        .order_by(ScanRun.finished_at.desc())
+        .limit(1)
+    )
 
     return StatsOut(
         total_accounts=len(accounts),
@@ -359,14 +498,21 @@ def get_stats(db: Session = Depends(get_db)):
         avg_health=round(avg_health, 1),
         total_mrr=total_mrr,
         pending_approvals=pending_approvals,
-        last_scan=last_scan,
+        last_scan=last_scan.date() if last_scan else None,
     )
 
 
 @app.get("/api/revenue-forecast", response_model=RevenueForecastOut)
-def get_revenue_forecast(db: Session = Depends(get_db)):
-    settings = _get_weights(db)
-    accounts = db.query(Account).all()
+async def get_revenue_forecast(request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def build():
+        return _build_revenue_forecast(await _load_snapshot(db))
+
+    return await cached_response(request, "revenue-forecast", build)
+
+
+def _build_revenue_forecast(snapshot: dict) -> RevenueForecastOut:
+    settings = snapshot["settings"]
+    accounts = snapshot["accounts"]
     if not accounts:
         return RevenueForecastOut(
             current_mrr=0.0,
@@ -396,21 +542,10 @@ def get_revenue_forecast(db: Session = Depends(get_db)):
     account_profiles = []
     current_mrr = 0.0
     for account in accounts:
-        latest_hs = (
-            db.query(HealthScore)
-            .filter(HealthScore.account_id == account.id)
-            .order_by(HealthScore.date.desc())
-            .first()
-        )
+        latest_hs = snapshot["latest_scores"].get(account.id)
         composite = latest_hs.composite if latest_hs else 0.0
         state = get_state(composite, settings["critical_threshold"], settings["at_risk_threshold"])
-        renewal_month = None
-        if account.renewal_date:
-            try:
-                renewal_dt = datetime.fromisoformat(account.renewal_date).date()
-                renewal_month = _month_start(renewal_dt)
-            except ValueError:
-                renewal_month = None
+        renewal_month = _month_start(account.renewal_date) if account.renewal_date else None
 
         account_profiles.append({
             "id": account.id,
@@ -467,7 +602,17 @@ def get_revenue_forecast(db: Session = Depends(get_db)):
 
 
 @app.get("/api/renewals/calendar", response_model=List[RenewalCalendarItemOut])
-def get_renewals_calendar(month: Optional[str] = None, db: Session = Depends(get_db)):
+async def get_renewals_calendar(
+    request: Request,
+    month: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await cached_response(
+        request, "renewals-calendar", lambda: _build_renewals_calendar(month, db)
+    )
+
+
+async def _build_renewals_calendar(month: Optional[str], db: AsyncSession) -> List[RenewalCalendarItemOut]:
     target_month = _month_start(datetime.now().date())
     if month:
         try:
@@ -477,22 +622,19 @@ def get_renewals_calendar(month: Optional[str] = None, db: Session = Depends(get
 
     next_month = _add_months(target_month, 1)
     today = datetime.now().date()
-    settings = _get_weights(db)
+    settings = await _get_weights(db)
 
-    items: List[RenewalCalendarItemOut] = []
-    for account in db.query(Account).all():
-        renewal_dt = _parse_iso_date(account.renewal_date)
-        if not renewal_dt:
-            continue
-        if renewal_dt < target_month or renewal_dt >= next_month:
-            continue
+    accounts = (await db.scalars(
+        select(Account)
+        .where(Account.renewal_date >= target_month, Account.renewal_date < next_month)
+        .order_by(Account.renewal_date, Account.id)
+    )).all()
+    latest_scores = await _latest_scores(db, [a.id for a in accounts])
 
-        latest_hs = (
-            db.query(HealthScore)
-            .filter(HealthScore.account_id == account.id)
-            .order_by(HealthScore.date.desc())
-            .first()
-        )
+    items: List[RenewalCalendarItemOut] = []
+    for account in accounts:
+        renewal_dt = account.renewal_date
+        latest_hs = latest_scores.get(account.id)
         composite = latest_hs.composite if latest_hs else 0.0
         state = get_state(composite, settings["critical_threshold"], settings["at_risk_threshold"])
 
@@ -505,7 +647,6 @@ def get_renewals_calendar(month: Optional[str] = None, db: Session = Depends(get
             health_state=state,
         ))
 
-    items.sort(key=lambda x: x.renewal_date)
     return items
 
 
@@ -540,6 +681,7 @@ def update_renewal_notification_settings(
         settings.notify_7_days = 7 in lead_set
 
     db.commit()
+    bump_data_version()
     db.refresh(settings)
     return RenewalNotificationSettingsOut(
         enabled=settings.enabled,
@@ -561,6 +703,8 @@ def approve_outreach(anomaly_id: int, db: Session = Depends(get_db)):
         description="Outreach email approved and sent",
     ))
     db.commit()
+    bump_data_version()
+    publish("accounts_changed", {"account_ids": [anomaly.account_id], "reason": "outreach"})
     return {"status": "ok", "outreach_status": "sent"}
 
 
@@ -576,47 +720,395 @@ def reject_outreach(anomaly_id: int, db: Session = Depends(get_db)):
         description="Outreach email rejected",
     ))
     db.commit()
+    bump_data_version()
+    publish("accounts_changed", {"account_ids": [anomaly.account_id], "reason": "outreach"})
     return {"status": "ok", "outreach_status": "rejected"}
 
 
+# ── Keyset pagination ──────────────────────────────────────────────────────────
+
+async def _keyset_page(db: AsyncSession, model, statement, before: Optional[int], limit: int, response: Response):
+    """Return the next `limit` rows of `statement` in (created_at desc, id desc) order.
+
+    `before` is the id of the last row of the previous page. Its created_at is read
+    in SQL so the comparison uses the stored value exactly. When the page is full,
+    the cursor for the following page is sent in the X-Next-Cursor header.
+    """
+    if before is not None:
+        if await db.scalar(select(model.id).where(model.id == before)) is None:
+            raise HTTPException(status_code=400, detail="Unknown or archived cursor")
+        anchor = select(model.created_at).where(model.id == before).scalar_subquery()
+        statement = statement.where(or_(
+            model.created_at < anchor,
+            and_(model.created_at == anchor, model.id < before),
+        ))
+    rows = (await db.scalars(
+        statement.order_by(model.created_at.desc(), model.id.desc()).limit(limit)
+    )).all()
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+    return rows
+
+
 # ── Alerts ─────────────────────────────────────────────────────────────────────
 
 @app.get("/api/alerts", response_model=List[AlertOut])
-def get_alerts(db: Session = Depends(get_db)):
-    return db.query(Alert).order_by(Alert.created_at.desc()).limit(50).all()
+async def get_alerts(
+    response: Response,
+    before: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await _keyset_page(db, Alert, select(Alert), before, limit, response)
+
+
+@app.post("/api/alerts/{alert_id}/resolve", response_model=AlertOut)
+def resolve_alert(alert_id: int, db: Session = Depends(get_db)):
+    alert = db.query(Alert).filter(Alert.id == alert_id).first()
+    if not alert:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    alert.resolved = True
+    db.commit()
+    bump_data_version()
+    db.refresh(alert)
+    return alert
+
+
+# ── Dashboard ──────────────────────────────────────────────────────────────────
+
+@app.get("/api/dashboard", response_model=DashboardOut)
+async def get_dashboard(request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await cached_response(request, "dashboard", lambda: _build_dashboard(db))
+
+
+async def _build_dashboard(db: AsyncSession) -> DashboardOut:
+    snapshot = await _load_snapshot(db)
+    company = snapshot["company"]
+    alerts = await db.scalars(select(Alert).order_by(Alert.created_at.desc(), Alert.id.desc()).limit(50))
+    return DashboardOut(
+        company=CompanyOut.model_validate(company) if company else None,
+        stats=await _build_stats(db, snapshot),
+        accounts=await _build_account_list(db, snapshot),
+        alerts=[AlertOut.model_validate(a) for a in alerts],
+        revenue_forecast=_build_revenue_forecast(snapshot),
+    )
+
+
+# ── Ingestion ──────────────────────────────────────────────────────────────────
+
+@app.post("/api/metrics/batch", response_model=MetricBatchOut)
+async def ingest_metric_batch(request: Request):
+    """Load daily usage rows from an NDJSON (application/x-ndjson) or CSV (text/csv) body."""
+    fmt = ingest_format(request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(status_code=415, detail="Send application/x-ndjson or text/csv")
+
+    summary, touched = await ingest_metrics(request.stream(), fmt)
+    if touched:
+        bump_data_version()
+        mark_for_rescore(touched)
+        try:
+            job, _ = submit_rescore(SessionLocal, trigger="ingest")
+            summary["rescore_job_id"] = job["id"]
+        except JobConflict:
+            # The scheduler's rescore tick picks the accounts up once the worker is free.
+            pass
+    return summary
+
+
+@app.post("/api/usage-events", response_model=UsageEventBatchOut, status_code=202)
+async def ingest_usage_events(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Buffer raw product events (NDJSON) for aggregation into daily usage metrics.
+
+    Each chunk is checked for room before it is buffered. Returns 503 with
+    Retry-After when nothing could be buffered. Once part of the body is buffered
+    the request still succeeds, and `resend_from_line` is the first line that was
+    not buffered because the buffer was full.
+    """
+    if ingest_format(request.headers.get("content-type")) != "ndjson":
+        raise HTTPException(status_code=415, detail="Send application/x-ndjson")
+
+    summary = {
+        "events_received": 0, "events_accepted": 0, "events_rejected": 0, "errors": [], "resend_from_line": None,
+    }
+    buffer_full = None
+
+    def reject(line_no: int, error: str):
+        summary["events_rejected"] += 1
+        if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+            summary["errors"].append({"line": line_no, "error": error})
+
+    async def accept(chunk: List[tuple]):
+        nonlocal buffer_full
+        if buffer_full is None:
+            requested = {event.account_id for _, event in chunk}
+            known = set(await db.scalars(select(Account.id).where(Account.id.in_(requested))))
+            horizon = compaction_horizon()
+            accepted = []
+            for line_no, event in chunk:
+                if event.account_id not in known:
+                    reject(line_no, f"unknown account_id {event.account_id}")
+                elif event.timestamp is not None and event.timestamp.date() < horizon:
+                    reject(line_no, f"timestamp {event.timestamp.date()} is before the compaction horizon {horizon}")
+                else:
+                    accepted.append((line_no, event))
+            try:
+                await run_in_threadpool(make_room, len(accepted))
+            except BufferFull as e:
+                if not summary["events_accepted"]:
+                    raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+                buffer_full = str(e)
+                summary["resend_from_line"] = accepted[0][0]
+            else:
+                summary["events_accepted"] += add_events(event for _, event in accepted)
+                return
+            chunk = accepted
+        # Nothing from here on is buffered; the client resends from resend_from_line.
+        for line_no, _ in chunk:
+            reject(line_no, buffer_full)
+
+    chunk = []
+    async for line_no, text in iter_lines(request.stream()):
+        summary["events_received"] += 1
+        try:
+            chunk.append((line_no, UsageEventIn.model_validate_json(text)))
+        except ValidationError as e:
+            reject(line_no, validation_message(e))
+        if len(chunk) >= INGEST_CHUNK_ROWS:
+            await accept(chunk)
+            chunk = []
+    if chunk:
+        await accept(chunk)
+
+    summary["buffered_events"] = pending_events()
+    return summary
 
 
 # ── Operations ─────────────────────────────────────────────────────────────────
 
-@app.post("/api/run-scan")
-def trigger_scan(db: Session = Depends(get_db)):
+@app.post("/api/run-scan", response_model=JobOut, status_code=202)
+def trigger_scan():
     try:
-        summary = run_full_scan(db)
-        return {"status": "ok", "message": "Scan completed", "summary": summary}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.post("/api/seed")
-def reseed(db: Session = Depends(get_db)):
-    db.query(RenewalNotificationSettings).delete()
-    db.query(RenewalNotificationPreference).delete()
-    db.query(Alert).delete()
-    db.query(ActivityEvent).delete()
-    db.query(Anomaly).delete()
-    db.query(HealthScore).delete()
-    db.query(UsageMetric).delete()
-    db.query(Account).delete()
-    db.query(Company).delete()
-    db.commit()
+        job, _ = submit_scan(SessionLocal)
+    except JobConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return job
+
+
+# ── Scan runs ──────────────────────────────────────────────────────────────────
+
+def _scan_run_out(run: ScanRun) -> ScanRunOut:
+    return ScanRunOut(
+        id=run.id,
+        trigger=run.trigger,
+        status=run.status,
+        started_at=run.started_at,
+        finished_at=run.finished_at,
+        duration_seconds=run.duration_seconds,
+        phase_seconds=json.loads(run.phase_seconds_json) if run.phase_seconds_json else {},
+        db_seconds=run.db_seconds or 0.0,
+        error=run.error,
+        **{count: getattr(run, count) or 0 for count in SCAN_RUN_COUNTS},
+    )
 
-    seed_data()
+
+@app.get("/api/scan-runs", response_model=List[ScanRunOut])
+async def list_scan_runs(
+    response: Response,
+    before: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Scan runs, newest first. `before` is the X-Next-Cursor of the previous page."""
+    statement = select(ScanRun)
+    if before is not None:
+        statement = statement.where(ScanRun.id < before)
+    runs = (await db.scalars(statement.order_by(ScanRun.id.desc()).limit(limit))).all()
+    if len(runs) == limit:
+        response.headers["X-Next-Cursor"] = str(runs[-1].id)
+    return [_scan_run_out(run) for run in runs]
+
+
+@app.get("/api/scan-runs/compare", response_model=ScanRunCompareOut)
+async def compare_scan_runs(
+    base: Optional[int] = None,
+    target: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Phase timings and counts of `target` against `base`.
+
+    `target` defaults to the latest successful run and `base` to the successful
+    run before it.
+    """
+    succeeded = select(ScanRun).where(ScanRun.status == "succeeded").order_by(ScanRun.id.desc()).limit(1)
+    target_run = await db.get(ScanRun, target) if target is not None else await db.scalar(succeeded)
+    if target_run is None:
+        raise HTTPException(status_code=404, detail="Scan run not found")
+    if base is not None:
+        base_run = await db.get(ScanRun, base)
+    else:
+        base_run = await db.scalar(succeeded.where(ScanRun.id < target_run.id))
+    if base_run is None:
+        raise HTTPException(status_code=404, detail="No scan run to compare against")
+
+    base_out, target_out = _scan_run_out(base_run), _scan_run_out(target_run)
+    phases = {}
+    for phase in sorted(set(base_out.phase_seconds) | set(target_out.phase_seconds)):
+        before_seconds = base_out.phase_seconds.get(phase, 0.0)
+        after_seconds = target_out.phase_seconds.get(phase, 0.0)
+        phases[phase] = ScanPhaseChangeOut(
+            base_seconds=before_seconds,
+            target_seconds=after_seconds,
+            change_seconds=round(after_seconds - before_seconds, 3),
+            ratio=round(after_seconds / before_seconds, 2) if before_seconds else None,
+        )
+    duration_change = None
+    if base_out.duration_seconds is not None and target_out.duration_seconds is not None:
+        duration_change = round(target_out.duration_seconds - base_out.duration_seconds, 3)
+    return ScanRunCompareOut(
+        base=base_out,
+        target=target_out,
+        duration_change_seconds=duration_change,
+        phases=phases,
+        counts={count: getattr(target_out, count) - getattr(base_out, count) for count in SCAN_RUN_COUNTS},
+    )
+
+
+def _reseed_job(progress, accounts: Optional[int] = None, days: int = 90) -> dict:
+    """Replace all data with the demo dataset, or with `accounts` synthetic accounts."""
+    progress(phase="resetting")
+    discarded = discard_buffer()
+    with engine.begin() as conn:
+        reset_data(conn)
+        if accounts is None:
+            # The demo set is small enough to load in the reset transaction, so
+            # readers see either the old data or the new, never an empty database.
+            progress(phase="seeding")
+            insert_demo_data(conn)
+    bump_data_version()
+
+    summary = {"message": "Database reseeded", "discarded_events": discarded}
+    if accounts is not None:
+        progress(phase="seeding", accounts_total=accounts)
+        summary["load"] = load_synthetic(accounts, days, progress=progress)
+    invalidate_metric_store()
+    bump_data_version()
+    return summary
+
+
+@app.post("/api/seed", response_model=JobOut, status_code=202)
+def reseed(
+    accounts: Optional[int] = Query(None, ge=1, le=1_000_000),
+    days: int = Query(90, ge=1, le=730),
+):
+    """Reset all data and queue a full scan once loading finishes (see the job's next_job_id).
+
+    Without `accounts` this restores the 30 demo accounts; with it, loads a
+    synthetic dataset of that many accounts over `days` days.
+    """
     try:
-        run_full_scan(db)
-    except Exception as e:
-        logger.error(f"Post-seed scan failed: {e}")
+        job, _ = submit_job(
+            "seed",
+            lambda progress: _reseed_job(progress, accounts, days),
+            then=lambda: submit_scan(SessionLocal, trigger="seed")[0],
+        )
+    except JobConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return job
+
+
+@app.get("/api/events")
+async def event_stream():
+    """Server-sent events: "job" progress plus "accounts_changed" and "alerts_created"."""
+    active = get_active_job()
+    initial = (("job", active),) if active else ()
+    return StreamingResponse(
+        stream(initial),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/retention/run", response_model=JobOut, status_code=202)
+def trigger_retention():
+    try:
+        job, _ = submit_retention(SessionLocal)
+    except JobConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return job
+
+
+@app.get("/api/jobs/{job_id}", response_model=JobOut)
+def get_job_status(job_id: str):
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    # Admin routes only exist when ADMIN_TOKEN is set.
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.post("/api/admin/profile/scan", response_model=JobOut, status_code=202, dependencies=[Depends(require_admin)])
+def profile_scan(mode: Literal["sample", "cprofile"] = Query("sample")):
+    """Queue a full scan under the profiler; the finished job's summary has its profile_id."""
+    try:
+        job, created = submit_scan(SessionLocal, trigger="profile", profile=mode)
+    except JobConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not created:
+        raise HTTPException(status_code=409, detail=f"Scan job {job['id']} is already {job['status']}")
+    return job
+
+
+@app.get("/api/admin/profiles", response_model=List[ProfileOut], dependencies=[Depends(require_admin)])
+def get_profiles():
+    return list_profiles()
+
+
+@app.get("/api/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+def download_profile(profile_id: str):
+    """The saved profile: collapsed stacks as text, or a pstats file."""
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "text/plain" if path.endswith(".collapsed") else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=os.path.basename(path))
+
+
+@app.get("/healthz", include_in_schema=False)
+def liveness():
+    """The process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz", include_in_schema=False)
+def readiness():
+    """200 once the database is migrated and seeded; 503 while starting or if startup failed.
+
+    The initial scan runs afterwards as a regular job (initial_scan_job_id).
+    """
+    job = get_job(_startup["job_id"]) if _startup["job_id"] else None
+    body = {
+        "status": "ready" if _ready.is_set() else "starting",
+        "startup_job_id": _startup["job_id"],
+        "initial_scan_job_id": job["next_job_id"] if job else None,
+        "error": None,
+    }
+    if job and job["status"] == "failed":
+        body.update(status="failed", error=job["error"])
+    return JSONResponse(status_code=200 if body["status"] == "ready" else 503, content=body)
+
 
-    return {"status": "ok", "message": "Database reseeded"}
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Request, scan, LLM and database metrics in the Prometheus text format."""
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,341 @@
+"""Memory-mapped columnar copy of the recent daily usage metrics.
+
+The full scan scores every account from its recent daily rows. Loading those rows
+through the ORM one account at a time dominates the scan, so the scoring signals
+are also kept here as fixed-width float64 columns, one file per signal:
+
+    <signal>.f64    capacity × days doubles, row = account slot, column = day offset
+    extents.i32     per slot: first offset, last offset, number of days present
+    meta.json       base date, window size, slot capacity, account → slot map
+
+Day offset 0 is `base_date`. Days inside an account's extent that have no metric
+row hold NaN. Reads for an account without gaps return zero-copy memoryview
+slices of the mapped files.
+
+The files are a cache of `usage_metrics`: incremental writers bump the
+generation counter in the transaction that upserts rows (`bump_generation`), then
+call `record_rows` with those rows and `save` once the batch is done; bulk loads
+call `invalidate`. `ensure_synced` rebuilds from the database after `invalidate`,
+or when rows or generations it has not seen appear (e.g. written by another
+process). Like the job queue and response cache, the store assumes a single
+application process.
+"""
+import json
+import logging
+import math
+import mmap
+import os
+import shutil
+import threading
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional, Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from scoring import SCORING_SIGNALS
+
+logger = logging.getLogger(__name__)
+
+# Empty disables the store; the scan then reads usage_metrics directly.
+METRIC_STORE_DIR = os.getenv("METRIC_STORE_DIR", "./metric_store")
+# Days kept per account. Covers daily retention plus room for new days before the
+# window has to move (which triggers a rebuild).
+METRIC_STORE_WINDOW_DAYS = int(os.getenv("METRIC_STORE_WINDOW_DAYS", "160"))
+METRIC_STORE_HEADROOM_DAYS = 30
+INITIAL_CAPACITY = 1024
+REBUILD_BATCH_ROWS = 10000
+
+_FLOAT = 8
+_EXTENT_FIELDS = 3
+_INT = 4
+_NAN = float("nan")
+
+
+class MetricStore:
+    def __init__(self, directory: str, window_days: int = METRIC_STORE_WINDOW_DAYS):
+        self.directory = directory
+        self.days = window_days
+        self.base_date: Optional[date] = None
+        self.capacity = 0
+        self.slots: Dict[int, int] = {}
+        self.max_id = 0
+        self.generation = 0
+        self._stale = True
+        self._meta_dirty = False
+        self._lock = threading.RLock()
+        self._maps: Dict[str, mmap.mmap] = {}
+        self._columns: Dict[str, memoryview] = {}
+        self._extents: Optional[memoryview] = None
+        self._open_existing()
+
+    # ── Files ─────────────────────────────────────────────────────────────────
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _files(self) -> Dict[str, int]:
+        """File name → size in bytes for the current capacity."""
+        files = {f"{signal}.f64": self.capacity * self.days * _FLOAT for signal in SCORING_SIGNALS}
+        files["extents.i32"] = self.capacity * _EXTENT_FIELDS * _INT
+        return files
+
+    def _map(self):
+        self._unmap()
+        for name, size in self._files().items():
+            with open(self._path(name), "r+b") as f:
+                self._maps[name] = mmap.mmap(f.fileno(), size)
+        for signal in SCORING_SIGNALS:
+            self._columns[signal] = memoryview(self._maps[f"{signal}.f64"]).cast("d")
+        self._extents = memoryview(self._maps["extents.i32"]).cast("i")
+
+    def _unmap(self):
+        # Not closed explicitly: slices handed out by account_columns keep the old
+        # mapping alive until the caller drops them.
+        self._columns, self._extents, self._maps = {}, None, {}
+
+    def _resize(self, capacity: int):
+        """Grow every file to `capacity` slots. New space reads as zeros."""
+        self._unmap()
+        self.capacity = capacity
+        for name, size in self._files().items():
+            with open(self._path(name), "ab") as f:
+                f.truncate(size)
+        self._map()
+
+    def _write_meta(self):
+        meta = {
+            "base_date": self.base_date.isoformat(),
+            "days": self.days,
+            "capacity": self.capacity,
+            "max_id": self.max_id,
+            "generation": self.generation,
+            "stale": self._stale,
+            "slots": {str(account_id): slot for account_id, slot in self.slots.items()},
+        }
+        tmp = self._path("meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._path("meta.json"))
+        self._meta_dirty = False
+
+    def _open_existing(self):
+        try:
+            with open(self._path("meta.json")) as f:
+                meta = json.load(f)
+            if meta["days"] != self.days:
+                return
+            self.base_date = date.fromisoformat(meta["base_date"])
+            self.capacity = meta["capacity"]
+            self.max_id = meta["max_id"]
+            self.generation = meta["generation"]
+            self.slots = {int(account_id): slot for account_id, slot in meta["slots"].items()}
+            self._map()
+            self._stale = meta["stale"]
+        except (OSError, ValueError, KeyError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning(f"Metric store at {self.directory} is unreadable, will rebuild: {e}")
+            self._unmap()
+            self._stale = True
+
+    # ── Writes ────────────────────────────────────────────────────────────────
+
+    def _slot(self, account_id: int) -> int:
+        slot = self.slots.get(account_id)
+        if slot is None:
+            slot = len(self.slots)
+            if slot >= self.capacity:
+                self._resize(max(self.capacity * 2, INITIAL_CAPACITY))
+            self.slots[account_id] = slot
+        return slot
+
+    def _fill(self, row_start: int, start: int, stop: int, value: float):
+        for column in self._columns.values():
+            for i in range(row_start + start, row_start + stop):
+                column[i] = value
+
+    def _put(self, account_id: int, day: date, values: Dict[str, Optional[float]]) -> bool:
+        """Write one day. Returns False if the day is past the end of the window."""
+        offset = (day - self.base_date).days
+        if offset < 0:
+            return True  # older than the window; never read by the scan
+        if offset >= self.days:
+            return False
+
+        slot = self._slot(account_id)
+        row_start = slot * self.days
+        e = slot * _EXTENT_FIELDS
+        first, last, present = self._extents[e], self._extents[e + 1], self._extents[e + 2]
+        is_new_day = True
+        if present == 0:
+            first = last = offset
+        elif offset > last:
+            self._fill(row_start, last + 1, offset, _NAN)
+            last = offset
+        elif offset < first:
+            self._fill(row_start, offset + 1, first, _NAN)
+            first = offset
+        else:
+            is_new_day = math.isnan(self._columns["dau"][row_start + offset])
+
+        for signal, column in self._columns.items():
+            column[row_start + offset] = values.get(signal) or 0.0
+        self._extents[e], self._extents[e + 1] = first, last
+        self._extents[e + 2] = present + 1 if is_new_day else present
+        return True
+
+    def record_rows(self, rows: Iterable[dict], max_id: int, generation: int):
+        """Apply committed usage_metrics rows (inserted or updated) to the store.
+
+        `rows` are mappings with account_id, date and the scoring signals; `max_id`
+        is the highest usage_metrics id after the write and `generation` the value
+        `bump_generation` returned in its transaction. Meant for incremental
+        writers; bulk loads should call invalidate instead. meta.json is written
+        by `save`, once per batch rather than per call.
+        """
+        with self._lock:
+            if self._stale:
+                return
+            for row in rows:
+                if not self._put(row["account_id"], row["date"], row):
+                    # A day beyond the window: move the window on the next rebuild.
+                    self.invalidate()
+                    return
+            self.max_id = max(self.max_id, max_id)
+            # A gap means another writer committed in between; its rows are only
+            # picked up by a rebuild, so keep the older generation to force one.
+            if generation == self.generation + 1:
+                self.generation = generation
+            self._meta_dirty = True
+
+    def save(self):
+        """Write meta.json if rows were recorded since it was last written."""
+        with self._lock:
+            if self._meta_dirty and not self._stale:
+                self._write_meta()
+
+    def invalidate(self):
+        """Mark the store out of date; the next ensure_synced rebuilds it."""
+        with self._lock:
+            self._stale = True
+            if self.base_date is not None:
+                self._write_meta()
+
+    def rebuild(self, db: Session):
+        """Reload the window ending at the latest metric date from usage_metrics."""
+        from models import UsageMetric
+
+        with self._lock:
+            latest, max_id = db.query(func.max(UsageMetric.date), func.max(UsageMetric.id)).one()
+            latest = latest or date.today()
+            self.base_date = latest - timedelta(days=self.days - 1 - METRIC_STORE_HEADROOM_DAYS)
+            self.max_id = max_id or 0
+            self.generation = current_generation(db)
+            self.slots = {}
+
+            self._unmap()
+            shutil.rmtree(self.directory, ignore_errors=True)
+            os.makedirs(self.directory)
+            self.capacity = 0
+            self._resize(INITIAL_CAPACITY)
+
+            rows = (
+                db.query(UsageMetric.account_id, UsageMetric.date, *[getattr(UsageMetric, s) for s in SCORING_SIGNALS])
+                .filter(UsageMetric.date >= self.base_date)
+                .order_by(UsageMetric.account_id, UsageMetric.date)
+                .yield_per(REBUILD_BATCH_ROWS)
+            )
+            count = 0
+            for row in rows:
+                self._put(row.account_id, row.date, row._mapping)
+                count += 1
+            for mapped in self._maps.values():
+                mapped.flush()
+            self._stale = False
+            self._write_meta()
+            logger.info(f"Metric store rebuilt: {count} rows for {len(self.slots)} accounts from {self.base_date}")
+
+    def ensure_synced(self, db: Session):
+        """Rebuild if invalidated or if usage_metrics has rows or upserts the store has not seen."""
+        from models import UsageMetric
+
+        with self._lock:
+            if not self._stale:
+                max_id = db.query(func.max(UsageMetric.id)).scalar() or 0
+                if max_id == self.max_id and current_generation(db) == self.generation:
+                    return
+            self.rebuild(db)
+
+    # ── Reads ─────────────────────────────────────────────────────────────────
+
+    def account_columns(self, account_id: int) -> Dict[str, Sequence[float]]:
+        """Date-ordered values per scoring signal for one account.
+
+        Accounts with a metric row for every day in their extent get zero-copy
+        slices of the mapped columns; accounts with gaps get compacted lists.
+        Slices see later writes for that account but not a rebuild.
+        """
+        with self._lock:
+            slot = self.slots.get(account_id)
+            if slot is None:
+                return {signal: [] for signal in SCORING_SIGNALS}
+            e = slot * _EXTENT_FIELDS
+            first, last, present = self._extents[e], self._extents[e + 1], self._extents[e + 2]
+            if present == 0:
+                return {signal: [] for signal in SCORING_SIGNALS}
+            start = slot * self.days + first
+            stop = slot * self.days + last + 1
+            columns = {signal: column[start:stop] for signal, column in self._columns.items()}
+            if present == last - first + 1:
+                return columns
+            keep = [i for i, value in enumerate(columns["dau"]) if not math.isnan(value)]
+            return {signal: [values[i] for i in keep] for signal, values in columns.items()}
+
+
+def bump_generation(conn: Connection) -> int:
+    """Advance the usage_metrics generation inside the caller's write transaction."""
+    from database import dialect_insert
+    from models import UsageMetricGeneration
+
+    table = UsageMetricGeneration.__table__
+    statement = dialect_insert(table).values(id=1, generation=1)
+    conn.execute(statement.on_conflict_do_update(
+        index_elements=["id"], set_={"generation": table.c.generation + 1},
+    ))
+    return conn.execute(select(table.c.generation).where(table.c.id == 1)).scalar_one()
+
+
+def current_generation(db: Session) -> int:
+    from models import UsageMetricGeneration
+
+    return db.scalar(select(UsageMetricGeneration.generation).where(UsageMetricGeneration.id == 1)) or 0
+
+
+_store: Optional[MetricStore] = None
+_store_lock = threading.Lock()
+
+
+def get_metric_store() -> Optional[MetricStore]:
+    """The process-wide store, or None when METRIC_STORE_DIR is empty."""
+    global _store
+    if not METRIC_STORE_DIR:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = MetricStore(METRIC_STORE_DIR)
+        return _store
+
+
+def save_metric_store():
+    """Persist the store's metadata at the end of an ingest batch or buffer flush."""
+    store = get_metric_store()
+    if store is not None:
+        store.save()
+
+
+def invalidate_metric_store():
+    """Force a rebuild before the next scan after a bulk change to usage_metrics."""
+    store = get_metric_store()
+    if store is not None:
+        store.invalidate()
@@ -0,0 +1,119 @@
+import logging
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql import func
+
+logger = logging.getLogger(__name__)
+
+# Applied migrations are recorded here so each one runs once per database.
+_migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _migration_metadata,
+    Column("name", String, primary_key=True),
+    Column("applied_at", DateTime, server_default=func.now()),
+)
+
+
+# Each migration spells out its own DDL instead of reflecting the current
+# models, so a migration id always means the same change on every database.
+_HOT_QUERY_INDEXES = [
+    ("ix_usage_metrics_account_date", "usage_metrics", "account_id, date"),
+    ("ix_health_scores_account_date", "health_scores", "account_id, date"),
+    ("ix_anomalies_account_detected_at", "anomalies", "account_id, detected_at"),
+    ("ix_anomalies_outreach_status_account", "anomalies", "outreach_status, account_id"),
+    ("ix_activity_events_account_created_at", "activity_events", "account_id, created_at"),
+    ("ix_alerts_created_at", "alerts", "created_at"),
+    ("ix_alerts_account_type_resolved", "alerts", "account_id, alert_type, resolved"),
+]
+
+
+def _hot_query_indexes(conn: Connection):
+    for name, table, columns in _HOT_QUERY_INDEXES:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+def _unique_usage_metric_days(conn: Connection):
+    """Replace the plain (account_id, date) index with a unique one.
+
+    Duplicates are removed first, keeping the newest row (highest id) for each
+    account and day.
+    """
+    conn.execute(text("DROP INDEX IF EXISTS ix_usage_metrics_account_date"))
+    conn.execute(text(
+        "DELETE FROM usage_metrics WHERE id NOT IN "
+        "(SELECT MAX(id) FROM usage_metrics GROUP BY account_id, date)"
+    ))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_usage_metrics_account_date ON usage_metrics (account_id, date)"
+    ))
+
+
+_DATE_COLUMNS = [
+    # (table, column, nullable)
+    ("usage_metrics", "date", False),
+    ("health_scores", "date", False),
+    ("accounts", "renewal_date", True),
+]
+
+
+def _convert_date_columns(conn: Connection):
+    """Turn ISO date strings into native DATE values."""
+    if conn.dialect.name == "postgresql":
+        for table, column, _ in _DATE_COLUMNS:
+            # create_all makes these columns DATE on a fresh database, and
+            # NULLIF(<date>, '') fails there; only convert text columns.
+            data_type = conn.execute(text(
+                "SELECT data_type FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = :table AND column_name = :column"
+            ), {"table": table, "column": column}).scalar()
+            if data_type not in ("text", "character varying"):
+                continue
+            conn.execute(text(
+                f"ALTER TABLE {table} ALTER COLUMN {column} TYPE DATE "
+                f"USING NULLIF({column}, '')::date"
+            ))
+    else:
+        # SQLite stores DATE as 'YYYY-MM-DD' text, so the data only needs to be
+        # normalised: strip time parts and drop values that are not dates.
+        for table, column, nullable in _DATE_COLUMNS:
+            conn.execute(text(
+                f"UPDATE {table} SET {column} = date({column}) "
+                f"WHERE {column} IS NOT NULL AND {column} != date({column})"
+            ))
+            if nullable:
+                conn.execute(text(f"UPDATE {table} SET {column} = NULL WHERE date({column}) IS NULL"))
+            else:
+                conn.execute(text(f"DELETE FROM {table} WHERE date({column}) IS NULL"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_accounts_renewal_date ON accounts (renewal_date)"))
+
+
+def _health_score_date_index(conn: Connection):
+    # Scans load all of today's scores in one query.
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_health_scores_date ON health_scores (date)"))
+
+
+# Ordered; append new migrations at the end and never rename applied ones.
+MIGRATIONS: List[Tuple[str, Callable[[Connection], None]]] = [
+    ("0001_hot_query_indexes", _hot_query_indexes),
+    ("0002_native_date_columns", _convert_date_columns),
+    ("0003_unique_usage_metric_days", _unique_usage_metric_days),
+    ("0004_health_score_date_index", _health_score_date_index),
+]
+
+
+def run_migrations(engine: Engine):
+    """Apply pending migrations, each in its own transaction."""
+    _migration_metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        applied = set(conn.execute(select(schema_migrations.c.name)).scalars())
+
+    for name, migrate in MIGRATIONS:
+        if name in applied:
+            continue
+        logger.info(f"Applying migration {name}")
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(schema_migrations.insert().values(name=name))
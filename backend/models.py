@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, Text, ForeignKey, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -25,13 +25,16 @@ class Company(Base):
 
 class Account(Base):
     __tablename__ = "accounts"
+    __table_args__ = (
+        Index("ix_accounts_renewal_date", "renewal_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     tier = Column(String, default="starter")  # starter, growth, scale
     seats = Column(Integer, default=5)
     mrr = Column(Float, default=0.0)
-    renewal_date = Column(String, nullable=True)  # ISO date string
+    renewal_date = Column(Date, nullable=True)
     csm_name = Column(String, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
 
@@ -49,10 +52,13 @@ class Account(Base):
 
 class UsageMetric(Base):
     __tablename__ = "usage_metrics"
+    __table_args__ = (
+        Index("ix_usage_metrics_account_date", "account_id", "date", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
-    date = Column(String, nullable=False)  # ISO date string
+    date = Column(Date, nullable=False)
     dau = Column(Float, default=0.0)
     wau = Column(Float, default=0.0)
     mau = Column(Float, default=0.0)
@@ -66,12 +72,78 @@ class UsageMetric(Base):
     account = relationship("Account", back_populates="metrics")
 
 
+class UsageMetricGeneration(Base):
+    """Single-row counter bumped by every transaction that upserts usage_metrics.
+
+    An upsert keeps the row's id, so max(id) alone does not show that another
+    process changed existing days; the metric store compares this counter too.
+    """
+    __tablename__ = "usage_metric_generation"
+
+    id = Column(Integer, primary_key=True)
+    generation = Column(Integer, nullable=False, default=0)
+
+
+class UserSketch(Base):
+    """Daily HyperLogLog sketch of the distinct users seen for an account (see hll.py)."""
+    __tablename__ = "usage_user_sketches"
+    __table_args__ = (
+        Index("ix_usage_user_sketches_account_date", "account_id", "date", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    date = Column(Date, nullable=False)
+    sketch = Column(LargeBinary, nullable=False)
+
+
+# Signals kept in the weekly/monthly usage rollups. Each gets <signal>_sum,
+# <signal>_mean and <signal>_max columns; mean and max stay NULL for a period
+# without any observation of the signal.
+ROLLUP_SIGNALS = (
+    "dau", "wau", "mau", "active_seats", "feature_count",
+    "api_calls", "support_tickets", "nps_score", "logins",
+)
+
+
+class _UsageRollupColumns:
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    period_start = Column(Date, nullable=False)
+    days = Column(Integer, default=0)  # daily rows folded into this period
+    nps_days = Column(Integer, default=0)  # days with an NPS response
+
+
+for _signal in ROLLUP_SIGNALS:
+    setattr(_UsageRollupColumns, f"{_signal}_sum", Column(Float, default=0.0))
+    setattr(_UsageRollupColumns, f"{_signal}_mean", Column(Float))
+    setattr(_UsageRollupColumns, f"{_signal}_max", Column(Float))
+
+
+class UsageMetricWeekly(_UsageRollupColumns, Base):
+    __tablename__ = "usage_metrics_weekly"
+    __table_args__ = (
+        Index("ix_usage_metrics_weekly_account_period", "account_id", "period_start", unique=True),
+    )
+
+
+class UsageMetricMonthly(_UsageRollupColumns, Base):
+    __tablename__ = "usage_metrics_monthly"
+    __table_args__ = (
+        Index("ix_usage_metrics_monthly_account_period", "account_id", "period_start", unique=True),
+    )
+
+
 class HealthScore(Base):
     __tablename__ = "health_scores"
+    __table_args__ = (
+        Index("ix_health_scores_account_date", "account_id", "date"),
+        Index("ix_health_scores_date", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
-    date = Column(String, nullable=False)
+    date = Column(Date, nullable=False)
     composite = Column(Float, default=0.0)
     engagement_score = Column(Float, default=0.0)
     adoption_score = Column(Float, default=0.0)
@@ -84,6 +156,10 @@ class HealthScore(Base):
 
 class Anomaly(Base):
     __tablename__ = "anomalies"
+    __table_args__ = (
+        Index("ix_anomalies_account_detected_at", "account_id", "detected_at"),
+        Index("ix_anomalies_outreach_status_account", "outreach_status", "account_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
@@ -101,6 +177,9 @@ class Anomaly(Base):
 
 class ActivityEvent(Base):
     __tablename__ = "activity_events"
+    __table_args__ = (
+        Index("ix_activity_events_account_created_at", "account_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
@@ -114,6 +193,10 @@ class ActivityEvent(Base):
 
 class Alert(Base):
     __tablename__ = "alerts"
+    __table_args__ = (
+        Index("ix_alerts_created_at", "created_at"),
+        Index("ix_alerts_account_type_resolved", "account_id", "alert_type", "resolved"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
@@ -124,6 +207,24 @@ class Alert(Base):
     created_at = Column(DateTime, server_default=func.now())
 
 
+class ArchiveBatch(Base):
+    """A batch of rows moved out of a live table, stored as zlib-compressed JSON lines."""
+    __tablename__ = "archive_batches"
+    __table_args__ = (
+        Index("ix_archive_batches_source_newest", "source_table", "newest_created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    source_table = Column(String, nullable=False)  # alerts, activity_events
+    row_count = Column(Integer, nullable=False)
+    first_id = Column(Integer, nullable=False)
+    last_id = Column(Integer, nullable=False)
+    oldest_created_at = Column(DateTime, nullable=True)
+    newest_created_at = Column(DateTime, nullable=True)
+    payload = Column(LargeBinary, nullable=False)
+    archived_at = Column(DateTime, server_default=func.now())
+
+
 class RenewalNotificationPreference(Base):
     __tablename__ = "renewal_notification_preferences"
 
@@ -146,3 +247,32 @@ class RenewalNotificationSettings(Base):
     notify_14_days = Column(Boolean, default=False)
     notify_7_days = Column(Boolean, default=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class ScanRun(Base):
+    """One run_full_scan: written when it starts, completed when it finishes or fails."""
+    __tablename__ = "scan_runs"
+    __table_args__ = (
+        Index("ix_scan_runs_status_finished_at", "status", "finished_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    trigger = Column(String, default="manual")  # manual, scheduled, startup, seed, profile
+    status = Column(String, default="running")  # running, succeeded, failed
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+    phase_seconds_json = Column(Text, nullable=True)  # {"load": 1.2, "score": 0.4, ...}
+    accounts_scanned = Column(Integer, default=0)
+    health_scores_created = Column(Integer, default=0)
+    health_scores_updated = Column(Integer, default=0)
+    anomalies_created = Column(Integer, default=0)
+    anomalies_skipped_recent = Column(Integer, default=0)
+    alerts_created = Column(Integer, default=0)
+    renewal_alerts_created = Column(Integer, default=0)
+    outreach_auto_sent = Column(Integer, default=0)
+    llm_calls = Column(Integer, default=0)
+    llm_errors = Column(Integer, default=0)
+    db_queries = Column(Integer, default=0)
+    db_seconds = Column(Float, default=0.0)
+    error = Column(Text, nullable=True)
@@ -0,0 +1,210 @@
+"""On-demand profiling of scans and requests, for admins.
+
+Disabled unless ADMIN_TOKEN is set. With it unset, no middleware is installed
+and the admin routes answer 404, so normal traffic pays nothing.
+
+Two modes:
+
+- "sample": a background thread records the Python stacks every
+  PROFILE_SAMPLE_INTERVAL_MS and writes them as collapsed stacks
+  ("outer;inner;leaf count" lines), ready for flamegraph.pl or speedscope.
+- "cprofile": deterministic cProfile of the profiled thread, written as a
+  pstats file (`python -m pstats <file>`). It slows the profiled code down,
+  and only covers one thread, so it is offered for scans only.
+
+Requests are profiled by sending X-Profile: sample with the admin token. The
+sampler covers every thread that runs backend code while the request is in
+flight, so concurrent requests and jobs can show up in the same profile.
+"""
+import cProfile
+import hmac
+import os
+import re
+import sys
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+PROFILING_ENABLED = bool(ADMIN_TOKEN)
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+MAX_PROFILES = 50
+
+PROFILE_MODES = {"sample": "collapsed", "cprofile": "pstats"}
+_PROFILE_ID = re.compile(r"^\d{8}T\d{6}-(\w+)-[0-9a-f]{6}$")
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class StackSampler:
+    """Counts the stacks of running threads, sampled on a fixed interval.
+
+    With `thread_ids`, only those threads are sampled; otherwise every thread
+    whose stack passes through backend code is, which skips idle pool and
+    scheduler threads.
+    """
+
+    def __init__(self, thread_ids: Optional[Set[int]] = None, interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS):
+        self.thread_ids = thread_ids
+        self.interval = interval_ms / 1000
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                continue
+            stack = []
+            in_backend = False
+            while frame is not None:
+                code = frame.f_code
+                in_backend = in_backend or code.co_filename.startswith(_BACKEND_DIR)
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if self.thread_ids is None and not in_backend:
+                continue
+            self.stacks[";".join(reversed(stack))] += 1
+
+
+def _new_profile_id(kind: str) -> str:
+    return f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{kind}-{uuid.uuid4().hex[:6]}"
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    return PROFILING_ENABLED and token is not None and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+
+def profile_path(profile_id: str) -> Optional[str]:
+    """The artifact for `profile_id`, or None if there is no such profile."""
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    for extension in PROFILE_MODES.values():
+        path = os.path.join(PROFILE_DIR, f"{profile_id}.{extension}")
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def list_profiles() -> List[dict]:
+    """Saved profiles, newest first."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    modes = {extension: mode for mode, extension in PROFILE_MODES.items()}
+    profiles = []
+    for name in os.listdir(PROFILE_DIR):
+        profile_id, _, extension = name.rpartition(".")
+        match = _PROFILE_ID.match(profile_id)
+        if extension not in modes or not match:
+            continue
+        stat = os.stat(os.path.join(PROFILE_DIR, name))
+        profiles.append({
+            "id": profile_id,
+            "kind": match.group(1),
+            "mode": modes[extension],
+            "created_at": datetime.fromtimestamp(stat.st_mtime).isoformat(timespec="seconds"),
+            "bytes": stat.st_size,
+        })
+    profiles.sort(key=lambda p: p["created_at"], reverse=True)
+    return profiles
+
+
+def _prune():
+    for profile in list_profiles()[MAX_PROFILES:]:
+        path = profile_path(profile["id"])
+        if path:
+            os.remove(path)
+
+
+def _write_collapsed(path: str, stacks: Counter):
+    with open(path, "w") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+
+def start_sampling(kind: str, thread_ids: Optional[Set[int]] = None) -> Tuple[str, Callable[[], None]]:
+    """Start a sampler and return (profile id, finish). `finish()` stops it and saves the profile."""
+    profile_id = _new_profile_id(kind)
+    sampler = StackSampler(thread_ids).start()
+
+    def finish():
+        stacks = sampler.stop()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        _write_collapsed(os.path.join(PROFILE_DIR, f"{profile_id}.collapsed"), stacks)
+        _prune()
+
+    return profile_id, finish
+
+
+def profile_call(kind: str, mode: str, fn: Callable[[], Dict]) -> Tuple[Dict, str]:
+    """Run `fn()` on this thread under the profiler and return (its result, profile id)."""
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode '{mode}'")
+    if mode == "sample":
+        profile_id, finish = start_sampling(kind, {threading.get_ident()})
+        try:
+            return fn(), profile_id
+        finally:
+            finish()
+
+    profile_id = _new_profile_id(kind)
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn), profile_id
+    finally:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profiler.dump_stats(os.path.join(PROFILE_DIR, f"{profile_id}.pstats"))
+        _prune()
+
+
+class RequestProfilingMiddleware:
+    """Samples requests sent with X-Profile: sample and a valid X-Admin-Token.
+
+    The profile id is returned in the X-Profile-Id response header. Only installed
+    when profiling is enabled.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        token = headers.get(b"x-admin-token", b"").decode("latin-1")
+        if headers.get(b"x-profile") != b"sample" or not is_admin_token(token):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id, finish = start_sampling("request")
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            # Joins the sampler thread and writes the profile file.
+            await run_in_threadpool(finish)
@@ -0,0 +1,115 @@
+"""Check that the hot API and scan queries are served by indexes.
+
+Run against the configured SQLite database:
+
+    python query_plans.py
+
+Exits non-zero if any query below falls back to a full table scan.
+"""
+import re
+import sys
+from datetime import date, datetime, timedelta
+from typing import List, Tuple
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.engine import Engine
+
+from models import Account, ActivityEvent, Alert, Anomaly, HealthScore, UsageMetric
+
+# "SCAN <table>" without a "USING ... INDEX" suffix is a full table scan. Scans of
+# materialized subqueries ("anon_1") are bounded by their own indexed plan.
+_FULL_SCAN = re.compile(r"^SCAN (?!anon_)(\w+)$")
+
+
+def hot_queries() -> List[Tuple[str, object]]:
+    since = (datetime.now() - timedelta(hours=12)).isoformat(sep=" ")
+    month_start = date.today().replace(day=1)
+    latest = (
+        select(HealthScore.account_id, func.max(HealthScore.date).label("date"))
+        .group_by(HealthScore.account_id)
+        .subquery()
+    )
+    alert_anchor = select(Alert.created_at).where(Alert.id == 100).scalar_subquery()
+    event_anchor = select(ActivityEvent.created_at).where(ActivityEvent.id == 100).scalar_subquery()
+    return [
+        ("account metrics by date", select(UsageMetric)
+            .where(UsageMetric.account_id == 1).order_by(UsageMetric.date)),
+        ("today's scores", select(HealthScore).where(HealthScore.date == "2026-01-01")),
+        ("rescore score lookup", select(HealthScore)
+            .where(HealthScore.date == "2026-01-01", HealthScore.account_id.in_([1, 2, 3]))),
+        ("account score history", select(HealthScore).where(HealthScore.account_id == 1)),
+        ("latest score per account", select(HealthScore).join(latest, and_(
+            HealthScore.account_id == latest.c.account_id,
+            HealthScore.date == latest.c.date,
+        ))),
+        ("recently flagged accounts", select(Anomaly.account_id)
+            .where(Anomaly.detected_at >= since).distinct()),
+        ("account anomalies", select(Anomaly)
+            .where(Anomaly.account_id == 1).order_by(Anomaly.detected_at.desc()).limit(10)),
+        ("pending anomaly accounts", select(Anomaly.account_id)
+            .where(Anomaly.outreach_status == "pending").distinct()),
+        ("pending anomaly count", select(func.count()).select_from(Anomaly)
+            .where(Anomaly.outreach_status == "pending")),
+        ("account timeline", select(ActivityEvent)
+            .where(ActivityEvent.account_id == 1)
+            .order_by(ActivityEvent.created_at.desc()).limit(50)),
+        ("latest alerts", select(Alert).order_by(Alert.created_at.desc(), Alert.id.desc()).limit(50)),
+        ("alerts page after cursor", select(Alert).where(or_(
+            Alert.created_at < alert_anchor,
+            and_(Alert.created_at == alert_anchor, Alert.id < 100),
+        )).order_by(Alert.created_at.desc(), Alert.id.desc()).limit(50)),
+        ("account activity page after cursor", select(ActivityEvent).where(
+            ActivityEvent.account_id == 1,
+            or_(
+                ActivityEvent.created_at < event_anchor,
+                and_(ActivityEvent.created_at == event_anchor, ActivityEvent.id < 100),
+            ),
+        ).order_by(ActivityEvent.created_at.desc(), ActivityEvent.id.desc()).limit(50)),
+        ("renewal calendar month", select(Account).where(
+            Account.renewal_date >= month_start,
+            Account.renewal_date < month_start + timedelta(days=31),
+        )),
+        ("renewal reminder candidates", select(Account).where(
+            Account.renewal_date.in_([date.today() + timedelta(days=d) for d in (7, 14, 30, 90)])
+        )),
+        ("open renewal alert lookup", select(Alert).where(
+            Alert.account_id == 1,
+            Alert.alert_type == "renewal_reminder",
+            Alert.resolved.is_(False),
+        ).limit(1)),
+    ]
+
+
+def explain(engine: Engine, statement) -> List[str]:
+    compiled = statement.compile(dialect=engine.dialect, compile_kwargs={"render_postcompile": True})
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return [row[-1] for row in rows]
+
+
+def find_full_scans(engine: Engine) -> List[Tuple[str, List[str]]]:
+    """Return (query name, plan) for every hot query that scans a whole table."""
+    failures = []
+    for name, statement in hot_queries():
+        plan = explain(engine, statement)
+        if any(_FULL_SCAN.match(step) for step in plan):
+            failures.append((name, plan))
+    return failures
+
+
+if __name__ == "__main__":
+    from database import IS_SQLITE, engine, init_db
+
+    if not IS_SQLITE:
+        sys.exit("Query plan checks only support SQLite (EXPLAIN QUERY PLAN).")
+
+    init_db()
+    failures = find_full_scans(engine)
+    for name, plan in failures:
+        print(f"FULL SCAN: {name}")
+        for step in plan:
+            print(f"    {step}")
+    if failures:
+        sys.exit(1)
+    print(f"All {len(hot_queries())} hot queries use indexes.")
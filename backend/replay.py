@@ -0,0 +1,193 @@
+"""Replay the scan pipeline day by day over historical usage metrics.
+
+    python replay.py --days 60
+    python replay.py --source sqlite:///./pulsescore.db --critical-threshold 45 --out replay.json
+
+The company, accounts and renewal notification settings are copied from
+--source (default DATABASE_URL) into an in-memory SQLite database. Metrics
+older than the replay window are loaded up front. Then, for each replayed day,
+that day's usage_metrics rows are bulk-inserted and run_full_scan runs with the
+clock frozen at each scheduled scan time, every --scan-interval-hours from
+--first-scan-hour. AI calls use the canned in-process stub, so scans do no
+network I/O and months replay in seconds.
+
+--critical-threshold, --at-risk-threshold and --weights override the copied
+company settings. Running the same window with different values shows how the
+states and alerts would have moved. One line per day is printed; --out writes
+the per-day series as JSON.
+"""
+import argparse
+import json
+import logging
+import os
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from itertools import groupby
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+METRIC_BATCH_ROWS = 10000
+SCORE_SIGNAL_WEIGHTS = ("weight_engagement", "weight_adoption", "weight_health", "weight_support")
+
+
+def _copy_table(source, target, table, where=None):
+    statement = table.select() if where is None else table.select().where(where)
+    rows = [dict(row) for row in source.execute(statement).mappings()]
+    for start in range(0, len(rows), METRIC_BATCH_ROWS):
+        target.execute(table.insert(), rows[start:start + METRIC_BATCH_ROWS])
+    return len(rows)
+
+
+def _day_report(db, day: date, scans: List[dict], critical: float, at_risk: float) -> dict:
+    from sqlalchemy import func
+
+    from models import Alert, Anomaly, HealthScore
+    from scoring import get_state
+
+    composites = [row.composite for row in db.query(HealthScore.composite).filter(HealthScore.date == day)]
+    start, end = datetime.combine(day, time.min), datetime.combine(day + timedelta(days=1), time.min)
+    anomalies = Counter(
+        f"{pattern}/{severity}"
+        for pattern, severity in db.query(Anomaly.pattern, Anomaly.severity)
+        .filter(Anomaly.detected_at >= start, Anomaly.detected_at < end)
+    )
+    return {
+        "date": day.isoformat(),
+        "scans": len(scans),
+        "states": dict(Counter(get_state(c, critical, at_risk) for c in composites)),
+        "mean_composite": round(sum(composites) / len(composites), 1) if composites else None,
+        "anomalies": dict(sorted(anomalies.items())),
+        "anomalies_created": sum(s["anomalies_created"] for s in scans),
+        "anomalies_skipped_recent": sum(s["anomalies_skipped_recent"] for s in scans),
+        "alerts_created": sum(s["alerts_created"] for s in scans),
+        "renewal_alerts_created": sum(s["renewal_alerts_created"] for s in scans),
+        "open_alerts": db.query(func.count(Alert.id)).filter(Alert.resolved.is_(False)).scalar(),
+    }
+
+
+def replay(
+    source_url: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    days: int = 30,
+    scan_interval_hours: int = 6,
+    first_scan_hour: int = 0,
+    critical_threshold: Optional[float] = None,
+    at_risk_threshold: Optional[float] = None,
+    weights: Optional[List[float]] = None,
+    report=None,
+) -> List[dict]:
+    """Run the scans between `start` and `end` (default: the last `days` days of data)
+    and return one report per day. `report` is called with each day's report.
+
+    Import with METRIC_STORE_DIR="" so scans read metrics from the replay database.
+    """
+    from sqlalchemy import create_engine, func, select
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    import clock
+    from anthropic_stub import install_ai_stub
+    from database import engine as default_engine
+    from models import Account, Base, Company, RenewalNotificationSettings, UsageMetric
+    from scheduler import run_full_scan
+
+    install_ai_stub()
+    source = create_engine(source_url) if source_url else default_engine
+    target = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(target)
+    metrics = UsageMetric.__table__
+
+    with source.connect() as src:
+        latest = src.execute(select(func.max(metrics.c.date))).scalar()
+        if latest is None:
+            raise SystemExit("The source database has no usage metrics to replay")
+        end = end or latest
+        start = start or end - timedelta(days=days - 1)
+
+        with target.begin() as dst:
+            for model in (Company, Account, RenewalNotificationSettings):
+                _copy_table(src, dst, model.__table__)
+            history = _copy_table(src, dst, metrics, metrics.c.date < start)
+
+        Session = sessionmaker(bind=target, autoflush=False)
+        db = Session()
+        try:
+            company = db.query(Company).first()
+            if critical_threshold is not None:
+                company.critical_threshold = critical_threshold
+            if at_risk_threshold is not None:
+                company.at_risk_threshold = at_risk_threshold
+            for column, weight in zip(SCORE_SIGNAL_WEIGHTS, weights or []):
+                setattr(company, column, weight)
+            db.commit()
+            critical, at_risk = company.critical_threshold, company.at_risk_threshold
+            logger.info(f"Replaying {start} to {end} over {history} rows of earlier history")
+
+            rows = src.execution_options(yield_per=METRIC_BATCH_ROWS).execute(
+                select(metrics).where(metrics.c.date >= start, metrics.c.date <= end).order_by(metrics.c.date)
+            ).mappings()
+            by_day = groupby(rows, key=lambda row: row["date"])
+            pending = next(by_day, None)
+
+            reports = []
+            day = start
+            while day <= end:
+                batch = []
+                while pending is not None and pending[0] <= day:
+                    batch.extend(dict(row) for row in pending[1])
+                    pending = next(by_day, None)
+                with target.begin() as dst:
+                    for offset in range(0, len(batch), METRIC_BATCH_ROWS):
+                        dst.execute(metrics.insert(), batch[offset:offset + METRIC_BATCH_ROWS])
+
+                scans = []
+                for hour in range(first_scan_hour, 24, scan_interval_hours):
+                    with clock.frozen_at(datetime.combine(day, time(hour))):
+                        scans.append(run_full_scan(db, trigger="replay"))
+                day_report = _day_report(db, day, scans, critical, at_risk)
+                reports.append(day_report)
+                if report:
+                    report(day_report)
+                day += timedelta(days=1)
+            return reports
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    # The on-disk metric store mirrors the source database, not the replay's.
+    os.environ["METRIC_STORE_DIR"] = ""
+    from scheduler import SCAN_INTERVAL_HOURS
+
+    parser = argparse.ArgumentParser(description="Replay daily scans over historical usage metrics in memory.")
+    parser.add_argument("--source", help="database URL to read history from (default DATABASE_URL)")
+    parser.add_argument("--start", type=date.fromisoformat, help="first day to replay (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="last day to replay (default: latest metric date)")
+    parser.add_argument("--days", type=int, default=30, help="days to replay when --start is not given")
+    parser.add_argument("--scan-interval-hours", type=int, default=SCAN_INTERVAL_HOURS)
+    parser.add_argument("--first-scan-hour", type=int, default=0)
+    parser.add_argument("--critical-threshold", type=float)
+    parser.add_argument("--at-risk-threshold", type=float)
+    parser.add_argument("--weights", type=lambda v: [float(w) for w in v.split(",")],
+                        help="engagement,adoption,health,support")
+    parser.add_argument("--out", help="write the per-day reports to this JSON file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for noisy in ("scheduler", "metric_store"):
+        logging.getLogger(noisy).setLevel(logging.WARNING)
+
+    def print_day(r):
+        states = " ".join(f"{state}={count}" for state, count in sorted(r["states"].items()))
+        print(f"{r['date']}  {states:48} anomalies +{r['anomalies_created']:<4} alerts +{r['alerts_created']:<4} "
+              f"renewals +{r['renewal_alerts_created']:<3} open alerts {r['open_alerts']}")
+
+    results = replay(
+        args.source, args.start, args.end, args.days, args.scan_interval_hours, args.first_scan_hour,
+        args.critical_threshold, args.at_risk_threshold, args.weights, report=print_day,
+    )
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
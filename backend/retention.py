@@ -0,0 +1,379 @@
+import json
+import logging
+import os
+import zlib
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models import (
+    ROLLUP_SIGNALS,
+    ActivityEvent,
+    Alert,
+    ArchiveBatch,
+    UsageMetric,
+    UsageMetricMonthly,
+    UsageMetricWeekly,
+    UserSketch,
+)
+
+logger = logging.getLogger(__name__)
+
+# Scoring and anomaly detection read the last 60 daily rows, so daily retention
+# never goes below that.
+SCORING_WINDOW_DAYS = 60
+DAILY_RETENTION_DAYS = max(int(os.getenv("METRIC_DAILY_RETENTION_DAYS", "90")), SCORING_WINDOW_DAYS)
+WEEKLY_RETENTION_DAYS = int(os.getenv("METRIC_WEEKLY_RETENTION_DAYS", "730"))
+COMPACTION_BATCH_ACCOUNTS = 200
+
+# Alerts and activity events past these ages are moved into archive_batches.
+RESOLVED_ALERT_RETENTION_DAYS = int(os.getenv("RESOLVED_ALERT_RETENTION_DAYS", "30"))
+ALERT_RETENTION_DAYS = int(os.getenv("ALERT_RETENTION_DAYS", "180"))
+ACTIVITY_RETENTION_DAYS = int(os.getenv("ACTIVITY_RETENTION_DAYS", "180"))
+ARCHIVE_BATCH_ROWS = 1000
+
+# Ranges up to these spans are served at the given resolution when resolution="auto".
+AUTO_DAILY_MAX_SPAN_DAYS = 120
+AUTO_WEEKLY_MAX_SPAN_DAYS = 730
+
+RESOLUTIONS = ("day", "week", "month")
+
+
+def week_start(d: date) -> date:
+    return d - timedelta(days=d.weekday())
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def compaction_horizon(today: Optional[date] = None) -> date:
+    """The oldest day that still accepts daily usage writes.
+
+    Earlier days may already be folded into the rollups, which cannot tell a
+    re-sent day from a new one, so writes for them are rejected rather than
+    counted twice.
+    """
+    return (today or datetime.now().date()) - timedelta(days=DAILY_RETENTION_DAYS)
+
+
+_PERIOD_START = {"day": lambda d: d, "week": week_start, "month": month_start}
+_ROLLUP_MODELS = {"week": UsageMetricWeekly, "month": UsageMetricMonthly}
+
+
+# ── Period accumulators ───────────────────────────────────────────────────────
+
+def _empty_bucket() -> dict:
+    bucket = {"days": 0, "nps_days": 0}
+    for signal in ROLLUP_SIGNALS:
+        bucket[f"{signal}_sum"] = 0.0
+        bucket[f"{signal}_max"] = None
+    return bucket
+
+
+def _fold_daily(bucket: dict, values: dict):
+    """Add one daily metric row to a period bucket."""
+    bucket["days"] += 1
+    for signal in ROLLUP_SIGNALS:
+        value = values.get(signal)
+        if value is None:
+            continue
+        if signal == "nps_score":
+            bucket["nps_days"] += 1
+        bucket[f"{signal}_sum"] += value
+        current_max = bucket[f"{signal}_max"]
+        bucket[f"{signal}_max"] = value if current_max is None else max(current_max, value)
+
+
+def _fold_rollup(bucket: dict, rollup):
+    """Add a stored weekly/monthly rollup row to a period bucket."""
+    bucket["days"] += rollup.days or 0
+    bucket["nps_days"] += rollup.nps_days or 0
+    for signal in ROLLUP_SIGNALS:
+        bucket[f"{signal}_sum"] += getattr(rollup, f"{signal}_sum") or 0.0
+        rollup_max = getattr(rollup, f"{signal}_max")
+        current_max = bucket[f"{signal}_max"]
+        if rollup_max is not None:
+            bucket[f"{signal}_max"] = rollup_max if current_max is None else max(current_max, rollup_max)
+
+
+def _means(bucket: dict) -> Dict[str, Optional[float]]:
+    means = {}
+    for signal in ROLLUP_SIGNALS:
+        count = bucket["nps_days"] if signal == "nps_score" else bucket["days"]
+        means[f"{signal}_mean"] = bucket[f"{signal}_sum"] / count if count else None
+    return means
+
+
+def _daily_values(row) -> dict:
+    return {signal: getattr(row, signal) for signal in ROLLUP_SIGNALS}
+
+
+# ── Compaction ────────────────────────────────────────────────────────────────
+
+def _chunks(items: List[int], size: int) -> Iterable[List[int]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _merge_rollups(db: Session, model, buckets: Dict[Tuple[int, date], dict]) -> int:
+    """Merge period buckets into existing rollup rows, creating rows as needed."""
+    if not buckets:
+        return 0
+    account_ids = {account_id for account_id, _ in buckets}
+    periods = {period for _, period in buckets}
+    existing = {
+        (row.account_id, row.period_start): row
+        for row in db.query(model).filter(
+            model.account_id.in_(account_ids),
+            model.period_start.in_(periods),
+        )
+    }
+
+    created = 0
+    for (account_id, period), bucket in buckets.items():
+        row = existing.get((account_id, period))
+        if row is not None:
+            _fold_rollup(bucket, row)
+        else:
+            row = model(account_id=account_id, period_start=period)
+            db.add(row)
+            created += 1
+        row.days = bucket["days"]
+        row.nps_days = bucket["nps_days"]
+        for signal in ROLLUP_SIGNALS:
+            setattr(row, f"{signal}_sum", bucket[f"{signal}_sum"])
+            setattr(row, f"{signal}_max", bucket[f"{signal}_max"])
+        for column, value in _means(bucket).items():
+            setattr(row, column, value)
+    return created
+
+
+def compact_usage_metrics(db: Session, today: Optional[date] = None) -> dict:
+    """Fold daily usage rows past the retention window into weekly and monthly rollups.
+
+    Daily rows older than DAILY_RETENTION_DAYS are merged into both rollup tables
+    and deleted; weekly rollups older than WEEKLY_RETENTION_DAYS are then dropped,
+    leaving the monthly rollups as the only record of that period.
+    """
+    from metric_store import bump_generation
+
+    today = today or datetime.now().date()
+    daily_cutoff = compaction_horizon(today)
+    weekly_cutoff = week_start(today - timedelta(days=WEEKLY_RETENTION_DAYS))
+    summary = {
+        "daily_rows_compacted": 0,
+        "weekly_rollups_created": 0,
+        "monthly_rollups_created": 0,
+        "weekly_rollups_dropped": 0,
+    }
+
+    account_ids = [
+        account_id
+        for (account_id,) in (
+            db.query(UsageMetric.account_id)
+            .filter(UsageMetric.date < daily_cutoff)
+            .distinct()
+        )
+    ]
+    for batch in _chunks(account_ids, COMPACTION_BATCH_ACCOUNTS):
+        old_rows = db.query(UsageMetric).filter(
+            UsageMetric.account_id.in_(batch),
+            UsageMetric.date < daily_cutoff,
+        )
+        weekly: Dict[Tuple[int, date], dict] = {}
+        monthly: Dict[Tuple[int, date], dict] = {}
+        for row in old_rows.yield_per(5000):
+            values = _daily_values(row)
+            _fold_daily(weekly.setdefault((row.account_id, week_start(row.date)), _empty_bucket()), values)
+            _fold_daily(monthly.setdefault((row.account_id, month_start(row.date)), _empty_bucket()), values)
+            summary["daily_rows_compacted"] += 1
+
+        summary["weekly_rollups_created"] += _merge_rollups(db, UsageMetricWeekly, weekly)
+        summary["monthly_rollups_created"] += _merge_rollups(db, UsageMetricMonthly, monthly)
+        old_rows.delete(synchronize_session=False)
+        bump_generation(db.connection())
+        db.commit()
+
+    summary["weekly_rollups_dropped"] = (
+        db.query(UsageMetricWeekly)
+        .filter(UsageMetricWeekly.period_start < weekly_cutoff)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    logger.info(f"Usage metric compaction complete: {summary}")
+    return summary
+
+
+# ── Archival ──────────────────────────────────────────────────────────────────
+
+def _row_dict(row) -> dict:
+    return {column.name: getattr(row, column.name) for column in row.__table__.columns}
+
+
+def archive_rows(db: Session, model, condition) -> dict:
+    """Move rows matching `condition` into compressed archive batches, oldest ids first.
+
+    Each batch is written and its rows deleted in one transaction, so an interrupted
+    run leaves every row either live or archived, never both.
+    """
+    summary = {"rows_archived": 0, "batches_created": 0}
+    while True:
+        rows = db.query(model).filter(condition).order_by(model.id).limit(ARCHIVE_BATCH_ROWS).all()
+        if not rows:
+            break
+        lines = "\n".join(json.dumps(_row_dict(row), default=str) for row in rows)
+        created = [row.created_at for row in rows if row.created_at is not None]
+        db.add(ArchiveBatch(
+            source_table=model.__tablename__,
+            row_count=len(rows),
+            first_id=rows[0].id,
+            last_id=rows[-1].id,
+            oldest_created_at=min(created, default=None),
+            newest_created_at=max(created, default=None),
+            payload=zlib.compress(lines.encode()),
+        ))
+        db.query(model).filter(model.id.in_([row.id for row in rows])).delete(synchronize_session=False)
+        db.commit()
+        summary["rows_archived"] += len(rows)
+        summary["batches_created"] += 1
+    return summary
+
+
+def read_archive_batch(batch: ArchiveBatch) -> List[dict]:
+    """Decode an archive batch back into one dict per archived row."""
+    return [json.loads(line) for line in zlib.decompress(batch.payload).decode().splitlines()]
+
+
+def archive_alerts(db: Session, now: Optional[datetime] = None) -> dict:
+    """Archive resolved alerts after RESOLVED_ALERT_RETENTION_DAYS and any alert after ALERT_RETENTION_DAYS."""
+    now = now or datetime.now()
+    summary = archive_rows(db, Alert, or_(
+        and_(Alert.resolved.is_(True), Alert.created_at < now - timedelta(days=RESOLVED_ALERT_RETENTION_DAYS)),
+        Alert.created_at < now - timedelta(days=ALERT_RETENTION_DAYS),
+    ))
+    logger.info(f"Alert archival complete: {summary}")
+    return summary
+
+
+def archive_activity_events(db: Session, now: Optional[datetime] = None) -> dict:
+    """Archive activity events older than ACTIVITY_RETENTION_DAYS."""
+    now = now or datetime.now()
+    summary = archive_rows(
+        db, ActivityEvent, ActivityEvent.created_at < now - timedelta(days=ACTIVITY_RETENTION_DAYS)
+    )
+    logger.info(f"Activity event archival complete: {summary}")
+    return summary
+
+
+def prune_user_sketches(db: Session, today: Optional[date] = None) -> dict:
+    """Drop daily user sketches that no longer fall inside any MAU window."""
+    from usage_events import MAU_DAYS
+
+    today = today or datetime.now().date()
+    deleted = (
+        db.query(UserSketch)
+        .filter(UserSketch.date < today - timedelta(days=MAU_DAYS))
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return {"sketches_deleted": deleted}
+
+
+# ── Query layer ───────────────────────────────────────────────────────────────
+
+def choose_resolution(start: date, end: date, today: Optional[date] = None) -> str:
+    """Pick the finest resolution that both suits the span and still exists for `start`."""
+    today = today or datetime.now().date()
+    span = (end - start).days
+    if span > AUTO_WEEKLY_MAX_SPAN_DAYS or start < today - timedelta(days=WEEKLY_RETENTION_DAYS):
+        return "month"
+    if span > AUTO_DAILY_MAX_SPAN_DAYS or start < today - timedelta(days=DAILY_RETENTION_DAYS):
+        return "week"
+    return "day"
+
+
+def _point(period: date, bucket: dict) -> dict:
+    point = {"period_start": period, "days": bucket["days"]}
+    for signal in ROLLUP_SIGNALS:
+        point[f"{signal}_sum"] = bucket[f"{signal}_sum"]
+        point[f"{signal}_max"] = bucket[f"{signal}_max"]
+    point.update(_means(bucket))
+    return point
+
+
+async def load_usage_history(
+    db: AsyncSession,
+    account_id: int,
+    start: date,
+    end: date,
+    resolution: str = "auto",
+) -> Tuple[str, List[dict]]:
+    """Return usage points for [start, end] at the requested resolution.
+
+    "auto" picks a resolution from the span. Coarse resolutions combine the stored
+    rollups with daily rows that have not been compacted yet, so a period that
+    straddles the retention cutoff is reported once with its full totals.
+    """
+    if resolution == "auto":
+        resolution = choose_resolution(start, end)
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"resolution must be one of auto, {', '.join(RESOLUTIONS)}")
+
+    period_of = _PERIOD_START[resolution]
+    buckets: Dict[date, dict] = {}
+
+    daily_rows = await db.scalars(
+        select(UsageMetric)
+        .where(
+            UsageMetric.account_id == account_id,
+            UsageMetric.date >= period_of(start),
+            UsageMetric.date <= end,
+        )
+        .order_by(UsageMetric.date)
+    )
+    for row in daily_rows:
+        _fold_daily(buckets.setdefault(period_of(row.date), _empty_bucket()), _daily_values(row))
+
+    if resolution in _ROLLUP_MODELS:
+        model = _ROLLUP_MODELS[resolution]
+        rollups = await db.scalars(
+            select(model)
+            .where(
+                model.account_id == account_id,
+                model.period_start >= period_of(start),
+                model.period_start <= end,
+            )
+        )
+        for rollup in rollups:
+            _fold_rollup(buckets.setdefault(period_of(rollup.period_start), _empty_bucket()), rollup)
+
+    return resolution, [_point(period, buckets[period]) for period in sorted(buckets)]
+
+
+# ── Job entry point ───────────────────────────────────────────────────────────
+
+def _no_progress(**fields):
+    pass
+
+
+def run_retention(db: Session, progress=_no_progress) -> dict:
+    """Apply every retention policy and return a summary per table."""
+    from cache import bump_data_version
+    from metric_store import invalidate_metric_store
+
+    progress(phase="usage_metrics")
+    summary = {"usage_metrics": compact_usage_metrics(db)}
+    invalidate_metric_store()
+    progress(phase="alerts")
+    summary["alerts"] = archive_alerts(db)
+    progress(phase="activity_events")
+    summary["activity_events"] = archive_activity_events(db)
+    progress(phase="user_sketches")
+    summary["user_sketches"] = prune_user_sketches(db)
+    bump_data_version()
+    progress(phase="complete")
+    return summary
@@ -1,33 +1,250 @@
+import json
 import logging
-from datetime import datetime, timedelta
+import statistics
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional, Set, Tuple
 from apscheduler.schedulers.background import BackgroundScheduler
 from sqlalchemy.orm import Session
 
+import clock
+from telemetry import PhaseTimer, track_queries
+
 logger = logging.getLogger(__name__)
 
+SCAN_INTERVAL_HOURS = 6
+RESCORE_INTERVAL_SECONDS = 60
+
+# Accounts whose usage metrics changed since they were last scored. Drained by
+# rescore jobs; a full scan clears it because it rescores every account.
+_pending_lock = threading.Lock()
+_pending_rescore: Set[int] = set()
+
+
+def _no_progress(**fields):
+    pass
+
+
+def mark_for_rescore(account_ids: Iterable[int]):
+    with _pending_lock:
+        _pending_rescore.update(account_ids)
+
+
+def has_pending_rescore() -> bool:
+    with _pending_lock:
+        return bool(_pending_rescore)
+
+
+def _take_pending_rescore() -> Set[int]:
+    with _pending_lock:
+        account_ids = set(_pending_rescore)
+        _pending_rescore.clear()
+        return account_ids
+
+
+def _company_weights(company) -> Dict[str, float]:
+    return {
+        "engagement": company.weight_engagement,
+        "adoption": company.weight_adoption,
+        "health": company.weight_health,
+        "support": company.weight_support,
+    }
+
+
+def _column_loader(db: Session):
+    """Return account_id -> per-signal sequences, from the metric store when enabled."""
+    from models import UsageMetric
+    from scoring import SCORING_SIGNALS
+    from metric_store import get_metric_store
+
+    store = get_metric_store()
+    if store is not None:
+        store.ensure_synced(db)
+        return store.account_columns
+
+    def load_columns(account_id):
+        rows = (
+            db.query(UsageMetric)
+            .filter(UsageMetric.account_id == account_id)
+            .order_by(UsageMetric.date)
+            .all()
+        )
+        return {signal: [getattr(m, signal) for m in rows] for signal in SCORING_SIGNALS}
+
+    return load_columns
+
+
+def _todays_scores(db: Session, today: date, account_ids: Optional[Set[int]] = None) -> Dict[int, object]:
+    """account_id -> today's HealthScore row, loaded in one query."""
+    from models import HealthScore
+
+    query = db.query(HealthScore).filter(HealthScore.date == today)
+    if account_ids is not None:
+        query = query.filter(HealthScore.account_id.in_(account_ids))
+    return {row.account_id: row for row in query}
+
+
+def _upsert_health_score(db: Session, existing, account_id: int, today: date, score: dict) -> Tuple[bool, bool]:
+    """Update `existing` (today's HealthScore row, or None to create it). Returns (created, changed)."""
+    from models import HealthScore
+
+    if existing:
+        changed = (existing.composite, existing.trend_delta) != (score["composite"], score["trend_delta"])
+        existing.composite = score["composite"]
+        existing.engagement_score = score["engagement_score"]
+        existing.adoption_score = score["adoption_score"]
+        existing.health_score = score["health_score"]
+        existing.support_score = score["support_score"]
+        existing.trend_delta = score["trend_delta"]
+        return False, changed
+
+    db.add(HealthScore(
+        account_id=account_id,
+        date=today,
+        composite=score["composite"],
+        engagement_score=score["engagement_score"],
+        adoption_score=score["adoption_score"],
+        health_score=score["health_score"],
+        support_score=score["support_score"],
+        trend_delta=score["trend_delta"],
+    ))
+    return True, True
+
+
+def rescore_accounts(db: Session, account_ids: Optional[Iterable[int]] = None, progress=_no_progress) -> dict:
+    """Recompute today's health scores for the given accounts, or for every account
+    marked by ingestion since the last scan. Anomaly detection waits for the next scan.
+    """
+    from models import Account, Company
+    from scoring import compute_health_score_columns
+    from cache import bump_data_version
+    from events import publish
+
+    account_ids = set(account_ids) if account_ids is not None else _take_pending_rescore()
+    summary = {"accounts_rescored": 0, "health_scores_created": 0, "health_scores_updated": 0}
+    company = db.query(Company).first()
+    if not account_ids or not company:
+        return summary
+
+    timer = PhaseTimer("rescore")
+    weights = _company_weights(company)
+    load_columns = _column_loader(db)
+    today = clock.today()
+    accounts = db.query(Account).filter(Account.id.in_(account_ids)).order_by(Account.id).all()
+    existing_scores = _todays_scores(db, today, account_ids)
+    progress(phase="scoring", accounts_done=0, accounts_total=len(accounts))
+    timer.lap("load")
+
+    changed_account_ids = []
+    for account in accounts:
+        columns = load_columns(account.id)
+        timer.lap("load")
+        score = compute_health_score_columns(columns, account.seats, weights)
+        timer.lap("score")
+        created, changed = _upsert_health_score(db, existing_scores.get(account.id), account.id, today, score)
+        summary["health_scores_created" if created else "health_scores_updated"] += 1
+        if changed:
+            changed_account_ids.append(account.id)
+        summary["accounts_rescored"] += 1
+        progress(accounts_done=summary["accounts_rescored"])
+        timer.lap("upsert")
+    db.commit()
+    bump_data_version()
+    if changed_account_ids:
+        publish("accounts_changed", {"account_ids": changed_account_ids, "reason": "score"})
+    timer.lap("commit")
+    timer.finish(summary["accounts_rescored"])
+    progress(phase="complete")
+    return summary
 
-def run_full_scan(db: Session):
-    """Run a full health scan on all accounts and return a summary."""
+
+# Summary counts copied onto the ScanRun row.
+SCAN_RUN_COUNTS = (
+    "accounts_scanned", "health_scores_created", "health_scores_updated", "anomalies_created",
+    "anomalies_skipped_recent", "alerts_created", "renewal_alerts_created", "outreach_auto_sent",
+    "llm_calls", "llm_errors", "db_queries",
+)
+
+
+def run_full_scan(db: Session, progress=_no_progress, trigger: str = "manual"):
+    """Run a full health scan on all accounts and return a summary.
+
+    `progress` is called with keyword updates (phase, accounts_done, accounts_total,
+    anomalies_created) as the scan advances. The summary includes the SQL statements
+    the scan ran and the time they took. Each run is recorded as a ScanRun, whose id
+    is returned as `scan_run_id`.
+    """
+    from models import ScanRun
+    from cache import bump_data_version
+
+    run = ScanRun(trigger=trigger, status="running", started_at=clock.now())
+    db.add(run)
+    db.commit()
+    started = time.perf_counter()
+    # The scan commits once per anomaly. Expiring every loaded account and score
+    # on each of those commits made the scan quadratic in the number of accounts.
+    expire_on_commit, db.expire_on_commit = db.expire_on_commit, False
+    # Entered outside the try so `queries` is bound when a failure is recorded.
+    with track_queries("full scan") as queries:
+        try:
+            summary = _run_full_scan(db, progress)
+        except Exception as e:
+            failed = {"db_queries": queries.count, "db_seconds": queries.seconds}
+            db.rollback()
+            try:
+                _finish_scan_run(db, run, started, failed, str(e))
+            except Exception as record_error:
+                logger.error(f"Could not record failed scan run {run.id}: {record_error}")
+            raise
+        finally:
+            db.expire_on_commit = expire_on_commit
+    summary["db_queries"] = queries.count
+    summary["db_seconds"] = round(queries.seconds, 3)
+    logger.info(
+        f"Full scan ran {queries.count} SQL queries "
+        f"({queries.count / max(summary['accounts_scanned'], 1):.1f} per account), "
+        f"{queries.seconds:.2f}s in the database"
+    )
+    _finish_scan_run(db, run, started, summary)
+    summary["scan_run_id"] = run.id
+    bump_data_version()
+    return summary
+
+
+def _finish_scan_run(db: Session, run, started: float, summary: dict, error: Optional[str] = None):
+    run.status = "failed" if error else "succeeded"
+    run.error = error
+    run.finished_at = clock.now()
+    run.duration_seconds = round(time.perf_counter() - started, 3)
+    for count in SCAN_RUN_COUNTS:
+        setattr(run, count, summary.get(count, 0))
+    run.db_seconds = round(summary.get("db_seconds", 0.0), 3)
+    run.phase_seconds_json = json.dumps(summary.get("phase_seconds", {}))
+    db.commit()
+
+
+def _run_full_scan(db: Session, progress):
     from models import (
         Account,
-        UsageMetric,
-        HealthScore,
         Anomaly,
         ActivityEvent,
         Alert,
         Company,
         RenewalNotificationSettings,
     )
-    from scoring import compute_health_score, get_state
-    from anomaly import detect_anomalies
-    try:
-        from ai_engine import generate_anomaly_explanation, generate_outreach_draft, executor_decide
-        ai_available = True
-    except Exception as e:
-        logger.warning(f"AI engine unavailable, using fallback text: {e}")
-        ai_available = False
+    from scoring import compute_health_score_columns
+    from anomaly import detect_anomalies_columns
+    from cache import bump_data_version
+    from events import publish
+
+    # Loaded when the first anomaly needs AI text, so scans without anomalies never
+    # import the SDK.
+    ai_engine = None
+    ai_available = True
 
     logger.info("Starting full scan...")
+    timer = PhaseTimer("scan")
     summary = {
         "accounts_scanned": 0,
         "health_scores_created": 0,
@@ -37,86 +254,61 @@ def run_full_scan(db: Session):
         "alerts_created": 0,
         "renewal_alerts_created": 0,
         "outreach_auto_sent": 0,
+        "llm_calls": 0,
+        "llm_errors": 0,
         "scan_completed_at": None,
     }
 
     company = db.query(Company).first()
     if not company:
         logger.warning("No company found, skipping scan")
-        summary["scan_completed_at"] = datetime.now().isoformat(timespec="seconds")
+        summary["scan_completed_at"] = clock.now().isoformat(timespec="seconds")
         return summary
 
-    weights = {
-        "engagement": company.weight_engagement,
-        "adoption": company.weight_adoption,
-        "health": company.weight_health,
-        "support": company.weight_support,
-    }
+    weights = _company_weights(company)
 
     accounts = db.query(Account).all()
-    today = datetime.now().date().isoformat()
+    today = clock.today()
+    existing_scores = _todays_scores(db, today)
+    progress(phase="scoring", accounts_done=0, accounts_total=len(accounts), anomalies_created=0)
+
+    with _pending_lock:
+        # Every account is rescored below, so ingestion marks are satisfied.
+        _pending_rescore.clear()
+    load_columns = _column_loader(db)
+    timer.lap("load")
 
     # Compute and upsert health scores
     account_scores = {}
+    changed_account_ids = []
     for account in accounts:
         summary["accounts_scanned"] += 1
-        raw_metrics = (
-            db.query(UsageMetric)
-            .filter(UsageMetric.account_id == account.id)
-            .order_by(UsageMetric.date)
-            .all()
-        )
-        metrics_dicts = [
-            {
-                "dau": m.dau,
-                "wau": m.wau,
-                "mau": m.mau,
-                "active_seats": m.active_seats,
-                "feature_count": m.feature_count,
-                "api_calls": m.api_calls,
-                "support_tickets": m.support_tickets,
-                "logins": m.logins,
-            }
-            for m in raw_metrics
-        ]
-
-        score = compute_health_score(metrics_dicts, account.seats, weights)
+        columns = load_columns(account.id)
+        timer.lap("load")
+
+        score = compute_health_score_columns(columns, account.seats, weights)
+        timer.lap("score")
         account_scores[account.id] = {
             "score": score,
-            "metrics": metrics_dicts,
+            "columns": columns,
             "account": account,
         }
 
-        # Upsert health score
-        existing = (
-            db.query(HealthScore)
-            .filter(HealthScore.account_id == account.id, HealthScore.date == today)
-            .first()
-        )
-        if existing:
-            summary["health_scores_updated"] += 1
-            existing.composite = score["composite"]
-            existing.engagement_score = score["engagement_score"]
-            existing.adoption_score = score["adoption_score"]
-            existing.health_score = score["health_score"]
-            existing.support_score = score["support_score"]
-            existing.trend_delta = score["trend_delta"]
-        else:
-            summary["health_scores_created"] += 1
-            hs = HealthScore(
-                account_id=account.id,
-                date=today,
-                composite=score["composite"],
-                engagement_score=score["engagement_score"],
-                adoption_score=score["adoption_score"],
-                health_score=score["health_score"],
-                support_score=score["support_score"],
-                trend_delta=score["trend_delta"],
-            )
-            db.add(hs)
+        created, changed = _upsert_health_score(db, existing_scores.get(account.id), account.id, today, score)
+        summary["health_scores_created" if created else "health_scores_updated"] += 1
+        if changed:
+            changed_account_ids.append(account.id)
+        progress(accounts_done=summary["accounts_scanned"])
+        timer.lap("upsert")
     db.commit()
+    bump_data_version()
+    if changed_account_ids:
+        publish("accounts_changed", {"account_ids": changed_account_ids, "reason": "score"})
+    timer.lap("commit")
+    progress(phase="renewal_alerts")
 
     peer_scores = [d["score"]["composite"] for d in account_scores.values()]
+    peer_mean = statistics.mean(peer_scores) if peer_scores else None
     renewal_settings = db.query(RenewalNotificationSettings).first()
     notification_enabled = bool(renewal_settings and renewal_settings.enabled)
     lead_times = set()
@@ -130,18 +322,20 @@ def run_full_scan(db: Session):
         if renewal_settings.notify_7_days:
             lead_times.add(7)
 
-    for account in accounts:
-        if not notification_enabled or not lead_times or not account.renewal_date:
-            continue
-
-        try:
-            renewal_date = datetime.fromisoformat(account.renewal_date).date()
-        except ValueError:
-            continue
+    renewal_candidates = []
+    if notification_enabled and lead_times:
+        reminder_dates = [today + timedelta(days=days) for days in sorted(lead_times)]
+        renewal_candidates = (
+            db.query(Account)
+            .filter(Account.renewal_date.in_(reminder_dates))
+            .order_by(Account.id)
+            .all()
+        )
 
-        days_until_renewal = (renewal_date - datetime.now().date()).days
-        if days_until_renewal < 0 or days_until_renewal not in lead_times:
-            continue
+    new_alerts = []
+    for account in renewal_candidates:
+        renewal_date = account.renewal_date
+        days_until_renewal = (renewal_date - today).days
 
         existing_renewal_alert = (
             db.query(Alert)
@@ -155,7 +349,7 @@ def run_full_scan(db: Session):
         if existing_renewal_alert:
             continue
 
-        db.add(Alert(
+        new_alerts.append(Alert(
             account_id=account.id,
             alert_type="renewal_reminder",
             message=(
@@ -163,45 +357,49 @@ def run_full_scan(db: Session):
                 f"({renewal_date.isoformat()})."
             ),
             severity="medium" if days_until_renewal > 14 else "high",
+            **clock.stamp("created_at"),
         ))
         summary["renewal_alerts_created"] += 1
 
+    db.add_all(new_alerts)
+    timer.lap("renewal_alerts")
     db.commit()
-
-    # Detect anomalies and generate AI content
-    for account in accounts:
+    bump_data_version()
+    if new_alerts:
+        publish("alerts_created", {"alerts": [_alert_event(a) for a in new_alerts]})
+    timer.lap("commit")
+
+    # Detect anomalies and generate AI content. Accounts with an anomaly in the
+    # last 12 hours are skipped; anomalies created below are for accounts
+    # already passed, so one lookup up front covers the whole loop.
+    progress(phase="anomalies", accounts_done=0)
+    recently_flagged = {
+        account_id
+        for (account_id,) in db.query(Anomaly.account_id)
+        .filter(Anomaly.detected_at >= clock.now() - timedelta(hours=12))
+        .distinct()
+    }
+    for index, account in enumerate(accounts, start=1):
+        progress(accounts_done=index - 1, anomalies_created=summary["anomalies_created"])
         data = account_scores[account.id]
         score = data["score"]
-        metrics = data["metrics"]
+        columns = data["columns"]
 
-        # Skip if anomaly already detected in last 12 hours
-        existing_anomaly = (
-            db.query(Anomaly)
-            .filter(
-                Anomaly.account_id == account.id,
-                Anomaly.detected_at >= datetime.now() - timedelta(hours=12),
-            )
-            .first()
-        )
-        if existing_anomaly:
+        if account.id in recently_flagged:
             summary["anomalies_skipped_recent"] += 1
             continue
 
-        account_data = {
-            "composite": score["composite"],
-            "seats": account.seats,
-            "metrics": metrics,
-        }
-        anomaly_info = detect_anomalies(account_data, peer_scores)
+        anomaly_info = detect_anomalies_columns(columns, score["composite"], account.seats, peer_mean)
 
         if not anomaly_info:
             continue
 
-        recent_metrics = metrics[-30:] if len(metrics) >= 30 else metrics
-        avg_dau = sum(m["dau"] for m in recent_metrics) / max(len(recent_metrics), 1)
-        avg_api = sum(m["api_calls"] for m in recent_metrics) / max(len(recent_metrics), 1)
-        avg_active = sum(m["active_seats"] for m in recent_metrics) / max(len(recent_metrics), 1)
-        avg_features = sum(m["feature_count"] for m in recent_metrics) / max(len(recent_metrics), 1)
+        recent = {signal: values[-30:] for signal, values in columns.items()}
+        recent_count = max(len(recent["dau"]), 1)
+        avg_dau = sum(recent["dau"]) / recent_count
+        avg_api = sum(recent["api_calls"]) / recent_count
+        avg_active = sum(recent["active_seats"]) / recent_count
+        avg_features = sum(recent["feature_count"]) / recent_count
 
         metrics_summary = {
             "avg_dau": avg_dau,
@@ -213,16 +411,21 @@ def run_full_scan(db: Session):
 
         renewal_days = None
         if account.renewal_date:
-            renewal_date = datetime.fromisoformat(account.renewal_date).date()
-            renewal_days = (renewal_date - datetime.now().date()).days
+            renewal_days = (account.renewal_date - today).days
+        # Skipped and anomaly-free accounts are charged to detection at the next lap.
+        timer.lap("detection")
+        if ai_available and ai_engine is None:
+            ai_engine = _load_ai_engine()
+            ai_available = ai_engine is not None
 
         explanation = (
             f"Anomaly detected: {anomaly_info['pattern']} pattern "
             f"with {anomaly_info['severity']} severity."
         )
         if ai_available:
+            summary["llm_calls"] += 1
             try:
-                explanation = generate_anomaly_explanation(
+                explanation = ai_engine.generate_anomaly_explanation(
                     account.name,
                     anomaly_info["pattern"],
                     anomaly_info["severity"],
@@ -231,6 +434,7 @@ def run_full_scan(db: Session):
                     anomaly_info.get("delta_from_peer"),
                 )
             except Exception as e:
+                summary["llm_errors"] += 1
                 logger.error(f"Explanation generation failed for {account.name}: {e}")
 
         outreach_draft = (
@@ -238,8 +442,9 @@ def run_full_scan(db: Session):
             f"Hi team, I wanted to reach out to see how things are going."
         )
         if ai_available:
+            summary["llm_calls"] += 1
             try:
-                outreach_draft = generate_outreach_draft(
+                outreach_draft = ai_engine.generate_outreach_draft(
                     account.name,
                     anomaly_info["pattern"],
                     anomaly_info["severity"],
@@ -248,12 +453,14 @@ def run_full_scan(db: Session):
                     renewal_days,
                 )
             except Exception as e:
+                summary["llm_errors"] += 1
                 logger.error(f"Outreach generation failed for {account.name}: {e}")
 
         outreach_status = "pending"
         if company.autonomy_mode == "executor" and ai_available:
+            summary["llm_calls"] += 1
             try:
-                decision = executor_decide(
+                decision = ai_engine.executor_decide(
                     account.name,
                     anomaly_info["pattern"],
                     anomaly_info["severity"],
@@ -263,7 +470,9 @@ def run_full_scan(db: Session):
                 if decision.get("action") == "send":
                     outreach_status = "sent"
             except Exception as e:
+                summary["llm_errors"] += 1
                 logger.error(f"Executor decision failed for {account.name}: {e}")
+        timer.lap("ai_generation")
 
         anomaly = Anomaly(
             account_id=account.id,
@@ -274,6 +483,7 @@ def run_full_scan(db: Session):
             outreach_status=outreach_status,
             z_score=anomaly_info.get("z_score"),
             delta_from_peer=anomaly_info.get("delta_from_peer"),
+            **clock.stamp("detected_at"),
         )
         db.add(anomaly)
         summary["anomalies_created"] += 1
@@ -285,6 +495,7 @@ def run_full_scan(db: Session):
                 f"Anomaly detected: {anomaly_info['pattern']} "
                 f"({anomaly_info['severity']} severity)"
             ),
+            **clock.stamp("created_at"),
         ))
 
         if outreach_status == "sent":
@@ -293,11 +504,13 @@ def run_full_scan(db: Session):
                 account_id=account.id,
                 event_type="outreach_sent",
                 description="Auto-sent outreach email (executor mode)",
+                **clock.stamp("created_at"),
             ))
 
+        anomaly_alert = None
         if anomaly_info["severity"] in ["critical", "high"]:
             summary["alerts_created"] += 1
-            db.add(Alert(
+            anomaly_alert = Alert(
                 account_id=account.id,
                 alert_type="anomaly",
                 message=(
@@ -305,30 +518,93 @@ def run_full_scan(db: Session):
                     f"Score: {score['composite']}"
                 ),
                 severity=anomaly_info["severity"],
-            ))
+                **clock.stamp("created_at"),
+            )
+            db.add(anomaly_alert)
 
         db.commit()
+        bump_data_version()
+        publish("accounts_changed", {"account_ids": [account.id], "reason": "anomaly"})
+        if anomaly_alert is not None:
+            publish("alerts_created", {"alerts": [_alert_event(anomaly_alert)]})
         logger.info(f"Processed anomaly for {account.name}: {anomaly_info['pattern']}")
+        timer.lap("commit")
 
+    timer.lap("detection")
+    phase_seconds = timer.finish(summary["accounts_scanned"])
+    summary["phase_seconds"] = {phase: round(seconds, 3) for phase, seconds in phase_seconds.items()}
+    progress(phase="complete", accounts_done=len(accounts), anomalies_created=summary["anomalies_created"])
     logger.info("Full scan complete.")
-    summary["scan_completed_at"] = datetime.now().isoformat(timespec="seconds")
+    summary["scan_completed_at"] = clock.now().isoformat(timespec="seconds")
     return summary
 
 
+def _load_ai_engine():
+    """ai_engine with its client built, or None when the SDK cannot be used."""
+    try:
+        import ai_engine
+
+        ai_engine.get_client()
+        return ai_engine
+    except Exception as e:
+        logger.warning(f"AI engine unavailable, using fallback text: {e}")
+        return None
+
+
+def _alert_event(alert) -> dict:
+    return {
+        "id": alert.id,
+        "account_id": alert.account_id,
+        "alert_type": alert.alert_type,
+        "severity": alert.severity,
+        "message": alert.message,
+    }
+
+
 def start_scheduler(db_factory):
-    """Start the APScheduler with a 6-hour scan cycle."""
+    """Start the APScheduler with a 6-hour scan cycle, usage event flushes, a per-minute
+    rescore of accounts marked by ingestion, and a daily retention pass."""
+    from jobs import JobConflict, submit_rescore, submit_retention, submit_scan
+    from usage_events import EVENT_FLUSH_INTERVAL_SECONDS, flush_buffer
+
     scheduler = BackgroundScheduler()
 
     def scan_job():
-        db = db_factory()
         try:
-            run_full_scan(db)
+            job, created = submit_scan(db_factory, trigger="scheduled")
+        except JobConflict as e:
+            logger.info(f"Scheduled scan skipped: {e}")
+            return
+        if not created:
+            logger.info(f"Scheduled scan skipped, scan job {job['id']} is already {job['status']}")
+
+    def rescore_job():
+        if not has_pending_rescore():
+            return
+        try:
+            submit_rescore(db_factory, trigger="scheduled")
+        except JobConflict:
+            # Another job holds the worker; marks stay queued for the next tick.
+            pass
+
+    def flush_usage_events():
+        # Runs on the scheduler's own thread rather than the job worker so a long
+        # scan never holds back event flushes (and with them, ingestion).
+        try:
+            flush_buffer()
         except Exception as e:
-            logger.error(f"Scheduled scan failed: {e}")
-        finally:
-            db.close()
+            logger.error(f"Usage event flush failed: {e}")
 
-    scheduler.add_job(scan_job, "interval", hours=6, id="full_scan")
+    def retention_job():
+        try:
+            submit_retention(db_factory, trigger="scheduled")
+        except JobConflict as e:
+            logger.info(f"Scheduled retention skipped: {e}")
+
+    scheduler.add_job(scan_job, "interval", hours=SCAN_INTERVAL_HOURS, id="full_scan")
+    scheduler.add_job(rescore_job, "interval", seconds=RESCORE_INTERVAL_SECONDS, id="rescore")
+    scheduler.add_job(flush_usage_events, "interval", seconds=EVENT_FLUSH_INTERVAL_SECONDS, id="usage_event_flush")
+    scheduler.add_job(retention_job, "cron", hour=3, id="retention")
     scheduler.start()
-    logger.info("Scheduler started (6-hour interval)")
+    logger.info(f"Scheduler started ({SCAN_INTERVAL_HOURS}-hour scan interval, daily retention at 03:00)")
     return scheduler
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional, List
-from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
+from datetime import date, datetime
 
 
 class CompanyOut(BaseModel):
@@ -53,7 +53,7 @@ class AccountListItem(BaseModel):
     tier: str
     seats: int
     mrr: float
-    renewal_date: Optional[str]
+    renewal_date: Optional[date]
     composite: float
     trend_delta: float
     state: str
@@ -64,7 +64,7 @@ class AccountListItem(BaseModel):
 
 
 class MetricPoint(BaseModel):
-    date: str
+    date: date
     dau: float
     wau: float
     mau: float
@@ -124,7 +124,7 @@ class AccountDetail(BaseModel):
     tier: str
     seats: int
     mrr: float
-    renewal_date: Optional[str]
+    renewal_date: Optional[date]
     csm_name: Optional[str]
     composite: float
     engagement_score: float
@@ -150,7 +150,7 @@ class StatsOut(BaseModel):
     avg_health: float
     total_mrr: float
     pending_approvals: int
-    last_scan: Optional[str]
+    last_scan: Optional[date]
 
 
 class RevenueForecastPointOut(BaseModel):
@@ -185,3 +185,127 @@ class RenewalNotificationSettingsOut(BaseModel):
 class RenewalNotificationSettingsUpdate(BaseModel):
     enabled: Optional[bool] = None
     lead_times_days: Optional[List[int]] = None
+
+
+class DashboardOut(BaseModel):
+    company: Optional[CompanyOut]
+    stats: StatsOut
+    accounts: List[AccountListItem]
+    alerts: List[AlertOut]
+    revenue_forecast: RevenueForecastOut
+
+
+class JobOut(BaseModel):
+    id: str
+    kind: str
+    trigger: str
+    status: str  # queued, running, succeeded, failed
+    progress: Dict[str, Any]
+    summary: Optional[Dict[str, Any]]
+    error: Optional[str]
+    next_job_id: Optional[str] = None
+    created_at: str
+    started_at: Optional[str]
+    finished_at: Optional[str]
+
+
+class ScanRunOut(BaseModel):
+    id: int
+    trigger: str
+    status: str  # running, succeeded, failed
+    started_at: datetime
+    finished_at: Optional[datetime]
+    duration_seconds: Optional[float]
+    phase_seconds: Dict[str, float]
+    accounts_scanned: int
+    health_scores_created: int
+    health_scores_updated: int
+    anomalies_created: int
+    anomalies_skipped_recent: int
+    alerts_created: int
+    renewal_alerts_created: int
+    outreach_auto_sent: int
+    llm_calls: int
+    llm_errors: int
+    db_queries: int
+    db_seconds: float
+    error: Optional[str]
+
+
+class ScanPhaseChangeOut(BaseModel):
+    base_seconds: float
+    target_seconds: float
+    change_seconds: float
+    ratio: Optional[float]  # target / base; None when the base phase took no time
+
+
+class ScanRunCompareOut(BaseModel):
+    base: ScanRunOut
+    target: ScanRunOut
+    duration_change_seconds: Optional[float]
+    phases: Dict[str, ScanPhaseChangeOut]
+    counts: Dict[str, int]  # target minus base
+
+
+class ProfileOut(BaseModel):
+    id: str
+    kind: str  # scan or request
+    mode: str  # sample (collapsed stacks) or cprofile (pstats)
+    created_at: str
+    bytes: int
+
+
+class UsageHistoryOut(BaseModel):
+    account_id: int
+    resolution: str  # day, week, month
+    start: date
+    end: date
+    # Each point has period_start, days, and <signal>_sum/_mean/_max per usage signal.
+    points: List[Dict[str, Any]]
+
+
+class MetricRowIn(BaseModel):
+    account_id: int
+    date: date
+    dau: float = 0.0
+    wau: float = 0.0
+    mau: float = 0.0
+    active_seats: int = 0
+    feature_count: int = 0
+    api_calls: int = 0
+    support_tickets: int = 0
+    nps_score: Optional[float] = None
+    logins: int = 0
+
+
+class IngestErrorOut(BaseModel):
+    line: int
+    error: str
+
+
+class MetricBatchOut(BaseModel):
+    rows_received: int
+    rows_written: int  # inserted or replaced; duplicates within a batch count once
+    rows_rejected: int
+    accounts_touched: int
+    errors: List[IngestErrorOut]  # first MAX_REPORTED_ERRORS rejections
+    rescore_job_id: Optional[str] = None
+
+
+class UsageEventIn(BaseModel):
+    account_id: int
+    type: Literal["login", "api_call", "feature_used", "support_ticket", "nps"]
+    user_id: Optional[str] = None
+    feature: Optional[str] = None  # feature_used events
+    count: int = Field(1, ge=1)  # login, api_call and support_ticket events
+    score: Optional[float] = None  # nps events
+    timestamp: Optional[datetime] = None  # defaults to when the event is received
+
+
+class UsageEventBatchOut(BaseModel):
+    events_received: int
+    events_accepted: int
+    events_rejected: int
+    errors: List[IngestErrorOut]
+    buffered_events: int
+    resend_from_line: Optional[int] = None
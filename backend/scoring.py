@@ -1,5 +1,16 @@
 import statistics
-from typing import List, Dict
+from typing import List, Dict, Sequence
+
+# Usage signals read by scoring and anomaly detection.
+SCORING_SIGNALS = (
+    "dau", "wau", "mau", "active_seats", "feature_count",
+    "api_calls", "support_tickets", "logins",
+)
+
+
+def metrics_to_columns(metrics: List[Dict]) -> Dict[str, List[float]]:
+    """Turn a date-ordered list of metric dicts into one sequence per signal."""
+    return {signal: [m.get(signal, 0) for m in metrics] for signal in SCORING_SIGNALS}
 
 
 def compute_health_score(
@@ -8,7 +19,18 @@ def compute_health_score(
     weights: Dict[str, float],
     compute_trend: bool = True
 ) -> Dict:
-    if not metrics:
+    return compute_health_score_columns(metrics_to_columns(metrics), seats, weights, compute_trend)
+
+
+def compute_health_score_columns(
+    columns: Dict[str, Sequence[float]],
+    seats: int,
+    weights: Dict[str, float],
+    compute_trend: bool = True
+) -> Dict:
+    """Score date-ordered per-signal sequences (lists or zero-copy array slices)."""
+    count = len(columns["dau"])
+    if not count:
         return {
             "composite": 0.0,
             "engagement_score": 0.0,
@@ -18,42 +40,35 @@ def compute_health_score(
             "trend_delta": 0.0
         }
 
-    recent = metrics[-30:] if len(metrics) >= 30 else metrics
+    recent = {signal: values[-30:] for signal, values in columns.items()}
 
     def engagement_score() -> float:
         scores = []
-        for m in recent:
-            dau = m.get("dau", 0)
-            mau = max(m.get("mau", 1), 1)
-            ratio = min(dau / mau, 1.0)
-            logins = min(m.get("logins", 0) / 10.0, 1.0)
+        for dau, mau, logins in zip(recent["dau"], recent["mau"], recent["logins"]):
+            ratio = min(dau / max(mau, 1), 1.0)
+            logins = min(logins / 10.0, 1.0)
             scores.append((ratio * 0.6 + logins * 0.4) * 100)
         return statistics.mean(scores) if scores else 0.0
 
     def adoption_score() -> float:
         scores = []
-        for m in recent:
-            features = m.get("feature_count", 0)
+        for features, active in zip(recent["feature_count"], recent["active_seats"]):
             feature_ratio = min(features / 10.0, 1.0)
-            active = m.get("active_seats", 0)
             seat_ratio = min(active / max(seats, 1), 1.0)
             scores.append((feature_ratio * 0.5 + seat_ratio * 0.5) * 100)
         return statistics.mean(scores) if scores else 0.0
 
     def health_score_fn() -> float:
         scores = []
-        for m in recent:
-            api = min(m.get("api_calls", 0) / 1000.0, 1.0)
-            wau = m.get("wau", 0)
-            mau = max(m.get("mau", 1), 1)
-            wau_ratio = min(wau / mau, 1.0)
+        for api_calls, wau, mau in zip(recent["api_calls"], recent["wau"], recent["mau"]):
+            api = min(api_calls / 1000.0, 1.0)
+            wau_ratio = min(wau / max(mau, 1), 1.0)
             scores.append((api * 0.4 + wau_ratio * 0.6) * 100)
         return statistics.mean(scores) if scores else 0.0
 
     def support_score() -> float:
         scores = []
-        for m in recent:
-            tickets = m.get("support_tickets", 0)
+        for tickets in recent["support_tickets"]:
             score = max(0.0, 100.0 - (tickets * 20.0))
             scores.append(score)
         return statistics.mean(scores) if scores else 100.0
@@ -79,11 +94,11 @@ def compute_health_score(
     ) / total_weight
 
     trend_delta = 0.0
-    if compute_trend and len(metrics) >= 14:
-        recent_7 = metrics[-7:]
-        prior_7 = metrics[-14:-7]
-        recent_score = compute_health_score(recent_7, seats, weights, compute_trend=False)["composite"]
-        prior_score = compute_health_score(prior_7, seats, weights, compute_trend=False)["composite"]
+    if compute_trend and count >= 14:
+        recent_7 = {signal: values[-7:] for signal, values in columns.items()}
+        prior_7 = {signal: values[-14:-7] for signal, values in columns.items()}
+        recent_score = compute_health_score_columns(recent_7, seats, weights, compute_trend=False)["composite"]
+        prior_score = compute_health_score_columns(prior_7, seats, weights, compute_trend=False)["composite"]
         trend_delta = recent_score - prior_score
 
     return {
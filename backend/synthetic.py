@@ -0,0 +1,468 @@
+"""Synthetic accounts and daily usage metrics at load-test scale.
+
+The usage patterns (sudden_drop, cliff_fall, abandoned, upsell and the rest)
+are defined here once; `seed_data` draws the 30 demo accounts from them too.
+This module reuses the demo accounts as templates and generates any number of
+accounts over any number of days:
+
+    python synthetic.py --accounts 100000 --days 365
+
+Each metric column is drawn for all of an account's days at once, and every
+account has its own RNG derived from the seed and its index, so a dataset is
+reproducible and the first N accounts are identical at every size. Accounts and
+metrics are written with core bulk inserts, one transaction per chunk.
+"""
+import logging
+import math
+import random
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEED = 42
+CHUNK_ROWS = 50000
+# Pattern phases (drop days, decays) are defined over the demo's 90 days and
+# stretched to the generated number of days.
+PATTERN_DAYS = 90
+
+METRIC_COLUMNS = (
+    "dau", "wau", "mau", "active_seats", "feature_count",
+    "api_calls", "support_tickets", "logins", "nps_score",
+)
+
+
+class _Draw:
+    """Column-at-a-time draws for one account segment of `n` days."""
+
+    def __init__(self, rng: random.Random, n: int):
+        self.rng = rng
+        self.n = n
+
+    def uniform(self, lo: float, hi: float) -> List[float]:
+        rand, span = self.rng.random, hi - lo
+        return [lo + span * rand() for _ in range(self.n)]
+
+    def randint(self, lo: int, hi: int) -> List[int]:
+        rand, span = self.rng.random, hi - lo + 1
+        return [lo + int(span * rand()) for _ in range(self.n)]
+
+    def choices(self, values: Sequence, weights: Sequence) -> list:
+        return self.rng.choices(values, weights, k=self.n)
+
+
+def _scale(values: Sequence[float], by) -> List[float]:
+    """Multiply element-wise by a sequence or a constant."""
+    if isinstance(by, (int, float)):
+        return [v * by for v in values]
+    return [v * f for v, f in zip(values, by)]
+
+
+def _floor_int(values: Sequence[float], minimum: int) -> List[int]:
+    return [max(minimum, int(v)) for v in values]
+
+
+def _positions(days: int) -> List[float]:
+    """Each generated day's position on the 90-day pattern timeline."""
+    return [d * PATTERN_DAYS / days for d in range(days)]
+
+
+def _split(days: int, pattern_day: float) -> int:
+    """Index of the first generated day at or after `pattern_day`."""
+    return min(days, math.ceil(pattern_day * days / PATTERN_DAYS))
+
+
+def _join(*segments: Dict[str, list]) -> Dict[str, list]:
+    return {column: [v for segment in segments for v in segment[column]] for column in METRIC_COLUMNS}
+
+
+def _sudden_drop(rng, days, seats, config):
+    drop_day = config.get("drop_day", 62)
+    k = _split(days, drop_day)
+    d = _Draw(rng, k)
+    before = {
+        "dau": _scale(d.uniform(0.6, 0.8), seats),
+        "wau": _scale(d.uniform(0.8, 0.95), seats),
+        "mau": _scale(d.uniform(0.9, 1.0), seats),
+        "active_seats": _floor_int(_scale(d.uniform(0.7, 0.9), seats), 1),
+        "feature_count": d.randint(5, 8),
+        "api_calls": d.randint(400, 700),
+        "support_tickets": d.randint(0, 1),
+        "logins": d.randint(15, 25),
+        "nps_score": d.uniform(7, 9),
+    }
+    d = _Draw(rng, days - k)
+    factor = [max(0.05, 1.0 - (p - drop_day) / max(PATTERN_DAYS - drop_day, 1) * 0.95) for p in _positions(days)[k:]]
+    after = {
+        "dau": _scale(_scale(d.uniform(0.05, 0.15), seats), factor),
+        "wau": _scale(_scale(d.uniform(0.1, 0.2), seats), factor),
+        "mau": _scale(_scale(d.uniform(0.2, 0.35), seats), factor),
+        "active_seats": _floor_int(_scale(d.uniform(0.05, 0.15), seats), 0),
+        "feature_count": d.randint(1, 3),
+        "api_calls": d.randint(20, 80),
+        "support_tickets": d.randint(2, 5),
+        "logins": d.randint(1, 4),
+        "nps_score": d.uniform(2, 5),
+    }
+    return _join(before, after)
+
+
+def _cliff_fall(rng, days, seats, config):
+    k = _split(days, config.get("drop_day", 76))
+    d = _Draw(rng, k)
+    before = {
+        "dau": _scale(d.uniform(0.5, 0.7), seats),
+        "wau": _scale(d.uniform(0.7, 0.85), seats),
+        "mau": _scale(d.uniform(0.8, 0.95), seats),
+        "active_seats": _floor_int(_scale(d.uniform(0.55, 0.75), seats), 1),
+        "feature_count": d.randint(4, 7),
+        "api_calls": d.randint(600, 1200),
+        "support_tickets": d.randint(0, 2),
+        "logins": d.randint(20, 40),
+        "nps_score": d.uniform(6, 8),
+    }
+    d = _Draw(rng, days - k)
+    after = {
+        "dau": _scale(d.uniform(0.03, 0.08), seats),
+        "wau": _scale(d.uniform(0.05, 0.12), seats),
+        "mau": _scale(d.uniform(0.1, 0.2), seats),
+        "active_seats": _floor_int(_scale(d.uniform(0.03, 0.1), seats), 0),
+        "feature_count": d.randint(1, 2),
+        "api_calls": d.randint(10, 50),
+        "support_tickets": d.randint(3, 7),
+        "logins": d.randint(0, 3),
+        "nps_score": d.uniform(1, 4),
+    }
+    return _join(before, after)
+
+
+def _abandoned(rng, days, seats, config):
+    d = _Draw(rng, days)
+    return {
+        "dau": d.uniform(0.01, 0.06),
+        "wau": d.uniform(0.03, 0.10),
+        "mau": d.uniform(0.05, 0.20),
+        "active_seats": d.choices([0, 1], [70, 30]),
+        "feature_count": d.choices([0, 1], [60, 40]),
+        "api_calls": d.randint(0, 15),
+        "support_tickets": d.randint(3, 7),
+        "logins": d.choices([0, 1], [50, 50]),
+        "nps_score": d.uniform(1, 3),
+    }
+
+
+def _slow_erosion(rng, days, seats, config):
+    d = _Draw(rng, days)
+    factor = [max(0.35, 1.0 - p / PATTERN_DAYS * 0.65) for p in _positions(days)]
+    return {
+        "dau": _scale(_scale(d.uniform(0.4, 0.6), seats), factor),
+        "wau": _scale(_scale(d.uniform(0.5, 0.7), seats), factor),
+        "mau": _scale(_scale(d.uniform(0.6, 0.8), seats), factor),
+        "active_seats": _floor_int(_scale(_scale(d.uniform(0.4, 0.7), seats), factor), 1),
+        "feature_count": _floor_int(_scale(d.uniform(3, 5), factor), 1),
+        "api_calls": _floor_int(_scale(d.randint(100, 250), factor), 0),
+        "support_tickets": d.randint(1, 3),
+        "logins": _floor_int(_scale(d.randint(5, 10), factor), 1),
+        "nps_score": [v * f + 2 for v, f in zip(d.uniform(4, 6), factor)],
+    }
+
+
+def _seat_collapse(rng, days, seats, config):
+    d = _Draw(rng, days)
+    return {
+        "dau": d.uniform(0.6, 0.9),
+        "wau": d.uniform(0.8, 1.0),
+        "mau": [1.0] * days,
+        "active_seats": [1] * days,
+        "feature_count": d.randint(2, 4),
+        "api_calls": d.randint(50, 150),
+        "support_tickets": d.randint(0, 2),
+        "logins": d.randint(3, 8),
+        "nps_score": d.uniform(5, 7),
+    }
+
+
+def _partial_seat_collapse(rng, days, seats, config):
+    active = config.get("active_seats_count", 2)
+    d = _Draw(rng, days)
+    return {
+        "dau": _scale(d.uniform(0.5, 0.8), active),
+        "wau": _scale(d.uniform(0.7, 0.95), active),
+        "mau": _scale(d.uniform(0.85, 1.0), active),
+        "active_seats": [active] * days,
+        "feature_count": d.randint(3, 5),
+        "api_calls": d.randint(80, 200),
+        "support_tickets": d.randint(1, 2),
+        "logins": d.randint(5, 12),
+        "nps_score": d.uniform(5, 7),
+    }
+
+
+def _engagement_drop(rng, days, seats, config):
+    d = _Draw(rng, days)
+    decay = [max(0.0, (p - 50) / 40.0) for p in _positions(days)]
+    return {
+        "dau": [seats * r * max(0.3, 1 - x * 0.7) for r, x in zip(d.uniform(0.55, 0.72), decay)],
+        "wau": _scale(d.uniform(0.65, 0.80), seats),
+        "mau": _scale(d.uniform(0.78, 0.92), seats),
+        "active_seats": _floor_int(_scale(d.uniform(0.60, 0.78), seats), 1),
+        "feature_count": d.randint(5, 7),
+        "api_calls": d.randint(280, 520),
+        "support_tickets": d.randint(0, 1),
+        "logins": [v if x == 0 else max(3, int(v * (1 - x * 0.75))) for v, x in zip(d.randint(20, 35), decay)],
+        "nps_score": d.uniform(6.5, 8.0),
+    }
+
+
+def _slight_decline(rng, days, seats, config):
+    d = _Draw(rng, days)
+    decay = [max(0.0, (p - 60) / 30.0) for p in _positions(days)]
+    return {
+        "dau": _scale(d.uniform(0.6, 0.78), seats),
+        "wau": _scale(d.uniform(0.75, 0.88), seats),
+        "mau": _scale(d.uniform(0.82, 0.95), seats),
+        "active_seats": _floor_int(_scale(d.uniform(0.7, 0.88), seats), 1),
+        "feature_count": d.randint(5, 7),
+        "api_calls": d.randint(300, 600),
+        "support_tickets": d.randint(0, 1),
+        "logins": [v if x == 0 else max(5, int(v * (1 - x * 0.4))) for v, x in zip(d.randint(15, 25), decay)],
+        "nps_score": d.uniform(7, 8.5),
+    }
+
+
+def _recovery(rng, days, seats, config):
+    d = _Draw(rng, days)
+    factor = [
+        max(0.25, 0.65 - p / 55.0 * 0.40) if p < 55 else 0.25 + (p - 55) / 35.0 * 0.50
+        for p in _positions(days)
+    ]
+    return {
+        "dau": _scale(_scale(d.uniform(0.45, 0.65), seats), factor),
+        "wau": _scale(_scale(d.uniform(0.60, 0.78), seats), factor),
+        "mau": _scale(_scale(d.uniform(0.72, 0.88), seats), factor),
+        "active_seats": _floor_int(_scale(_scale(d.uniform(0.50, 0.72), seats), factor), 1),
+        "feature_count": _floor_int(_scale(d.uniform(4, 7), factor), 1),
+        "api_calls": _floor_int(_scale(d.randint(200, 500), factor), 0),
+        "support_tickets": [max(0, int(v * (1 - f * 0.5))) for v, f in zip(d.randint(1, 3), factor)],
+        "logins": _floor_int(_scale(d.randint(8, 18), factor), 1),
+        "nps_score": [v * f + 2 for v, f in zip(d.uniform(5, 8), factor)],
+    }
+
+
+def _stable_good(rng, days, seats, config):
+    intensity = (config.get("score_target", 77) - 74) / 8.0
+    d = _Draw(rng, days)
+    support_weights = [70 + int(intensity * 10), 30 - int(intensity * 10)]
+    return {
+        "dau": _scale(d.uniform(0.52 + intensity * 0.12, 0.65 + intensity * 0.12), seats),
+        "wau": _scale(d.uniform(0.68 + intensity * 0.10, 0.80 + intensity * 0.10), seats),
+        "mau": _scale(d.uniform(0.80 + intensity * 0.08, 0.90 + intensity * 0.06), seats),
+        "active_seats": _floor_int(_scale(d.uniform(0.62 + intensity * 0.10, 0.76 + intensity * 0.10), seats), 1),
+        "feature_count": [min(10, v) for v in d.randint(5 + int(intensity * 2), 7 + int(intensity * 2))],
+        "api_calls": d.randint(320 + int(intensity * 150), 550 + int(intensity * 200)),
+        "support_tickets": d.choices([0, 1], support_weights),
+        "logins": d.randint(10 + int(intensity * 5), 16 + int(intensity * 5)),
+        "nps_score": d.uniform(6.5 + intensity, 8.0 + intensity),
+    }
+
+
+def _growing(rng, days, seats, config):
+    d = _Draw(rng, days)
+    positions = _positions(days)
+    growth = [1.0 + p / PATTERN_DAYS * 0.4 for p in positions]
+    return {
+        "dau": _scale(_scale(d.uniform(0.7, 0.85), seats), growth),
+        "wau": _scale(_scale(d.uniform(0.85, 0.95), seats), growth),
+        "mau": [seats * min(1.2, v * g) for v, g in zip(d.uniform(0.9, 1.0), growth)],
+        "active_seats": _floor_int(_scale(d.uniform(0.8, 0.95), seats), 1),
+        "feature_count": [min(10, int(v + p / 30)) for v, p in zip(d.uniform(6, 8), positions)],
+        "api_calls": _floor_int(_scale(d.randint(700, 1200), growth), 0),
+        "support_tickets": d.randint(0, 1),
+        "logins": _floor_int(_scale(d.randint(25, 40), growth), 0),
+        "nps_score": d.uniform(8, 10),
+    }
+
+
+def _stable_high(rng, days, seats, config):
+    d = _Draw(rng, days)
+    return {
+        "dau": _scale(d.uniform(0.8, 0.95), seats),
+        "wau": _scale(d.uniform(0.9, 1.0), seats),
+        "mau": _scale(d.uniform(0.95, 1.0), seats),
+        "active_seats": _floor_int(_scale(d.uniform(0.88, 0.98), seats), 1),
+        "feature_count": d.randint(8, 10),
+        "api_calls": d.randint(1200, 2000),
+        "support_tickets": d.randint(0, 1),
+        "logins": d.randint(40, 60),
+        "nps_score": d.uniform(8.5, 10),
+    }
+
+
+def _upsell(rng, days, seats, config):
+    d = _Draw(rng, days)
+    return {
+        "dau": _scale(d.uniform(0.85, 0.98), seats),
+        "wau": _scale(d.uniform(0.92, 1.0), seats),
+        "mau": _scale(d.uniform(0.95, 1.0), seats),
+        "active_seats": _floor_int(_scale(d.uniform(0.9, 1.0), seats), 1),
+        "feature_count": [9] * days,
+        "api_calls": d.randint(1500, 2500),
+        "support_tickets": [0] * days,
+        "logins": d.randint(50, 80),
+        "nps_score": d.uniform(9, 10),
+    }
+
+
+PATTERNS = {
+    "sudden_drop": _sudden_drop,
+    "cliff_fall": _cliff_fall,
+    "abandoned": _abandoned,
+    "slow_erosion": _slow_erosion,
+    "seat_collapse": _seat_collapse,
+    "partial_seat_collapse": _partial_seat_collapse,
+    "engagement_drop": _engagement_drop,
+    "slight_decline": _slight_decline,
+    "recovery": _recovery,
+    "stable_good": _stable_good,
+    "growing": _growing,
+    "stable_high": _stable_high,
+    "upsell": _upsell,
+}
+
+
+def account_rng(seed: int, index: int) -> random.Random:
+    """The RNG behind account `index`'s metrics, independent of every other account."""
+    return random.Random(seed * 1_000_003 + index)
+
+
+def synthetic_accounts(count: int, today: date, seed: int = DEFAULT_SEED) -> List[dict]:
+    """`count` account configs cycling through the demo templates.
+
+    The first 30 are the demo accounts unchanged; later cycles get a numbered
+    name and jittered seats, MRR and renewal date.
+    """
+    from seed import demo_accounts
+
+    templates = demo_accounts(today)
+    accounts = []
+    for index in range(count):
+        config = dict(templates[index % len(templates)])
+        cycle = index // len(templates)
+        if cycle:
+            rng = account_rng(seed, -1 - index)
+            jitter = rng.uniform(0.7, 1.3)
+            config["name"] = f"{config['name']} {cycle + 1}"
+            config["seats"] = max(1, round(config["seats"] * jitter))
+            config["mrr"] = round(config["mrr"] * jitter, 2)
+            config["renewal_date"] += timedelta(days=rng.randint(-10, 10))
+        accounts.append(config)
+    return accounts
+
+
+def generate_columns(config: dict, days: int, rng: random.Random) -> Dict[str, list]:
+    """One account's metric columns, oldest day first, following its pattern."""
+    return PATTERNS[config["pattern"]](rng, days, config["seats"], config)
+
+
+def _chunks(accounts: List[dict], days: int, chunk_rows: int) -> Iterator[Tuple[int, int]]:
+    per_chunk = max(1, chunk_rows // days)
+    for start in range(0, len(accounts), per_chunk):
+        yield start, min(len(accounts), start + per_chunk)
+
+
+def _driver_insert(table: str, columns: Sequence[str]) -> str:
+    """Plain INSERT for DBAPI executemany with positional rows.
+
+    Skips SQLAlchemy's per-row parameter processing, which otherwise costs more
+    than generating the rows.
+    """
+    from database import engine
+
+    marker = "?" if engine.dialect.paramstyle == "qmark" else "%s"
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join([marker] * len(columns))})"
+
+
+def load_synthetic(
+    count: int,
+    days: int,
+    seed: int = DEFAULT_SEED,
+    chunk_rows: int = CHUNK_ROWS,
+    today: Optional[date] = None,
+    progress=None,
+) -> dict:
+    """Bulk-insert `count` accounts with `days` days of metrics ending today.
+
+    Creates the default company if there is none. Each chunk of accounts and
+    their metric rows is committed in one transaction.
+    """
+    from sqlalchemy import insert, select
+
+    from database import engine
+    from metric_store import invalidate_metric_store
+    from models import Account, Company, UsageMetric
+
+    today = today or date.today()
+    # ISO strings: the stored form on SQLite, and cast to date by Postgres.
+    dates = [(today - timedelta(days=days - 1 - d)).isoformat() for d in range(days)]
+    metric_insert = _driver_insert(UsageMetric.__tablename__, ("account_id", "date") + METRIC_COLUMNS)
+    accounts = synthetic_accounts(count, today, seed)
+    account_fields = ("name", "tier", "seats", "mrr", "renewal_date", "csm_name")
+    started = time.perf_counter()
+    rows_written = 0
+
+    with engine.begin() as conn:
+        if conn.execute(select(Company.id).limit(1)).first() is None:
+            conn.execute(insert(Company).values(name="Demo Company"))
+
+    for start, stop in _chunks(accounts, days, chunk_rows):
+        batch = accounts[start:stop]
+        with engine.begin() as conn:
+            ids = conn.execute(
+                insert(Account).returning(Account.id, sort_by_parameter_order=True),
+                [{field: config[field] for field in account_fields} for config in batch],
+            ).scalars().all()
+            rows = []
+            for offset, (account_id, config) in enumerate(zip(ids, batch)):
+                columns = generate_columns(config, days, account_rng(seed, start + offset))
+                rows.extend(
+                    (account_id, day, *values)
+                    for day, values in zip(dates, zip(*(columns[c] for c in METRIC_COLUMNS)))
+                )
+            conn.exec_driver_sql(metric_insert, rows)
+        rows_written += len(rows)
+        if progress:
+            progress(accounts_done=stop, rows=rows_written)
+
+    invalidate_metric_store()
+    elapsed = time.perf_counter() - started
+    summary = {
+        "accounts": count,
+        "days": days,
+        "rows": rows_written,
+        "seconds": round(elapsed, 1),
+        "rows_per_second": round(rows_written / elapsed) if elapsed else None,
+    }
+    logger.info(f"Synthetic data loaded: {summary}")
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load synthetic accounts and usage metrics into DATABASE_URL.")
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=PATTERN_DAYS)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    from database import init_db
+
+    init_db()
+
+    def report(accounts_done, rows):
+        logger.info(f"  {accounts_done}/{args.accounts} accounts, {rows} rows")
+
+    load_synthetic(args.accounts, args.days, args.seed, args.chunk_rows, progress=report)
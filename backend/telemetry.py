@@ -0,0 +1,335 @@
+"""In-process metrics, served in the Prometheus text format by GET /metrics.
+
+Counters and histograms live in module-level registries, like the response cache
+and the job queue, so every worker thread records into the same series.
+Recording is a dict lookup and a few additions under a lock. A process
+restart clears everything, and with several uvicorn workers each worker
+reports its own numbers.
+
+SQL statements are also counted and timed per request and per scan (see
+`track_queries`). Each response carries X-DB-Queries and a Server-Timing "db"
+entry. A request over its query budget logs a warning; with
+SQL_QUERY_BUDGET_STRICT=1 the statement that crosses the budget raises
+QueryBudgetExceeded instead, so a per-account query loop fails loudly in
+benchmarks and local runs.
+"""
+import functools
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds. Spans sub-millisecond cached reads up to multi-minute scans.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Queries one request may run before it is reported. Routes whose query count
+# grows with the upload (bulk ingest commits in chunks) get their own budget;
+# None exempts a route, as it does everything under ADMIN_ROUTE_PREFIX.
+SQL_QUERY_BUDGET = int(os.getenv("SQL_QUERY_BUDGET", "20"))
+SQL_QUERY_BUDGET_STRICT = os.getenv("SQL_QUERY_BUDGET_STRICT", "").lower() in ("1", "true", "yes")
+ROUTE_QUERY_BUDGETS: Dict[str, Optional[int]] = {
+    "/api/metrics/batch": None,
+    "/api/usage-events": None,
+}
+ADMIN_ROUTE_PREFIX = "/api/admin/"
+
+_registry: List["_Metric"] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> Tuple:
+        return tuple(labels[name] for name in self.labels)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_number(value)}" for key, value in values]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        lines = []
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_number(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_number(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    return "\n".join(line for metric in _registry for line in metric.render()) + "\n"
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "pulsescore_http_request_duration_seconds",
+    "HTTP request latency by route template, until the last response byte.",
+    ("method", "route", "status"),
+)
+SCAN_SECONDS = Histogram(
+    "pulsescore_scan_duration_seconds", "Wall time of scans and rescores.", ("kind",)
+)
+SCAN_PHASE_SECONDS = Histogram(
+    "pulsescore_scan_phase_duration_seconds",
+    "Time spent in each scan phase, summed over the accounts of one scan.",
+    ("kind", "phase"),
+)
+SCAN_ACCOUNTS = Counter(
+    "pulsescore_scan_accounts_total", "Accounts scored by scans and rescores.", ("kind",)
+)
+LLM_CALL_SECONDS = Histogram(
+    "pulsescore_llm_call_duration_seconds",
+    "ai_engine call latency, including SDK retries.",
+    ("function", "outcome"),
+)
+DB_QUERIES = Counter(
+    "pulsescore_db_queries_total", "SQL statements executed, by engine.", ("engine",)
+)
+HTTP_REQUEST_QUERIES = Histogram(
+    "pulsescore_http_request_db_queries",
+    "SQL statements per HTTP request, by route template.",
+    ("method", "route"),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 500, 1000),
+)
+
+
+class PhaseTimer:
+    """Splits a scan's wall time into phases.
+
+    `lap(phase)` charges the time since the previous lap to `phase`, so the laps
+    inside a per-account loop add up without a context manager per call.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.started = self._last = time.perf_counter()
+        self.totals: Dict[str, float] = {}
+
+    def lap(self, phase: str):
+        now = time.perf_counter()
+        self.totals[phase] = self.totals.get(phase, 0.0) + (now - self._last)
+        self._last = now
+
+    def finish(self, accounts: int) -> Dict[str, float]:
+        """Record the scan's metrics and return seconds per phase."""
+        for phase, seconds in self.totals.items():
+            SCAN_PHASE_SECONDS.observe(seconds, kind=self.kind, phase=phase)
+        SCAN_SECONDS.observe(time.perf_counter() - self.started, kind=self.kind)
+        SCAN_ACCOUNTS.inc(accounts, kind=self.kind)
+        return dict(self.totals)
+
+
+def timed_llm_call(fn: Callable) -> Callable:
+    """Record the latency and outcome of an ai_engine function."""
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = fn(*args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            LLM_CALL_SECONDS.observe(time.perf_counter() - started, function=fn.__name__, outcome=outcome)
+
+    return wrapper
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+class QueryStats:
+    """SQL statements run and seconds spent in the database by one request or scan.
+
+    Requests pass their ASGI scope instead of a budget: the budget depends on the
+    route, which is only matched after tracking starts.
+    """
+
+    __slots__ = ("label", "budget", "scope", "count", "seconds")
+
+    def __init__(self, label: str, budget: Optional[int] = None, scope: Optional[dict] = None):
+        self.label = label
+        self.budget = budget
+        self.scope = scope
+        self.count = 0
+        self.seconds = 0.0
+
+    @property
+    def limit(self) -> Optional[int]:
+        if self.scope is None:
+            return self.budget
+        return route_query_budget(getattr(self.scope.get("route"), "path", None))
+
+
+_current_queries: ContextVar[Optional[QueryStats]] = ContextVar("current_queries", default=None)
+
+
+@contextmanager
+def track_queries(label: str, budget: Optional[int] = None) -> Iterator[QueryStats]:
+    """Count the statements run in this context (and threads it is copied to)."""
+    stats = QueryStats(label, budget)
+    token = _current_queries.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_queries.reset(token)
+
+
+def route_query_budget(route_path: Optional[str]) -> Optional[int]:
+    if route_path is not None and route_path.startswith(ADMIN_ROUTE_PREFIX):
+        return None
+    return ROUTE_QUERY_BUDGETS.get(route_path, SQL_QUERY_BUDGET)
+
+
+def instrument_engine(engine, label: str):
+    """Count and time the statements an Engine (or AsyncEngine.sync_engine) executes."""
+    from sqlalchemy import event
+
+    # The start time lives on the execution context rather than the connection, so
+    # a statement that fails (and never reaches after_cursor_execute) leaves
+    # nothing behind on the pooled connection.
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_started
+        DB_QUERIES.inc(engine=label)
+        stats = _current_queries.get()
+        if stats is None:
+            return
+        stats.count += 1
+        stats.seconds += elapsed
+        if SQL_QUERY_BUDGET_STRICT:
+            limit = stats.limit
+            if limit is not None and stats.count == limit + 1:
+                raise QueryBudgetExceeded(
+                    f"{stats.label} exceeded its budget of {limit} SQL queries with: {statement[:200]}"
+                )
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    event.listen(engine, "after_cursor_execute", after_execute)
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware timing each HTTP request and its SQL under its route template.
+
+    Paths no route matched are grouped as "unmatched", so probes for random URLs
+    cannot grow the series without bound.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        queries = QueryStats(f"{scope['method']} {scope['path']}", scope=scope)
+        token = _current_queries.set(queries)
+
+        async def send_and_record(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-queries", str(queries.count).encode()),
+                    (b"server-timing", f"db;dur={queries.seconds * 1000:.1f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_record)
+        finally:
+            _current_queries.reset(token)
+            method = scope["method"]
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=method, route=route, status=status)
+            HTTP_REQUEST_QUERIES.observe(queries.count, method=method, route=route)
+            limit = queries.limit
+            if limit is not None and queries.count > limit:
+                logger.warning(
+                    f"{method} {route} ran {queries.count} SQL queries (budget {limit}), "
+                    f"{queries.seconds * 1000:.1f} ms in the database"
+                )
@@ -0,0 +1,327 @@
+"""Aggregate raw product events into daily usage_metrics rows.
+
+Events are folded into an in-memory buffer keyed by (account_id, day) and written
+by periodic flushes as one upsert per account-day, never one write per event:
+
+- login, api_call and support_ticket add `count` to logins, api_calls, support_tickets
+- any event with a user_id adds that user to the account's daily HyperLogLog
+  sketch, which gives dau and active_seats, and wau/mau merged over 7 and 30 days
+- feature_used adds `feature` to the day's distinct feature_count
+- nps sets nps_score
+
+Counters are flushed as increments. User ids are merged into the stored sketch
+on every flush, so the buffer only holds users seen since the last flush. Distinct
+features stay in memory while the day is open (today and yesterday) and are
+written as max(stored, seen). Either way, flushing the same day repeatedly never
+double counts.
+"""
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import case, func, select
+
+from database import dialect_insert
+from hll import HyperLogLog, merged
+from models import UsageMetric, UserSketch
+from schemas import UsageEventIn
+
+logger = logging.getLogger(__name__)
+
+EVENT_BUFFER_MAX_EVENTS = int(os.getenv("EVENT_BUFFER_MAX_EVENTS", "200000"))
+EVENT_FLUSH_INTERVAL_SECONDS = int(os.getenv("EVENT_FLUSH_INTERVAL_SECONDS", "10"))
+FLUSH_BATCH_KEYS = 2000
+OPEN_DAYS = 2
+WAU_DAYS = 7
+MAU_DAYS = 30
+
+_COUNTERS = {"login": "logins", "api_call": "api_calls", "support_ticket": "support_tickets"}
+
+
+class BufferFull(Exception):
+    """Raised when the buffer is still full after a flush, e.g. the database is down."""
+
+
+class _Day:
+    __slots__ = ("logins", "api_calls", "support_tickets", "nps_score", "users", "features", "events", "dirty")
+
+    def __init__(self):
+        self.logins = 0
+        self.api_calls = 0
+        self.support_tickets = 0
+        self.nps_score = None
+        self.users: Set[str] = set()
+        self.features: Set[str] = set()
+        self.events = 0  # added since the last flush
+        self.dirty = False
+
+
+_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_days: Dict[Tuple[int, date], _Day] = {}
+_pending_events = 0
+
+
+def pending_events() -> int:
+    """Events added since the last flush."""
+    return _pending_events
+
+
+def add_events(events: Iterable[UsageEventIn]) -> int:
+    """Fold validated events into the buffer and return how many were added."""
+    global _pending_events
+    now = datetime.now()
+    added = 0
+    with _lock:
+        for event in events:
+            key = (event.account_id, (event.timestamp or now).date())
+            day = _days.get(key)
+            if day is None:
+                day = _days[key] = _Day()
+            counter = _COUNTERS.get(event.type)
+            if counter:
+                setattr(day, counter, getattr(day, counter) + event.count)
+            if event.user_id is not None:
+                day.users.add(event.user_id)
+            if event.type == "feature_used" and event.feature:
+                day.features.add(event.feature)
+            if event.type == "nps" and event.score is not None:
+                day.nps_score = event.score
+            day.events += 1
+            day.dirty = True
+            added += 1
+        _pending_events += added
+    return added
+
+
+def _take_dirty() -> Tuple[Dict[Tuple[int, date], dict], int]:
+    """Move the unflushed counters out of the buffer."""
+    global _pending_events
+    taken = {}
+    with _lock:
+        for key, day in _days.items():
+            if not day.dirty:
+                continue
+            taken[key] = {
+                "logins": day.logins,
+                "api_calls": day.api_calls,
+                "support_tickets": day.support_tickets,
+                "nps_score": day.nps_score,
+                "users": day.users,
+                "features": len(day.features),
+                "events": day.events,
+            }
+            day.logins = day.api_calls = day.support_tickets = day.events = 0
+            day.nps_score = None
+            day.users = set()
+            day.dirty = False
+        events, _pending_events = _pending_events, 0
+    return taken, events
+
+
+def _restore(taken: Dict[Tuple[int, date], dict]):
+    """Put counters back after a failed flush so the next flush retries them.
+
+    Only the events of the restored keys are counted as pending again; keys the
+    flush already wrote are not.
+    """
+    global _pending_events
+    with _lock:
+        for key, values in taken.items():
+            day = _days.get(key)
+            if day is None:
+                day = _days[key] = _Day()
+            for counter in _COUNTERS.values():
+                setattr(day, counter, getattr(day, counter) + values[counter])
+            if day.nps_score is None:
+                day.nps_score = values["nps_score"]
+            day.users |= values["users"]
+            day.events += values["events"]
+            day.dirty = True
+            _pending_events += values["events"]
+
+
+def _prune_closed_days():
+    cutoff = datetime.now().date() - timedelta(days=OPEN_DAYS - 1)
+    with _lock:
+        for key in [key for key, day in _days.items() if key[1] < cutoff and not day.dirty]:
+            del _days[key]
+
+
+def _update_sketches(conn, batch: List[Tuple[int, date]], taken: Dict[Tuple[int, date], dict]) -> Dict[Tuple[int, date], dict]:
+    """Merge each account-day's new users into its stored sketch.
+
+    Returns dau/wau/mau for the account-days that saw users, computed from the
+    daily sketches of the trailing 7 and 30 days.
+    """
+    table = UserSketch.__table__
+    keys = [key for key in batch if taken[key]["users"]]
+    if not keys:
+        return {}
+    first_day = min(key[1] for key in keys) - timedelta(days=MAU_DAYS - 1)
+    sketches: Dict[Tuple[int, date], HyperLogLog] = {}
+    for row in conn.execute(
+        select(table).where(
+            table.c.account_id.in_({key[0] for key in keys}),
+            table.c.date >= first_day,
+            table.c.date <= max(key[1] for key in keys),
+        )
+    ):
+        sketches[(row.account_id, row.date)] = HyperLogLog.from_bytes(row.sketch)
+
+    rows = []
+    for key in keys:
+        sketch = sketches.setdefault(key, HyperLogLog())
+        sketch.update(taken[key]["users"])
+        rows.append({"account_id": key[0], "date": key[1], "sketch": sketch.to_bytes()})
+    statement = dialect_insert(table)
+    conn.execute(
+        statement.on_conflict_do_update(
+            index_elements=["account_id", "date"], set_={"sketch": statement.excluded.sketch}
+        ),
+        rows,
+    )
+
+    counts = {}
+    for account_id, day in keys:
+        window = [sketches.get((account_id, day - timedelta(days=offset))) for offset in range(MAU_DAYS)]
+        week = merged(s for s in window[:WAU_DAYS] if s is not None)
+        month = merged([week] + [s for s in window[WAU_DAYS:] if s is not None])
+        counts[(account_id, day)] = {
+            "dau": sketches[(account_id, day)].count(),
+            "wau": week.count(),
+            "mau": month.count(),
+        }
+    return counts
+
+
+def _upsert_batch(conn, batch: List[Tuple[int, date]], taken: Dict[Tuple[int, date], dict]) -> List[dict]:
+    """Merge one batch of account-days into usage_metrics and return the stored rows.
+
+    Counters are added to the stored row, feature_count keeps the larger value and
+    dau/wau/mau/active_seats are replaced only for account-days that saw users.
+    """
+    table = UsageMetric.__table__
+    counts = _update_sketches(conn, batch, taken)
+
+    statement = dialect_insert(table)
+    excluded = statement.excluded
+    merge = {
+        counter: func.coalesce(table.c[counter], 0) + excluded[counter] for counter in _COUNTERS.values()
+    }
+    merge["feature_count"] = case(
+        (excluded.feature_count > func.coalesce(table.c.feature_count, 0), excluded.feature_count),
+        else_=table.c.feature_count,
+    )
+    merge["nps_score"] = func.coalesce(excluded.nps_score, table.c.nps_score)
+    replace_counts = {column: excluded[column] for column in ("dau", "wau", "mau", "active_seats")}
+
+    with_counts, without_counts = [], []
+    for key in batch:
+        values = taken[key]
+        row = {
+            "account_id": key[0],
+            "date": key[1],
+            "logins": values["logins"],
+            "api_calls": values["api_calls"],
+            "support_tickets": values["support_tickets"],
+            "feature_count": values["features"],
+            "nps_score": values["nps_score"],
+            "dau": 0.0,
+            "wau": 0.0,
+            "mau": 0.0,
+            "active_seats": 0,
+        }
+        if key in counts:
+            row.update(counts[key])
+            row["active_seats"] = round(row["dau"])
+            with_counts.append(row)
+        else:
+            without_counts.append(row)
+
+    conflict = ["account_id", "date"]
+    if with_counts:
+        conn.execute(
+            statement.on_conflict_do_update(index_elements=conflict, set_={**merge, **replace_counts}),
+            with_counts,
+        )
+    if without_counts:
+        conn.execute(statement.on_conflict_do_update(index_elements=conflict, set_=merge), without_counts)
+
+    keys = set(batch)
+    stored = conn.execute(
+        select(table).where(
+            table.c.account_id.in_({key[0] for key in batch}), table.c.date.in_({key[1] for key in batch})
+        )
+    )
+    return [dict(row._mapping) for row in stored if (row.account_id, row.date) in keys]
+
+
+def flush_buffer() -> dict:
+    """Write buffered account-days to usage_metrics in batched upserts."""
+    from database import engine
+    from cache import bump_data_version
+    from metric_store import bump_generation, get_metric_store, save_metric_store
+    from scheduler import mark_for_rescore
+
+    summary = {"events": 0, "account_days": 0}
+    with _flush_lock:
+        taken, events = _take_dirty()
+        if not taken:
+            _prune_closed_days()
+            return summary
+
+        keys = sorted(taken)
+        written: List[dict] = []
+        done = 0
+        try:
+            for start in range(0, len(keys), FLUSH_BATCH_KEYS):
+                batch = keys[start:start + FLUSH_BATCH_KEYS]
+                with engine.begin() as conn:
+                    rows = _upsert_batch(conn, batch, taken)
+                    max_id = conn.execute(select(func.max(UsageMetric.id))).scalar()
+                    generation = bump_generation(conn)
+                store = get_metric_store()
+                if store is not None:
+                    store.record_rows(rows, max_id, generation)
+                written.extend(rows)
+                done += len(batch)
+        except Exception:
+            _restore({key: taken[key] for key in keys[done:]})
+            raise
+        finally:
+            if written:
+                save_metric_store()
+                mark_for_rescore({row["account_id"] for row in written})
+                bump_data_version()
+
+        _prune_closed_days()
+    summary["events"] = events
+    summary["account_days"] = len(keys)
+    logger.info(f"Usage event buffer flushed: {summary}")
+    return summary
+
+
+def discard_buffer() -> int:
+    """Drop everything buffered, e.g. when a reseed replaces the accounts. Returns the event count."""
+    global _pending_events
+    with _flush_lock, _lock:
+        dropped = _pending_events
+        _days.clear()
+        _pending_events = 0
+    return dropped
+
+
+def make_room(incoming: int = 0):
+    """Flush if `incoming` more events would overfill the buffer; raise BufferFull
+    if that does not make room. An empty buffer always takes them."""
+    if _pending_events + incoming <= EVENT_BUFFER_MAX_EVENTS:
+        return
+    try:
+        flush_buffer()
+    except Exception as e:
+        logger.error(f"Usage event flush failed: {e}")
+    if _pending_events and _pending_events + incoming > EVENT_BUFFER_MAX_EVENTS:
+        raise BufferFull(f"Usage event buffer is full ({_pending_events} events)")
@@ -6,6 +6,8 @@ import type {
   RevenueForecast,
   RenewalCalendarItem,
   RenewalNotificationSettings,
+  Dashboard,
+  Alert,
 } from '../types'
 
 export interface ScanSummary {
@@ -20,10 +22,23 @@ export interface ScanSummary {
   scan_completed_at: string | null
 }
 
-export interface ScanResponse {
-  status: 'ok'
-  message: string
-  summary: ScanSummary
+export interface Job<TSummary = Record<string, unknown>> {
+  id: string
+  kind: 'scan' | 'seed'
+  trigger: string
+  status: 'queued' | 'running' | 'succeeded' | 'failed'
+  progress: {
+    phase?: string
+    accounts_done?: number
+    accounts_total?: number
+    anomalies_created?: number
+  }
+  summary: TSummary | null
+  error: string | null
+  next_job_id: string | null
+  created_at: string
+  started_at: string | null
+  finished_at: string | null
 }
 
 function resolveApiBase(): string {
@@ -89,9 +104,12 @@ export const api = {
     request('/api/onboarding', { method: 'POST', body: JSON.stringify(data) }),
 
   listAccounts: () => request<AccountListItem[]>('/api/accounts'),
+  listAccountsByIds: (ids: number[]) =>
+    request<AccountListItem[]>(`/api/accounts?ids=${ids.join(',')}`),
   getAccount: (id: number) => request<AccountDetail>(`/api/accounts/${id}`),
 
   getStats: () => request<Stats>('/api/stats'),
+  getDashboard: () => request<Dashboard>('/api/dashboard'),
   getRevenueForecast: () => request<RevenueForecast>('/api/revenue-forecast'),
   getRenewalCalendar: (month: string) =>
     request<RenewalCalendarItem[]>(`/api/renewals/calendar?month=${encodeURIComponent(month)}`),
@@ -108,6 +126,34 @@ export const api = {
   rejectOutreach: (anomalyId: number) =>
     request(`/api/anomalies/${anomalyId}/reject`, { method: 'POST' }),
 
-  runScan: () => request<ScanResponse>('/api/run-scan', { method: 'POST' }),
-  reseed: () => request('/api/seed', { method: 'POST' }),
+  runScan: () => request<Job<ScanSummary>>('/api/run-scan', { method: 'POST' }),
+  reseed: () => request<Job>('/api/seed', { method: 'POST' }),
+  getJob: <TSummary>(id: string) => request<Job<TSummary>>(`/api/jobs/${id}`),
+  eventsUrl: () => withBase('/api/events'),
+}
+
+export interface AccountsChangedEvent {
+  account_ids: number[]
+  reason: 'score' | 'anomaly' | 'outreach'
+}
+
+export interface AlertsCreatedEvent {
+  alerts: Pick<Alert, 'id' | 'account_id' | 'alert_type' | 'severity' | 'message'>[]
+}
+
+export async function waitForJob<TSummary>(
+  job: Job<TSummary>,
+  onProgress?: (job: Job<TSummary>) => void,
+  intervalMs = 1000,
+): Promise<Job<TSummary>> {
+  let current = job
+  while (current.status === 'queued' || current.status === 'running') {
+    onProgress?.(current)
+    await new Promise(resolve => setTimeout(resolve, intervalMs))
+    current = await api.getJob<TSummary>(current.id)
+  }
+  if (current.status === 'failed') {
+    throw new Error(current.error ?? `${current.kind} job failed`)
+  }
+  return current
 }
@@ -7,10 +7,11 @@ import RevenueForecastPanel from './RevenueForecastPanel'
 
 export default function Header() {
   const { state, runScan } = useApp()
-  const { stats, company, isScanning, scanFeedback } = state
+  const { stats, company, isScanning, scanProgress, scanFeedback } = state
   const [showRevenuePanel, setShowRevenuePanel] = useState(false)
   const [revenueHorizon, setRevenueHorizon] = useState<1 | 3 | 12>(12)
-  const [revenueForecast, setRevenueForecast] = useState<RevenueForecast | null>(null)
+  const [fetchedForecast, setRevenueForecast] = useState<RevenueForecast | null>(null)
+  const revenueForecast = fetchedForecast ?? state.revenueForecast
   const [loadingRevenue, setLoadingRevenue] = useState(false)
   const [revenueError, setRevenueError] = useState<string | null>(null)
 
@@ -120,7 +121,9 @@ export default function Header() {
           {isScanning ? (
             <>
               <span className="inline-block w-3 h-3 border-2 border-white/30 border-t-white rounded-full animate-spin" />
-              Scanning…
+              {scanProgress?.accounts_total
+                ? `Scanning… ${scanProgress.accounts_done ?? 0}/${scanProgress.accounts_total}`
+                : 'Scanning…'}
             </>
           ) : (
             'Run Scan'
@@ -1,6 +1,22 @@
-import React, { createContext, useContext, useReducer, useCallback, useEffect } from 'react'
-import type { Company, AccountListItem, AccountDetail, Stats, FilterState } from '../types'
-import { api, type ScanSummary } from '../api/client'
+import React, { createContext, useContext, useReducer, useCallback, useEffect, useRef } from 'react'
+import type {
+  Company,
+  AccountListItem,
+  AccountDetail,
+  Stats,
+  FilterState,
+  Alert,
+  Dashboard,
+  RevenueForecast,
+} from '../types'
+import {
+  api,
+  waitForJob,
+  type AccountsChangedEvent,
+  type AlertsCreatedEvent,
+  type Job,
+  type ScanSummary,
+} from '../api/client'
 
 interface ScanFeedback {
   kind: 'success' | 'error'
@@ -11,10 +27,13 @@ interface AppState {
   company: Company | null
   accounts: AccountListItem[]
   stats: Stats | null
+  alerts: Alert[]
+  revenueForecast: RevenueForecast | null
   selectedAccountId: number | null
   selectedAccount: AccountDetail | null
   filterState: FilterState
   isScanning: boolean
+  scanProgress: Job['progress'] | null
   scanFeedback: ScanFeedback | null
   loading: boolean
   error: string | null
@@ -24,10 +43,14 @@ type Action =
   | { type: 'SET_COMPANY'; payload: Company }
   | { type: 'SET_ACCOUNTS'; payload: AccountListItem[] }
   | { type: 'SET_STATS'; payload: Stats }
+  | { type: 'SET_DASHBOARD'; payload: Dashboard }
   | { type: 'SET_SELECTED'; payload: number | null }
   | { type: 'SET_ACCOUNT_DETAIL'; payload: AccountDetail | null }
   | { type: 'SET_FILTER'; payload: Partial<FilterState> }
   | { type: 'SET_SCANNING'; payload: boolean }
+  | { type: 'SET_SCAN_PROGRESS'; payload: Job['progress'] | null }
+  | { type: 'UPSERT_ACCOUNTS'; payload: AccountListItem[] }
+  | { type: 'ADD_ALERTS'; payload: Alert[] }
   | { type: 'SET_SCAN_FEEDBACK'; payload: ScanFeedback | null }
   | { type: 'SET_LOADING'; payload: boolean }
   | { type: 'SET_ERROR'; payload: string | null }
@@ -37,10 +60,13 @@ const initialState: AppState = {
   company: null,
   accounts: [],
   stats: null,
+  alerts: [],
+  revenueForecast: null,
   selectedAccountId: null,
   selectedAccount: null,
   filterState: { stateFilter: 'all', sortBy: 'score' },
   isScanning: false,
+  scanProgress: null,
   scanFeedback: null,
   loading: true,
   error: null,
@@ -54,6 +80,15 @@ function reducer(state: AppState, action: Action): AppState {
       return { ...state, accounts: action.payload }
     case 'SET_STATS':
       return { ...state, stats: action.payload }
+    case 'SET_DASHBOARD':
+      return {
+        ...state,
+        company: action.payload.company ?? state.company,
+        accounts: action.payload.accounts,
+        stats: action.payload.stats,
+        alerts: action.payload.alerts,
+        revenueForecast: action.payload.revenue_forecast,
+      }
     case 'SET_SELECTED':
       return { ...state, selectedAccountId: action.payload, selectedAccount: null }
     case 'SET_ACCOUNT_DETAIL':
@@ -62,6 +97,16 @@ function reducer(state: AppState, action: Action): AppState {
       return { ...state, filterState: { ...state.filterState, ...action.payload } }
     case 'SET_SCANNING':
       return { ...state, isScanning: action.payload }
+    case 'SET_SCAN_PROGRESS':
+      return { ...state, scanProgress: action.payload }
+    case 'UPSERT_ACCOUNTS': {
+      const updates = new Map(action.payload.map(a => [a.id, a]))
+      const merged = state.accounts.map(a => updates.get(a.id) ?? a)
+      const known = new Set(state.accounts.map(a => a.id))
+      return { ...state, accounts: [...merged, ...action.payload.filter(a => !known.has(a.id))] }
+    }
+    case 'ADD_ALERTS':
+      return { ...state, alerts: [...action.payload, ...state.alerts] }
     case 'SET_SCAN_FEEDBACK':
       return { ...state, scanFeedback: action.payload }
     case 'SET_LOADING':
@@ -114,14 +159,8 @@ export function AppProvider({ children }: { children: React.ReactNode }) {
   const refreshAll = useCallback(async () => {
     try {
       dispatch({ type: 'SET_LOADING', payload: true })
-      const [company, accounts, stats] = await Promise.all([
-        api.getCompany(),
-        api.listAccounts(),
-        api.getStats(),
-      ])
-      dispatch({ type: 'SET_COMPANY', payload: company })
-      dispatch({ type: 'SET_ACCOUNTS', payload: accounts })
-      dispatch({ type: 'SET_STATS', payload: stats })
+      const dashboard = await api.getDashboard()
+      dispatch({ type: 'SET_DASHBOARD', payload: dashboard })
     } catch (e) {
       dispatch({ type: 'SET_ERROR', payload: String(e) })
     } finally {
@@ -149,22 +188,19 @@ export function AppProvider({ children }: { children: React.ReactNode }) {
     dispatch({ type: 'SET_SCAN_FEEDBACK', payload: null })
     dispatch({ type: 'SET_ERROR', payload: null })
     try {
-      const scanResult = await api.runScan()
-      const [company, accounts, stats] = await Promise.all([
-        api.getCompany(),
-        api.listAccounts(),
-        api.getStats(),
-      ])
-      dispatch({ type: 'SET_COMPANY', payload: company })
-      dispatch({ type: 'SET_ACCOUNTS', payload: accounts })
-      dispatch({ type: 'SET_STATS', payload: stats })
+      const scanJob = await waitForJob(await api.runScan())
+      const dashboard = await api.getDashboard()
+      dispatch({ type: 'SET_DASHBOARD', payload: dashboard })
       if (state.selectedAccountId) {
         const detail = await api.getAccount(state.selectedAccountId)
         dispatch({ type: 'SET_ACCOUNT_DETAIL', payload: detail })
       }
       dispatch({
         type: 'SET_SCAN_FEEDBACK',
-        payload: { kind: 'success', message: formatScanSummary(scanResult.summary) },
+        payload: {
+          kind: 'success',
+          message: scanJob.summary ? formatScanSummary(scanJob.summary) : 'Scan completed.',
+        },
       })
     } catch (e) {
       const message = e instanceof Error ? e.message : String(e)
@@ -207,6 +243,52 @@ export function AppProvider({ children }: { children: React.ReactNode }) {
     refreshAll()
   }, [refreshAll])
 
+  const selectedIdRef = useRef<number | null>(null)
+  selectedIdRef.current = state.selectedAccountId
+
+  // Server-pushed scan progress and row-level changes: refresh only the affected
+  // account cards instead of re-fetching every list.
+  useEffect(() => {
+    const source = new EventSource(api.eventsUrl())
+
+    source.addEventListener('job', (e: MessageEvent) => {
+      const job = JSON.parse(e.data) as Job
+      const active = job.status === 'queued' || job.status === 'running'
+      dispatch({ type: 'SET_SCAN_PROGRESS', payload: active ? job.progress : null })
+      // A server that just started answers 503 until its startup job has seeded the database.
+      if ((job.kind === 'seed' || job.kind === 'startup') && job.status === 'succeeded') refreshAll()
+    })
+
+    source.addEventListener('accounts_changed', async (e: MessageEvent) => {
+      const { account_ids } = JSON.parse(e.data) as AccountsChangedEvent
+      try {
+        const [accounts, stats] = await Promise.all([
+          api.listAccountsByIds(account_ids),
+          api.getStats(),
+        ])
+        dispatch({ type: 'UPSERT_ACCOUNTS', payload: accounts })
+        dispatch({ type: 'SET_STATS', payload: stats })
+        const selectedId = selectedIdRef.current
+        if (selectedId && account_ids.includes(selectedId)) {
+          const detail = await api.getAccount(selectedId)
+          dispatch({ type: 'SET_ACCOUNT_DETAIL', payload: detail })
+        }
+      } catch (err) {
+        console.error('Failed to refresh changed accounts', err)
+      }
+    })
+
+    source.addEventListener('alerts_created', (e: MessageEvent) => {
+      const { alerts } = JSON.parse(e.data) as AlertsCreatedEvent
+      dispatch({
+        type: 'ADD_ALERTS',
+        payload: alerts.map(a => ({ ...a, resolved: false, created_at: new Date().toISOString() })),
+      })
+    })
+
+    return () => source.close()
+  }, [refreshAll])
+
   return (
     <AppContext.Provider
       value={{
@@ -1,7 +1,7 @@
 import { useState } from 'react'
 import { Link } from 'react-router-dom'
 import { useApp } from '../context/AppContext'
-import { api } from '../api/client'
+import { api, waitForJob } from '../api/client'
 import type { Company } from '../types'
 import IntegrationSection from '../components/settings/IntegrationSection'
 import AutonomyModeSection from '../components/settings/AutonomyModeSection'
@@ -93,7 +93,7 @@ export default function SettingsPage() {
           <button
             onClick={async () => {
               if (confirm('Reset all data? This cannot be undone.')) {
-                await api.reseed()
+                await waitForJob(await api.reseed())
                 window.location.href = '/'
               }
             }}
@@ -111,6 +111,24 @@ export interface RevenueForecast {
   assumptions_note: string
 }
 
+export interface Alert {
+  id: number
+  account_id: number
+  alert_type: string
+  message: string | null
+  severity: 'low' | 'medium' | 'high' | 'critical'
+  resolved: boolean
+  created_at: string
+}
+
+export interface Dashboard {
+  company: Company | null
+  stats: Stats
+  accounts: AccountListItem[]
+  alerts: Alert[]
+  revenue_forecast: RevenueForecast
+}
+
 export interface FilterState {
   stateFilter: HealthState | 'all'
   sortBy: 'score' | 'renewal'